@@ -0,0 +1,209 @@
+"""
+Card Scoring
+============
+Scores business-card screenshots 1-10 on the four axes of the rubric in
+research/business-card-patterns.md, from features computed with NumPy:
+
+  colors        distinct colors covering at least 1% of the card (each
+                channel quantized to 16 levels, so anti-aliasing and JPEG
+                noise don't count); "2-color max" is the good-card rule
+  contrast      WCAG contrast ratio between the 2nd and 98th percentile
+                luminance, i.e. text against its background
+  edges         share of pixels on a strong luminance edge; busy
+                backgrounds, clip art and pixelated logos all drive it up
+  colorfulness  Hasler-Süsstrunk colorfulness; gray templates are
+                forgettable, rainbows are garish
+  caps          share of upper-case letters in the card text
+  phones        phone numbers in the card text ("phone number soup")
+  words         words in the card text
+
+The text features need the card's text from extraction; without it they
+are left out and the axes that use them fall back to the image alone.
+
+Axes (higher is a better card, so low scores are the prospects):
+
+  readability      contrast, less an ALL-CAPS penalty
+  professionalism  color count and edge density
+  memorability     colorfulness, best in the middle of the range
+  information      one phone number and a short text
+
+The overall score is their mean; under 5 is a prime target. Each card
+also gets the "deadly sins" its features show.
+
+Images are decoded and downsized to SIZE in a process pool (one worker
+per core; decoding is most of the cost) and featurized a batch at a time
+as one (batch, height, width, 3) array: each pixel is reduced once to an
+RGB555 code and every feature is a table lookup, bincount or diff over
+the whole batch, about 2 ms of NumPy per card.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+SIZE = (280, 160)  # analysis resolution, card aspect
+BATCH_SIZE = 64  # ~35 MB of float32 working arrays per batch
+COLOR_SHARE = 0.01
+EDGE_THRESHOLD = 40  # gray levels between neighbours
+PRIME_TARGET = 5
+AXES = ("readability", "professionalism", "memorability", "information")
+PHONE_RE = re.compile(r"(?<!\d)(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)")
+
+# Each pixel is reduced once to a 15-bit RGB555 code; color bins,
+# luminance and gray are then single lookups in 32768-entry tables
+_RGB555 = [((np.arange(256) >> 3) << shift).astype(np.uint16) for shift in (10, 5, 0)]
+_LEVELS = (np.arange(32) * 8 + 4) / 255  # channel value at the middle of each 5-bit step
+_LINEAR = np.where(_LEVELS <= 0.04045, _LEVELS / 12.92, ((_LEVELS + 0.055) / 1.055) ** 2.4)
+_R, _G, _B = np.meshgrid(np.arange(32), np.arange(32), np.arange(32), indexing="ij")
+_R, _G, _B = _R.ravel(), _G.ravel(), _B.ravel()
+_LUMINANCE = (0.2126 * _LINEAR[_R] + 0.7152 * _LINEAR[_G] + 0.0722 * _LINEAR[_B]).astype(np.float32)
+_GRAY = ((299 * _R + 587 * _G + 114 * _B) * 8 // 1000).astype(np.int16)
+_BIN = ((_R >> 1) << 8 | (_G >> 1) << 4 | (_B >> 1)).astype(np.int32)  # 16 levels per channel
+
+
+def load_image(path):
+    """An image as a SIZE RGB uint8 array, or None if it can't be read."""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", SIZE)  # JPEG: decode at reduced size
+            # reduce() only takes 8-bit modes: palette PNGs, GIFs and
+            # 16-bit grayscale have to be converted first
+            rgb = img.convert("RGB") if img.mode != "RGB" else img
+            factor = min(rgb.width // SIZE[0], rgb.height // SIZE[1])
+            small = rgb.reduce(factor) if factor >= 2 else rgb
+            return np.asarray(small.resize(SIZE, Image.BILINEAR))
+    except (OSError, ValueError):
+        return None
+
+
+def image_features(batch):
+    """Per-image feature arrays for a (n, h, w, 3) uint8 batch."""
+    n = len(batch)
+    pixels = batch.shape[1] * batch.shape[2]
+    code = _RGB555[0][batch[..., 0]] | _RGB555[1][batch[..., 1]] | _RGB555[2][batch[..., 2]]
+
+    bins = _BIN[code] + (np.arange(n, dtype=np.int32) * 4096)[:, None, None]
+    hist = np.bincount(bins.ravel(), minlength=n * 4096).reshape(n, 4096)
+    colors = (hist >= COLOR_SHARE * pixels).sum(axis=1)
+
+    luminance = _LUMINANCE[code].reshape(n, -1)
+    low, high = np.percentile(luminance, [2, 98], axis=1)
+    contrast = (high + 0.05) / (low + 0.05)
+
+    gray = _GRAY[code]
+    dx = np.abs(np.diff(gray, axis=2))[:, :-1, :]
+    dy = np.abs(np.diff(gray, axis=1))[:, :, :-1]
+    edges = ((dx + dy) > EDGE_THRESHOLD).mean(axis=(1, 2))
+
+    # colorfulness is a distribution statistic: every 4th pixel each way is plenty
+    rgb = batch[:, ::4, ::4].reshape(n, -1, 3).astype(np.float32)
+    rg = rgb[..., 0] - rgb[..., 1]
+    yb = 0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]
+    colorfulness = (np.hypot(rg.std(axis=1), yb.std(axis=1))
+                    + 0.3 * np.hypot(rg.mean(axis=1), yb.mean(axis=1)))
+
+    return {"colors": colors, "contrast": contrast, "edges": edges, "colorfulness": colorfulness}
+
+
+def text_features(texts):
+    """Caps ratio, phone count and word count per text (NaN where there is none)."""
+    caps, phones, words = [], [], []
+    for text in texts:
+        letters = [c for c in text or "" if c.isalpha()]
+        if not letters:
+            caps.append(np.nan)
+            phones.append(np.nan)
+            words.append(np.nan)
+            continue
+        caps.append(sum(c.isupper() for c in letters) / len(letters))
+        phones.append(len(PHONE_RE.findall(text)))
+        words.append(len(PHONE_RE.sub(" ", text).split()))
+    return {"caps": np.array(caps), "phones": np.array(phones), "words": np.array(words)}
+
+
+def rubric(features):
+    """The four axis scores and their mean (floats, 1-10) from `image_features` + `text_features`."""
+    caps_penalty = np.nan_to_num(np.interp(features["caps"], [0.5, 0.9], [0, 3]))
+    readability = np.interp(features["contrast"], [1.5, 3, 4.5, 7, 12], [1, 4, 6, 8, 10]) - caps_penalty
+    professionalism = (np.interp(features["colors"], [2, 4, 8, 16], [10, 8, 4, 1])
+                       + np.interp(features["edges"], [0.02, 0.06, 0.12, 0.25], [10, 8, 5, 1])) / 2
+    memorability = np.interp(features["colorfulness"], [0, 15, 40, 70, 110], [3, 6, 9, 7, 3])
+    phone_score = np.interp(features["phones"], [0, 1, 2, 3], [3, 10, 6, 2])
+    word_score = np.interp(features["words"], [3, 12, 25, 45], [6, 10, 7, 3])
+    information = np.where(np.isnan(features["phones"]), np.nan, (phone_score + word_score) / 2)
+    scores = {
+        "readability": np.clip(readability, 1, 10),
+        "professionalism": professionalism,
+        "memorability": memorability,
+        "information": information,
+    }
+    stacked = np.stack([scores[axis] for axis in AXES])
+    scores["overall"] = np.nanmean(stacked, axis=0)
+    return scores
+
+
+def sins(features, i):
+    """The deadly sins card ``i`` shows, by the numbers."""
+    found = []
+    if features["phones"][i] >= 3:
+        found.append("phone number soup")
+    if features["colors"][i] >= 8:
+        found.append("too many colors")
+    if features["edges"][i] >= 0.15:
+        found.append("busy or pixelated")
+    if features["caps"][i] >= 0.8:
+        found.append("ALL CAPS")
+    if features["contrast"][i] < 3:
+        found.append("low contrast")
+    return found
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def score_cards(items, batch_size=BATCH_SIZE, workers=None):
+    """Yield a score dict for every ``(path, text)`` in ``items``.
+
+    Unreadable images yield ``{"path": ..., "error": ...}``. Scores are
+    rounded to one decimal; ``card_score`` is the overall rounded to an
+    integer for the prospects table. Images are decoded by ``workers``
+    processes (default: one per core; 1 decodes in this process).
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for chunk in _batches(items, batch_size):
+            paths = [path for path, _ in chunk]
+            images = list(pool.map(load_image, paths, chunksize=8) if pool else map(load_image, paths))
+            good = [i for i, img in enumerate(images) if img is not None]
+            for i, img in enumerate(images):
+                if img is None:
+                    yield {"path": str(chunk[i][0]), "error": "unreadable image"}
+            if not good:
+                continue
+            features = image_features(np.stack([images[i] for i in good]))
+            features.update(text_features([chunk[i][1] for i in good]))
+            scores = rubric(features)
+            for j, i in enumerate(good):
+                result = {"path": str(chunk[i][0])}
+                result.update({k: round(float(v[j]), 1) for k, v in scores.items() if not np.isnan(v[j])})
+                result["card_score"] = int(np.clip(np.rint(scores["overall"][j]), 1, 10))
+                result["sins"] = sins(features, j)
+                result["features"] = {k: round(float(v[j]), 3) for k, v in features.items() if not np.isnan(v[j])}
+                yield result
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+def score_card(path, text=None):
+    """One card's score dict (see `score_cards`)."""
+    return next(score_cards([(Path(path), text)], workers=1))
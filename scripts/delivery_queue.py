@@ -0,0 +1,224 @@
+"""
+Delivery Queue
+==============
+Durable SQLite job queue between the Stripe webhook and file delivery.
+
+The webhook only calls `enqueue`, which is one INSERT keyed on the Stripe
+event id: Stripe redelivering an event (or a replayed request) finds the
+row already there and adds nothing, so a payment is delivered once.
+Worker threads claim due jobs under a lease, run the delivery handler, and
+either mark the job done or schedule a retry with exponential backoff.
+While the handler runs, its worker renews the lease every LEASE_S / 3,
+so a slow send (large attachments over a slow SMTP link) is never handed
+to a second worker; a job whose worker died mid-delivery stops being
+renewed and is claimed again once its lease runs out. After MAX_ATTEMPTS
+failures a job is parked as failed for `retry_failed`.
+
+Delivery is at-least-once only across a crash between the send and the
+`complete` write; duplicate events never reach the handler twice.
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+QUEUE_PATH = PROJECT_ROOT / "research" / "delivery-queue.db"
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_S = 30
+BACKOFF_MAX_S = 3600
+LEASE_S = 300
+POLL_S = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    event_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(status, run_at);
+"""
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts`` (1-based), with jitter."""
+    delay = min(BACKOFF_BASE_S * 2 ** (attempts - 1), BACKOFF_MAX_S)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DeliveryQueue:
+    """The job table, with one SQLite connection per thread using it."""
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._wake = threading.Condition()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, event_id, payload):
+        """Queue a delivery. Returns False if this event id was queued before."""
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (event_id, payload, run_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (event_id, json.dumps(payload), now, now, now),
+        )
+        if cursor.rowcount:
+            with self._wake:
+                self._wake.notify()
+        return bool(cursor.rowcount)
+
+    def claim(self):
+        """Lease the oldest due job: ``(event_id, payload, attempts)`` or None.
+
+        Pending jobs are due at ``run_at``; running jobs whose lease has
+        expired (their worker died) are due again too.
+        """
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT event_id, payload, attempts FROM jobs"
+                " WHERE status IN ('pending', 'running') AND run_at <= ? ORDER BY run_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', run_at = ?, updated_at = ? WHERE event_id = ?",
+                    (now + LEASE_S, now, row["event_id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row["event_id"], json.loads(row["payload"]), row["attempts"]
+
+    def extend(self, event_id):
+        """Renew a running job's lease: its worker is still delivering it."""
+        now = time.time()
+        self.conn.execute(
+            "UPDATE jobs SET run_at = ?, updated_at = ? WHERE event_id = ? AND status = 'running'",
+            (now + LEASE_S, now, event_id),
+        )
+
+    def complete(self, event_id):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE event_id = ?",
+            (time.time(), event_id),
+        )
+
+    def fail(self, event_id, error):
+        """Record a failed attempt; retry later or park the job as failed."""
+        now = time.time()
+        attempts = self.conn.execute(
+            "SELECT attempts FROM jobs WHERE event_id = ?", (event_id,)
+        ).fetchone()["attempts"] + 1
+        status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, attempts = ?, run_at = ?, last_error = ?, updated_at = ?"
+            " WHERE event_id = ?",
+            (status, attempts, now + backoff(attempts), str(error), now, event_id),
+        )
+        return status
+
+    def retry_failed(self):
+        """Put parked jobs back in line. Returns how many."""
+        now = time.time()
+        return self.conn.execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, run_at = ?, updated_at = ? WHERE status = 'failed'",
+            (now, now),
+        ).rowcount
+
+    def counts(self):
+        return {row["status"]: row["n"] for row in self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+        )}
+
+    def failed(self, limit=20):
+        return [dict(row) for row in self.conn.execute(
+            "SELECT event_id, attempts, last_error, updated_at FROM jobs WHERE status = 'failed'"
+            " ORDER BY updated_at DESC LIMIT ?", (limit,)
+        )]
+
+    def wait(self, timeout):
+        """Sleep until something is enqueued or ``timeout`` seconds pass."""
+        with self._wake:
+            self._wake.wait(timeout)
+
+
+class DeliveryWorkers:
+    """Threads draining a DeliveryQueue through ``handler(payload)``.
+
+    A handler that raises has its job retried with backoff; one that
+    returns marks the job done.
+    """
+
+    def __init__(self, queue, handler, count=2, poll_s=POLL_S):
+        self.queue = queue
+        self.handler = handler
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._run, name=f"delivery-{i}", daemon=True) for i in range(count)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        with self.queue._wake:
+            self.queue._wake.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self.queue.wait(self.poll_s)
+                continue
+            event_id, payload, attempts = job
+            finished = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(event_id, finished), daemon=True)
+            heartbeat.start()
+            try:
+                self.handler(payload)
+            except Exception as e:
+                status = self.queue.fail(event_id, e)
+                print(f"⚠️ Delivery {event_id} failed (attempt {attempts + 1}): {e}"
+                      + (" — giving up" if status == "failed" else " — will retry"))
+            else:
+                self.queue.complete(event_id)
+            finally:
+                finished.set()
+                heartbeat.join()
+
+    def _heartbeat(self, event_id, done):
+        while not done.wait(LEASE_S / 3):
+            self.queue.extend(event_id)
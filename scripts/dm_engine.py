@@ -0,0 +1,230 @@
+"""
+DM Engine
+=========
+Personalized outreach messages from the templates in templates/dm-messages.md.
+
+The markdown file stays the single source of the wording. It is parsed once
+(and again only when its mtime changes): every fenced block under a
+"Template X" or follow-up heading becomes a compiled `string.Template`, with
+the cheat-sheet variables ([NAME], [GROUP NAME], [TRADE], [CITY],
+[STRIPE LINK], the preview attachment) turned into placeholders. Bracketed
+lines that aren't variables, like "[Reply to the thread, not DM]", are
+directions for the sender and are dropped.
+
+Attachments come from the asset manifest in the prospect database: each DM
+attaches the prospect's newest watermarked previews, newest first. A
+prospect with no renders yet gets a DM with no attachments and a warning
+in place of the file name.
+
+Messages are generated lazily over a prospect stream and written in
+batches, either as one text file per prospect (written from a thread pool)
+or as a single JSONL outbox.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from string import Template
+
+import prospect_db
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DM_TEMPLATES_FILE = PROJECT_ROOT / "templates" / "dm-messages.md"
+STRIPE_CONFIG = PROJECT_ROOT / "config" / "stripe.json"
+DEFAULT_STRIPE_LINK = "https://buy.stripe.com/test_XXXXXXXX"  # Replace with real link
+DEFAULT_CITY = "Tennessee"
+BATCH_SIZE = 500
+
+# Cheat-sheet variable -> placeholder
+VARIABLES = {
+    "NAME": "${name}",
+    "CONTRACTOR NAME": "${name}",
+    "GROUP NAME": "${group}",
+    "TRADE": "${trade}",
+    "CITY": "${city}",
+    "STRIPE LINK": "${stripe_link}",
+    "ATTACH WATERMARKED PREVIEW IMAGE": "📎 [ATTACHED: ${preview_file}]",
+}
+# Heading -> template key; "Template D" has a thread reply and a DM for
+# when they write back, keyed D and D-dm
+HEADINGS = [
+    (re.compile(r"^##\s+Template\s+([A-Z])\b"), None),
+    (re.compile(r"^###\s+Follow-Up\s+#1\b"), "followup-1"),
+    (re.compile(r"^###\s+Follow-Up\s+#2\b"), "followup-2"),
+    (re.compile(r"^###\s+Post-Purchase Follow-Up\b"), "post-purchase"),
+]
+NO_PREVIEW = "⚠️ no preview rendered yet — run redesign-pipeline.py generate-batch"
+
+
+def _compile(block):
+    lines = []
+    for line in block.splitlines():
+        stripped = line.strip()
+        if re.fullmatch(r"\[[^\]]+\]", stripped) and stripped[1:-1] not in VARIABLES:
+            continue
+        lines.append(line.replace("$", "$$"))
+    text = "\n".join(lines).strip("\n")
+    text = re.sub(r"\[([A-Z ]+)\]", lambda m: VARIABLES.get(m.group(1), m.group(0)), text)
+    return Template(text)
+
+
+def parse_templates(text):
+    """Compiled templates keyed A, B, C, D, D-dm, followup-1, ... from markdown."""
+    templates = {}
+    key = None
+    blocks = re.split(r"^```[^\n]*\n(.*?)^```", text, flags=re.M | re.S)
+    # re.split alternates prose, fenced block, prose, fenced block, ...
+    for i, chunk in enumerate(blocks):
+        if i % 2 == 0:
+            for line in chunk.splitlines():
+                for pattern, name in HEADINGS:
+                    match = pattern.match(line)
+                    if match:
+                        key = name or match.group(1)
+            continue
+        if key is None:
+            continue
+        name = key if key not in templates else f"{key}-dm"
+        templates[name] = _compile(chunk)
+    return templates
+
+
+_cache = {}  # path -> (mtime, templates)
+
+
+def load_templates(path=DM_TEMPLATES_FILE):
+    """Parsed templates for ``path``, re-read only when the file changes."""
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _cache[path] = (mtime, parse_templates(path.read_text()))
+    return cached[1]
+
+
+def default_stripe_link():
+    """The card redesign payment link from stripe-setup.py, if it has been run."""
+    try:
+        with open(STRIPE_CONFIG) as f:
+            products = json.load(f)["products"]
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_STRIPE_LINK
+    for product in products:
+        if product.get("name") == "Business Card Redesign":
+            return product["payment_url"]
+    return DEFAULT_STRIPE_LINK
+
+
+def preview_attachments(prospect_id, conn=None):
+    """Paths of a prospect's newest watermarked previews, newest first."""
+    if prospect_id is None:
+        return []
+    return [str(a["path"]) for a in prospect_db.get_assets(prospect_id, "preview", conn=conn)]
+
+
+def payment_link(stripe_link, prospect_id):
+    """The payment link tagged with the prospect, so the webhook knows who paid."""
+    if prospect_id is None:
+        return stripe_link
+    return f"{stripe_link}{'&' if '?' in stripe_link else '?'}client_reference_id={prospect_id}"
+
+
+def render_dm(prospect, template="A", stripe_link=DEFAULT_STRIPE_LINK, templates=None, conn=None):
+    """One prospect's DM as a dict: who it's to, the message and its attachments."""
+    templates = templates or load_templates()
+    attachments = preview_attachments(prospect.get("id"), conn)
+    # Use business name as-is (in real usage, use the owner's first name)
+    message = templates[template].substitute(
+        name=prospect.get("owner_name") or prospect["name"],
+        group=prospect.get("group_source") or "the group",
+        trade=prospect.get("trade") or "contracting",
+        city=prospect.get("city") or DEFAULT_CITY,
+        stripe_link=payment_link(stripe_link, prospect.get("id")),
+        preview_file=Path(attachments[0]).name if attachments else NO_PREVIEW,
+    )
+    return {
+        "prospect_id": prospect.get("id"),
+        "to": prospect["name"],
+        "trade": prospect.get("trade"),
+        "group_source": prospect.get("group_source"),
+        "template": template,
+        "date": date.today().isoformat(),
+        "card_score": prospect.get("card_score"),
+        "notes": prospect.get("notes"),
+        "message": message,
+        "attachments": attachments,
+        "safe_name": prospect_db.safe_name(prospect["name"]),
+    }
+
+
+def generate_dms(prospects, template="A", stripe_link=None, templates=None, conn=None):
+    """Yield a DM for every prospect in the (possibly lazy) ``prospects`` stream."""
+    templates = templates or load_templates()
+    if template not in templates:
+        raise KeyError(f"Unknown DM template {template!r} (have: {', '.join(templates)})")
+    stripe_link = stripe_link or default_stripe_link()
+    for prospect in prospects:
+        yield render_dm(prospect, template, stripe_link, templates, conn)
+
+
+def format_dm_file(dm):
+    """The simulated-DM text file for one DM."""
+    rule = "=" * 50
+    attachments = "".join(f"  {i}. {a}\n" for i, a in enumerate(dm["attachments"], 1)) or f"  {NO_PREVIEW}\n"
+    return (
+        f"TO: {dm['to']} (Facebook Messenger)\n"
+        f"FROM: Design Arbitrage\n"
+        f"DATE: {dm['date']}\n"
+        f"TEMPLATE: {dm['template']}\n"
+        f"STATUS: SIMULATED (not sent)\n"
+        f"CARD SCORE: {dm['card_score']}/10\n"
+        f"NOTES: {dm['notes']}\n"
+        f"\n{rule}\n\n"
+        f"{dm['message']}"
+        f"\n\n{rule}\n"
+        f"ATTACHMENTS:\n{attachments}"
+    )
+
+
+def dm_filename(dm):
+    # The template keeps a follow-up from overwriting a first DM written the same day
+    return f"dm_{dm['safe_name']}_{dm['date']}_{dm['template']}.txt"
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _write_text(item):
+    path, text = item
+    path.write_text(text)
+    return path
+
+
+def write_dm_files(dms, out_dir, workers=4, batch_size=BATCH_SIZE):
+    """Write each DM to ``out_dir/dm_<name>_<date>_<template>.txt``. Returns how many were written."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in _batches(dms, batch_size):
+            items = [(out_dir / dm_filename(dm), format_dm_file(dm)) for dm in batch]
+            count += sum(1 for _ in pool.map(_write_text, items))
+    return count
+
+
+def write_outbox(dms, path, batch_size=BATCH_SIZE):
+    """Append DMs to one JSONL outbox, a batch per write. Returns how many were written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, "a") as f:
+        for batch in _batches(dms, batch_size):
+            f.write("".join(json.dumps(dm, ensure_ascii=False) + "\n" for dm in batch))
+            count += len(batch)
+    return count
@@ -13,18 +13,25 @@ NOTE: Facebook aggressively blocks automation. This tool is designed to
 ASSIST manual browsing, not replace it. The human scrolls; the tool captures.
 """
 
+import csv
 import json
+import math
 import os
 import sys
 import time
 import subprocess
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from functools import lru_cache
 from pathlib import Path
 
+import dm_engine
+import prospect_db
+
 # Configuration
 CONFIG_PATH = Path(__file__).parent.parent / "config.json"
 SCREENSHOTS_DIR = Path(__file__).parent.parent / "assets" / "screenshots"
-PROSPECTS_FILE = Path(__file__).parent.parent / "research" / "prospects.json"
+DMS_DIR = Path(__file__).parent.parent / "delivery" / "simulated-dms"
+PROSPECTS_FILE = prospect_db.PROSPECTS_FILE
 
 DEFAULT_CONFIG = {
     "groups": [
@@ -78,7 +85,8 @@ DEFAULT_CONFIG = {
         "HVAC", "roofer", "painter", "landscaper"
     ],
     "screenshot_hotkey": "cmd+shift+4",  # macOS
-    "check_times": ["08:00", "12:00", "17:00"]
+    "check_times": ["08:00", "12:00", "17:00"],
+    "priority": dict(prospect_db.PRIORITY)  # contact queue weights, see prospect_db
 }
 
 
@@ -97,41 +105,20 @@ def save_config(config):
         json.dump(config, f, indent=2)
 
 
-def load_prospects():
-    if PROSPECTS_FILE.exists():
-        with open(PROSPECTS_FILE) as f:
-            return json.load(f)
-    return {"prospects": [], "stats": {"total_found": 0, "contacted": 0, "converted": 0}}
-
-
-def save_prospects(data):
-    PROSPECTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(PROSPECTS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-
-
-def add_prospect(name, trade, phone=None, group_source=None, card_score=None, screenshot_path=None, notes=None):
-    """Add a new prospect to the database."""
-    data = load_prospects()
-    prospect = {
-        "id": len(data["prospects"]) + 1,
-        "name": name,
-        "trade": trade,
-        "phone": phone,
-        "group_source": group_source,
-        "card_score": card_score,
-        "screenshot_path": screenshot_path,
-        "notes": notes,
-        "status": "new",  # new → contacted → replied → converted → delivered
-        "found_date": date.today().isoformat(),
-        "contacted_date": None,
-        "converted_date": None,
-        "revenue": 0
-    }
-    data["prospects"].append(prospect)
-    data["stats"]["total_found"] += 1
-    save_prospects(data)
-    print(f"✅ Added prospect: {name} ({trade}) — Card score: {card_score}/10")
+def add_prospect(name, trade, phone=None, group_source=None, card_score=None, screenshot_path=None, notes=None,
+                 force=False):
+    """Add a new prospect to the database, unless it duplicates one already there."""
+    if not force:
+        match = prospect_db.find_duplicate(name, phone)
+        if match:
+            print(f"⏭️  {name} looks like #{match['id']} {match['name']} ({match['reason']}) — skipped, use --force to add anyway")
+            return None
+    # status: new → contacted → replied → converted → delivered
+    prospect = prospect_db.add_prospect(
+        name, trade, phone=phone, group_source=group_source, card_score=card_score,
+        screenshot_path=screenshot_path, notes=notes,
+    )
+    print(f"✅ Added prospect #{prospect['id']}: {name} ({trade}) — Card score: {card_score}/10")
     return prospect
 
 
@@ -184,67 +171,529 @@ def capture_screenshot(prospect_name):
         return None
 
 
+def format_ev(value):
+    """Dollars to two significant figures below a cent, so decayed prospects still rank visibly."""
+    if value >= 0.01 or value <= 0:
+        return f"${value:,.2f}"
+    return f"${value:.{1 - math.floor(math.log10(value))}f}"
+
+
+def describe_ev(prospect):
+    return f"EV {format_ev(prospect['ev'])} ({format_ev(prospect['found_ev'])} when found)"
+
+
 def daily_report():
     """Print daily monitoring report."""
-    data = load_prospects()
     today = date.today().isoformat()
-    
-    today_prospects = [p for p in data["prospects"] if p["found_date"] == today]
-    pending = [p for p in data["prospects"] if p["status"] == "new"]
-    contacted = [p for p in data["prospects"] if p["status"] == "contacted"]
-    converted = [p for p in data["prospects"] if p["status"] == "converted"]
+    by_status = prospect_db.get_aggregates("status")
+    count = lambda status: by_status.get(status, {}).get("count", 0)
+    pending = count("new")
     
     print("\n" + "=" * 50)
     print(f"📊 DAILY REPORT — {today}")
     print("=" * 50)
-    print(f"  Found today:     {len(today_prospects)}")
-    print(f"  Total prospects:  {data['stats']['total_found']}")
-    print(f"  Pending contact:  {len(pending)}")
-    print(f"  Contacted:        {len(contacted)}")
-    print(f"  Converted:        {len(converted)}")
-    print(f"  Revenue:          ${sum(p['revenue'] for p in data['prospects'])}")
+    print(f"  Found today:     {prospect_db.get_aggregate('day', today)['count']}")
+    print(f"  Total prospects:  {sum(b['count'] for b in by_status.values())}")
+    print(f"  Pending contact:  {pending}")
+    print(f"  Contacted:        {count('contacted')}")
+    print(f"  Converted:        {count('converted')}")
+    print(f"  Revenue:          ${sum(b['revenue'] for b in by_status.values())}")
     print("=" * 50)
     
     if pending:
-        print("\n🎯 READY TO CONTACT:")
-        for p in pending[:5]:
-            print(f"  • {p['name']} ({p['trade']}) — Score: {p['card_score']}/10 — {p['group_source']}")
+        print("\n🎯 READY TO CONTACT (highest expected value first):")
+        for p in prospect_db.peek_contacts(5):
+            print(f"  • {p['name']} ({p['trade']}) — Score: {p['card_score']}/10 — {p['group_source']} — {describe_ev(p)}")
+    
+    due, scheduled = prospect_db.count_followups()
+    if due:
+        print(f"\n📬 FOLLOW-UPS DUE: {due} ({scheduled} scheduled) — run: python3 scripts/fb-group-monitor.py due")
 
 
 def list_prospects(status=None):
     """List all prospects, optionally filtered by status."""
-    data = load_prospects()
-    prospects = data["prospects"]
-    if status:
-        prospects = [p for p in prospects if p["status"] == status]
-    
-    if not prospects:
-        print("No prospects found.")
-        return
-    
-    for p in prospects:
+    found = False
+    for p in prospect_db.iter_prospects(status=status or None):
+        found = True
         emoji = {"new": "🆕", "contacted": "📨", "replied": "💬", "converted": "💰", "delivered": "✅"}.get(p["status"], "❓")
         print(f"  {emoji} [{p['id']}] {p['name']} ({p['trade']}) — {p['status']} — Score: {p['card_score']}/10")
+    if not found:
+        print("No prospects found.")
+
+
+def next_contacts(n=5, peek=False, template="A"):
+    """The day's DM list: the ``n`` new prospects with the highest expected value.
+
+    Unless ``peek``, they are popped off the queue by marking them contacted,
+    and their first DMs are written with ``template``.
+    """
+    templates = dm_engine.load_templates()
+    if template not in templates:
+        print(f"❌ Unknown DM template {template!r} (have: {', '.join(templates)})")
+        sys.exit(1)
+    prospects = prospect_db.peek_contacts(n) if peek else prospect_db.pop_contacts(n)
+    if not prospects:
+        print("No prospects waiting to be contacted.")
+        return []
+    print(f"\n🎯 {'NEXT UP' if peek else 'CONTACT NOW'} — top {len(prospects)} by expected value")
+    for rank, p in enumerate(prospects, 1):
+        print(f"  {rank}. [{p['id']}] {p['name']} ({p['trade']}) — Score: {p['card_score']}/10 — "
+              f"{p['group_source'] or 'no group'} — found {p['found_date']} — {describe_ev(p)}")
+    if not peek:
+        count = dm_engine.write_dm_files(dm_engine.generate_dms(prospects, template, templates=templates), DMS_DIR)
+        print(f"\n📨 Marked contacted; {count} DMs (template {template}) written to {DMS_DIR}")
+    return prospects
+
+
+def send_followups(peek=False, outbox=None, show=20):
+    """Write the follow-up DMs that are due and mark them sent.
+
+    Each prospect gets one DM, its latest due follow-up; earlier ones due
+    alongside it are skipped. With ``peek`` nothing is written or marked.
+    """
+    due, superseded = prospect_db.due_followups()
+    if not due:
+        _, scheduled = prospect_db.count_followups()
+        print(f"No follow-ups due ({scheduled} scheduled).")
+        return 0
+    print(f"\n📬 FOLLOW-UPS DUE — {len(due)}")
+    for f in due[:show]:
+        print(f"  • [{f['id']}] {f['name']} ({f['trade']}) — {f['template']} — due {f['due_at'].replace('T', ' ')}")
+    if len(due) > show:
+        print(f"  … and {len(due) - show} more")
+    if peek:
+        return 0
+    by_template = {}
+    for f in due:
+        by_template.setdefault(f["template"], []).append(f)
+    count = 0
+    try:
+        for template, prospects in by_template.items():
+            dms = dm_engine.generate_dms(prospects, template)
+            if outbox:
+                count += dm_engine.write_outbox(dms, outbox)
+            else:
+                count += dm_engine.write_dm_files(dms, DMS_DIR)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+    prospect_db.complete_followups(due, superseded)
+    print(f"\n✅ {count} follow-up DMs written to {outbox or DMS_DIR}")
+    if superseded:
+        print(f"   ⏭️  {len(superseded)} earlier follow-up(s) skipped: a later one was due too")
+    return count
 
 
 def update_status(prospect_id, new_status):
     """Update a prospect's status."""
-    data = load_prospects()
-    for p in data["prospects"]:
-        if p["id"] == prospect_id:
-            old_status = p["status"]
-            p["status"] = new_status
-            if new_status == "contacted":
-                p["contacted_date"] = date.today().isoformat()
-                data["stats"]["contacted"] += 1
-            elif new_status == "converted":
-                p["converted_date"] = date.today().isoformat()
-                p["revenue"] = 50
-                data["stats"]["converted"] += 1
-            save_prospects(data)
-            print(f"✅ {p['name']}: {old_status} → {new_status}")
-            return
-    print(f"❌ Prospect #{prospect_id} not found")
+    old_status, p = prospect_db.set_status(prospect_id, new_status)
+    if p is None:
+        print(f"❌ Prospect #{prospect_id} not found")
+        return
+    print(f"✅ {p['name']}: {old_status} → {new_status}")
+
+
+def verify_stats(repair=False):
+    """Check the maintained report aggregates against a full recompute."""
+    mismatches = prospect_db.verify_aggregates()
+    if not mismatches:
+        print("✅ Aggregates match a full recompute")
+        return True
+    print(f"❌ {len(mismatches)} aggregate bucket(s) out of sync:")
+    for (dimension, key), (maintained, recomputed) in sorted(mismatches.items()):
+        print(f"  {dimension}:{key or '(none)'} — maintained {maintained}, recomputed {recomputed}")
+    if repair:
+        with prospect_db.transaction() as db:
+            prospect_db.rebuild_aggregates(db)
+            prospect_db.rebuild_contact_queue(db)
+            prospect_db.rebuild_followups(db)
+        print("🔧 Aggregates, contact queue and follow-ups rebuilt")
+    return False
+
+
+# ─── Funnel analytics ────────────────────────────────────────────────────
+
+HISTOGRAM_DAYS = 90
+
+
+class DayHistogram:
+    """Fixed-size histogram of whole-day durations (last bucket = overflow)."""
+
+    def __init__(self, max_days=HISTOGRAM_DAYS):
+        self.buckets = [0] * (max_days + 2)
+        self.count = 0
+        self.total = 0
+
+    def add(self, days):
+        self.buckets[min(max(days, 0), len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total += days
+
+    def percentile(self, pct):
+        target = pct / 100 * self.count
+        seen = 0
+        for days, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return days if days < len(self.buckets) - 1 else f">{days - 1}"
+        return None
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_days": round(self.total / self.count, 2),
+            "p50_days": self.percentile(50),
+            "p90_days": self.percentile(90),
+            f"over_{len(self.buckets) - 2}_days": self.buckets[-1],
+        }
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(value):
+    return date.fromisoformat(value[:10])
+
+
+def _cohort_key(day, cohort):
+    if cohort == "month":
+        return f"{day.year}-{day.month:02d}"
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def compute_analytics(since=None, until=None, cohort="week", conn=None):
+    """One streaming pass over prospect history.
+
+    Memory is bounded by the number of groups, trades and cohorts, never by
+    the number of prospects.
+    """
+    stages = prospect_db.STATUSES
+    funnels = {"group": {}, "trade": {}}
+    cohorts = {}
+    to_contact, to_convert = DayHistogram(), DayHistogram()
+    rows = 0
+    for row in prospect_db.iter_funnel_rows(since, until, conn=conn):
+        rows += 1
+        reached = max(row["max_status"] or 0, stages.index(row["status"]) if row["status"] in stages else 0)
+        contacted_at = row["first_contacted"] or row["contacted_date"]
+        converted_at = row["first_converted"] or row["converted_date"]
+        if contacted_at:
+            reached = max(reached, 1)
+        if converted_at:
+            reached = max(reached, 3)
+        found = _parse_day(row["found_date"])
+        
+        for dimension, key in (("group", row["group_source"]), ("trade", row["trade"])):
+            counts = funnels[dimension].setdefault(key or "(none)", [0] * len(stages))
+            for stage in range(reached + 1):
+                counts[stage] += 1
+        
+        bucket = cohorts.setdefault(_cohort_key(found, cohort), [0] * len(stages))
+        for stage in range(reached + 1):
+            bucket[stage] += 1
+        
+        if contacted_at:
+            contacted = _parse_day(contacted_at)
+            to_contact.add((contacted - found).days)
+            if converted_at:
+                to_convert.add((_parse_day(converted_at) - contacted).days)
+    
+    def funnel(counts):
+        result = dict(zip(stages, counts))
+        result["conversion_rate"] = round(counts[3] / counts[0], 4) if counts[0] else 0.0
+        return result
+    
+    return {
+        "prospects": rows,
+        "window": {"since": since, "until": until},
+        "funnel_by_group": {k: funnel(v) for k, v in sorted(funnels["group"].items())},
+        "funnel_by_trade": {k: funnel(v) for k, v in sorted(funnels["trade"].items())},
+        "time_to_contact": to_contact.summary(),
+        "time_to_convert": to_convert.summary(),
+        f"{cohort}ly_cohorts": {k: funnel(v) for k, v in sorted(cohorts.items())},
+    }
+
+
+def write_analytics(result, fmt="table", out=None):
+    """Print or save analytics as a table, JSON, or long-format CSV."""
+    out = out or sys.stdout
+    if fmt == "json":
+        json.dump(result, out, indent=2)
+        out.write("\n")
+        return
+    if fmt == "csv":
+        import csv
+        writer = csv.writer(out)
+        writer.writerow(["section", "key", "metric", "value"])
+        for section, value in result.items():
+            if not isinstance(value, dict):
+                writer.writerow([section, "", "", value])
+                continue
+            for key, metrics in value.items():
+                if isinstance(metrics, dict):
+                    for metric, v in metrics.items():
+                        writer.writerow([section, key, metric, v])
+                else:
+                    writer.writerow([section, "", key, metrics])
+        return
+    
+    print(f"\n📈 FUNNEL ANALYTICS — {result['prospects']} prospects", file=out)
+    for section, value in result.items():
+        if section in ("prospects", "window"):
+            continue
+        print(f"\n  {section.replace('_', ' ').upper()}", file=out)
+        if section.startswith("time_to"):
+            print("    " + ", ".join(f"{k}: {v}" for k, v in value.items()), file=out)
+            continue
+        print(f"    {'':<40} {' → '.join(prospect_db.STATUSES)}", file=out)
+        for key, funnel in value.items():
+            stages = " → ".join(str(funnel[s]) for s in prospect_db.STATUSES)
+            print(f"    {key[:40]:<40} {stages}  ({funnel['conversion_rate']:.1%})", file=out)
+
+
+def run_analytics(since=None, until=None, cohort="week", fmt="table", output=None):
+    result = compute_analytics(since, until, cohort)
+    if output:
+        with open(output, 'w', newline='') as f:
+            write_analytics(result, fmt, f)
+        print(f"✅ Analytics written to {output}")
+    else:
+        write_analytics(result, fmt)
+    return result
+
+
+def generate_synthetic_history(conn, rows, seed=7, chunk=10000):
+    """Fill ``conn`` with ``rows`` fake prospects and their status events."""
+    import random
+    rng = random.Random(seed)
+    groups = [g["name"] for g in DEFAULT_CONFIG["groups"]]
+    trades = ["plumbing", "electrician", "hvac", "roofing", "handyman", "painter", "landscaping"]
+    start = datetime(2024, 1, 1, 9)
+    
+    with prospect_db.transaction(conn) as db:
+        for first in range(1, rows + 1, chunk):
+            prospects, events = [], []
+            for pid in range(first, min(first + chunk, rows + 1)):
+                found = start + timedelta(days=rng.randrange(730))
+                status = "new"
+                if rng.random() < 0.7:
+                    t = found + timedelta(hours=rng.randrange(1, 24 * 10))
+                    path = ["contacted"]
+                    if rng.random() < 0.25:
+                        path.append("replied")
+                        if rng.random() < 0.4:
+                            path += ["converted", "delivered"]
+                    prev = "new"
+                    for status in path:
+                        events.append((pid, prev, status, t.isoformat(timespec="seconds")))
+                        prev = status
+                        t += timedelta(hours=rng.randrange(1, 24 * 5))
+                prospects.append((pid, f"Synthetic {pid}", rng.choice(trades), rng.choice(groups),
+                                  rng.randint(1, 6), status, found.date().isoformat()))
+            db.executemany(
+                "INSERT INTO prospects (id, name, trade, group_source, card_score, status, found_date)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                prospects,
+            )
+            db.executemany(
+                "INSERT INTO status_events (prospect_id, from_status, status, ts) VALUES (?, ?, ?, ?)", events
+            )
+    return rows
+
+
+def benchmark_analytics(rows=1_000_000, keep=None):
+    """Generate a synthetic history and time one analytics pass over it."""
+    import resource
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(keep) if keep else Path(tmp) / "bench.db"
+        conn = prospect_db.connect(path)
+        if not conn.execute("SELECT EXISTS (SELECT 1 FROM prospects)").fetchone()[0]:
+            print(f"🏗️  Generating {rows:,} synthetic prospects...")
+            t0 = time.perf_counter()
+            generate_synthetic_history(conn, rows)
+            print(f"   done in {time.perf_counter() - t0:.1f}s → {path}")
+        
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        t0 = time.perf_counter()
+        result = compute_analytics(conn=conn)
+        elapsed = time.perf_counter() - t0
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        conn.close()
+    
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    print(f"\n⏱️  Analytics over {result['prospects']:,} prospects: {elapsed:.1f}s "
+          f"({result['prospects'] / elapsed:,.0f} rows/s)")
+    print(f"   Peak RSS: {rss_after / scale:.0f} MB (grew {(rss_after - rss_before) / scale:.0f} MB during the pass)")
+    return result
+
+
+def show_history(prospect_id):
+    """Print every status change recorded for a prospect."""
+    p = prospect_db.get_prospect(prospect_id)
+    if p is None:
+        print(f"❌ Prospect #{prospect_id} not found")
+        return
+    print(f"\n📜 {p['name']} — found {p['found_date']}")
+    for event in prospect_db.status_history(prospect_id):
+        print(f"  {event['ts']}  {event['from_status']} → {event['status']}")
+
+
+# Import column -> prospects field, for the short names the CLI uses
+IMPORT_ALIASES = {"group": "group_source", "score": "card_score", "screenshot": "screenshot_path"}
+
+
+def read_import_file(path):
+    """Yield prospect records from a CSV, JSONL or prospects.json-style file."""
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        elif path.suffix.lower() == ".json":
+            data = json.load(f)
+            rows = data["prospects"] if isinstance(data, dict) else data
+        else:
+            rows = _read_jsonl(f)
+        for line_no, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                print(f"  ⚠️  Row {line_no}: not a record, skipped")
+                continue
+            record = {IMPORT_ALIASES.get(str(k).strip().lower(), str(k).strip().lower()): v
+                      for k, v in row.items() if k}
+            # JSON numbers (phones, zip codes) become text like CSV cells do
+            record = {k: v if v is None or isinstance(v, str) else str(v) for k, v in record.items()}
+            record = {k: (v.strip() or None) if isinstance(v, str) else v for k, v in record.items()}
+            if not record.get("name") or not record.get("trade"):
+                print(f"  ⚠️  Row {line_no}: needs name and trade, skipped")
+                continue
+            if record.get("card_score") is not None:
+                try:
+                    record["card_score"] = int(float(record["card_score"]))
+                except (ValueError, OverflowError):
+                    print(f"  ⚠️  Row {line_no}: card score {record['card_score']!r} is not a number, ignored")
+                    record["card_score"] = None
+            yield record
+
+
+def _read_jsonl(f):
+    """Yield one object per line; unparseable lines yield None so row numbers stay aligned."""
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+
+
+def import_prospects(path, dry_run=False, found_date=None):
+    """Bulk-add prospects from a file, dropping duplicates of existing rows and of each other."""
+    start = time.perf_counter()
+    added, duplicates = prospect_db.import_prospects(
+        read_import_file(path), found_date=found_date, dry_run=dry_run
+    )
+    elapsed = time.perf_counter() - start
+    for record, match in duplicates:
+        where = f"#{match['id']} {match['name']}" if match["id"] else f"{match['name']} (earlier in file)"
+        print(f"  ⏭️  {record['name']} → {where} ({match['reason']})")
+    verb = "Would import" if dry_run else "Imported"
+    print(f"\n✅ {verb} {len(added)} prospects, skipped {len(duplicates)} duplicates ({elapsed:.2f}s)")
+    return added
+
+
+def _load_card_score():
+    try:
+        import card_score
+    except ImportError:
+        print("❌ Card scoring needs NumPy and Pillow: pip install numpy Pillow")
+        sys.exit(1)
+    return card_score
+
+
+def auto_score(screenshot_path):
+    """Rubric score for a captured screenshot, printed axis by axis."""
+    result = _load_card_score().score_card(screenshot_path)
+    if "error" in result:
+        print(f"❌ Can't score {screenshot_path}: {result['error']}")
+        return None
+    axes = ", ".join(f"{axis} {result[axis]}" for axis in ("readability", "professionalism", "memorability"))
+    print(f"🧮 Card score {result['card_score']}/10 ({axes})" + (f" — {', '.join(result['sins'])}" if result["sins"] else ""))
+    return result["card_score"]
+
+
+def score_screenshots(directory=None, limit=20, fmt="table", save=False):
+    """Score every screenshot in a folder on the rubric and rank them, worst card first.
+
+    Cards already ingested are scored with their extracted text too, and
+    ``save`` writes the new scores to their prospects.
+    """
+    card_score = _load_card_score()
+    import screenshot_ingest
+    directory = Path(directory) if directory else SCREENSHOTS_DIR
+    ledger = prospect_db.screenshot_records()
+    paths = sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and not p.name.startswith(".") and p.suffix.lower() in screenshot_ingest.IMAGE_SUFFIXES
+    )
+    items = [(p, ledger.get(str(p.resolve()), {}).get("card_text")) for p in paths]
+    
+    start = time.perf_counter()
+    results = list(card_score.score_cards(items))
+    elapsed = time.perf_counter() - start
+    for r in results:
+        record = ledger.get(str(Path(r["path"]).resolve()), {})
+        r["prospect_id"] = record.get("prospect_id") if record.get("status") == "prospect" else None
+    ranked = sorted((r for r in results if "error" not in r), key=lambda r: r["overall"])
+    
+    if fmt == "json":
+        json.dump(ranked, sys.stdout, indent=2)
+        print()
+    elif fmt == "csv":
+        writer = csv.writer(sys.stdout)
+        columns = ["path", "prospect_id", *card_score.AXES, "overall", "card_score"]
+        writer.writerow(columns + ["sins"])
+        for r in ranked:
+            writer.writerow([r.get(c, "") for c in columns] + ["; ".join(r["sins"])])
+    else:
+        print(f"\n🧮 CARD SCORES — worst first (< {card_score.PRIME_TARGET} = prime target)")
+        print(f"  {'':<36} read  prof  memo  info  overall")
+        for r in ranked[:limit]:
+            target = "🎯" if r["overall"] < card_score.PRIME_TARGET else "  "
+            who = f"#{r['prospect_id']} " if r["prospect_id"] else ""
+            axes = "  ".join(f"{r[a]:>4}" if a in r else "   —" for a in card_score.AXES)
+            print(f"  {target} {(who + Path(r['path']).name)[:33]:<33} {axes}  {r['overall']:>5}"
+                  + (f"  {', '.join(r['sins'])}" if r["sins"] else ""))
+    for r in results:
+        if "error" in r:
+            print(f"  ⚠️  {Path(r['path']).name}: {r['error']}", file=sys.stderr)
+    rate = len(results) / elapsed if elapsed else 0
+    print(f"\n✅ Scored {len(ranked)} cards in {elapsed:.2f}s ({rate:.0f} cards/s)", file=sys.stderr)
+    
+    if save:
+        scores = [(r["prospect_id"], r["card_score"]) for r in ranked if r["prospect_id"]]
+        prospect_db.set_card_scores(scores)
+        print(f"💾 Updated card_score for {len(scores)} prospects", file=sys.stderr)
+    return ranked
+
+
+def export_prospects(path=None):
+    """Write the prospect database out as prospects.json."""
+    path = Path(path) if path else PROSPECTS_FILE
+    count = prospect_db.export_json(path)
+    print(f"✅ Exported {count} prospects to {path}")
+
+
+def _card_score_arg(value):
+    import argparse
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("card score must be 1-10 or 'auto'") from None
 
 
 def main():
@@ -262,9 +711,11 @@ def main():
     add.add_argument("trade", help="Their trade/service")
     add.add_argument("--phone", help="Phone number")
     add.add_argument("--group", help="Source group")
-    add.add_argument("--score", type=int, default=3, help="Card quality score (1-10, lower=worse)")
+    add.add_argument("--score", type=_card_score_arg, default=3,
+                     help="Card quality score (1-10, lower=worse), or 'auto' to score the --screenshot capture")
     add.add_argument("--screenshot", action="store_true", help="Capture screenshot")
     add.add_argument("--notes", help="Additional notes")
+    add.add_argument("--force", action="store_true", help="Add even if it looks like a duplicate")
     
     # Screenshot
     ss = subparsers.add_parser("screenshot", help="Capture a screenshot")
@@ -274,10 +725,56 @@ def main():
     ls = subparsers.add_parser("list", help="List prospects")
     ls.add_argument("--status", help="Filter by status")
     
+    # Next to contact
+    nx = subparsers.add_parser("next", help="Pop the N highest expected-value prospects to contact")
+    nx.add_argument("n", type=int, nargs="?", default=5, help="How many (your DM budget)")
+    nx.add_argument("--peek", action="store_true", help="Show them without marking them contacted")
+    nx.add_argument("--template", default="A", help="DM template from dm-messages.md (default A)")
+    
+    # Follow-ups
+    du = subparsers.add_parser("due", help="Write the follow-up DMs that are due (48h, 1 week, post-purchase)")
+    du.add_argument("--peek", action="store_true", help="List them without writing DMs or marking them sent")
+    du.add_argument("--outbox", help="Append DMs to this JSONL file instead of one text file each")
+    
     # Update status
     up = subparsers.add_parser("update", help="Update prospect status")
     up.add_argument("id", type=int, help="Prospect ID")
-    up.add_argument("status", choices=["new", "contacted", "replied", "converted", "delivered"])
+    up.add_argument("status", choices=prospect_db.STATUSES)
+    
+    # Analytics
+    an = subparsers.add_parser("analytics", help="Funnel, timing and cohort analytics over prospect history")
+    an.add_argument("--since", help="Only prospects found on/after this date (YYYY-MM-DD)")
+    an.add_argument("--until", help="Only prospects found on/before this date (YYYY-MM-DD)")
+    an.add_argument("--cohort", choices=["week", "month"], default="week", help="Cohort window")
+    an.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    an.add_argument("--output", help="Write to a file instead of stdout")
+    an.add_argument("--bench", type=int, metavar="ROWS", help="Benchmark on a synthetic history of ROWS prospects")
+    an.add_argument("--bench-db", help="Keep/reuse the synthetic benchmark database at this path")
+    
+    # Verify aggregates
+    ver = subparsers.add_parser("verify", help="Check report aggregates against a full recompute")
+    ver.add_argument("--repair", action="store_true", help="Rebuild aggregates if they are out of sync")
+    
+    # History
+    hist = subparsers.add_parser("history", help="Show a prospect's status history")
+    hist.add_argument("id", type=int, help="Prospect ID")
+    
+    # Bulk import
+    imp = subparsers.add_parser("import", help="Bulk-add prospects from CSV/JSONL, skipping duplicates")
+    imp.add_argument("path", help="CSV with a header row, JSONL, or prospects.json-style JSON")
+    imp.add_argument("--date", help="found_date for rows without one (default today)")
+    imp.add_argument("--dry-run", action="store_true", help="Report what would be imported without writing")
+    
+    # Score screenshots
+    sc = subparsers.add_parser("score", help="Score screenshots on the card rubric and rank who to contact first")
+    sc.add_argument("dir", nargs="?", help="Screenshot folder (default assets/screenshots/)")
+    sc.add_argument("--limit", type=int, default=20, help="Rows to show in the table")
+    sc.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    sc.add_argument("--save", action="store_true", help="Write the scores to the ingested cards' prospects")
+    
+    # Export
+    exp = subparsers.add_parser("export", help="Export the prospect database to JSON")
+    exp.add_argument("path", nargs="?", help=f"Output file (default {PROSPECTS_FILE.name})")
     
     # Report
     subparsers.add_parser("report", help="Daily report")
@@ -290,6 +787,11 @@ def main():
         screenshot_path = None
         if args.screenshot:
             screenshot_path = capture_screenshot(args.name)
+        if args.score == "auto":
+            if not screenshot_path:
+                print("❌ --score auto needs a screenshot: add --screenshot")
+                sys.exit(1)
+            args.score = auto_score(screenshot_path)
         add_prospect(
             name=args.name,
             trade=args.trade,
@@ -297,16 +799,36 @@ def main():
             group_source=args.group,
             card_score=args.score,
             screenshot_path=screenshot_path,
-            notes=args.notes
+            notes=args.notes,
+            force=args.force,
         )
     elif args.command == "screenshot":
         capture_screenshot(args.name)
     elif args.command == "list":
         list_prospects(status=args.status)
+    elif args.command == "next":
+        next_contacts(args.n, peek=args.peek, template=args.template)
+    elif args.command == "due":
+        send_followups(peek=args.peek, outbox=args.outbox)
     elif args.command == "update":
         update_status(args.id, args.status)
     elif args.command == "report":
         daily_report()
+    elif args.command == "analytics":
+        if args.bench:
+            benchmark_analytics(args.bench, keep=args.bench_db)
+        else:
+            run_analytics(args.since, args.until, args.cohort, args.format, args.output)
+    elif args.command == "verify":
+        sys.exit(0 if verify_stats(args.repair) else 1)
+    elif args.command == "history":
+        show_history(args.id)
+    elif args.command == "import":
+        import_prospects(args.path, dry_run=args.dry_run, found_date=args.date)
+    elif args.command == "score":
+        score_screenshots(args.dir, limit=args.limit, fmt=args.format, save=args.save)
+    elif args.command == "export":
+        export_prospects(args.path)
     else:
         parser.print_help()
         print("\n💡 Quick start: python fb-group-monitor.py monitor")
@@ -0,0 +1,402 @@
+"""
+Mail Transport
+==============
+Pooled SMTP sessions for delivery emails, plus a local sink to test against.
+
+Opening a session costs a TCP connect, a STARTTLS handshake and a login, so
+`SMTPPool` keeps a few sessions open and sends many messages through each.
+A session idle for longer than `idle_check_s` is probed with NOOP before
+reuse, one that has sent `max_per_session` messages is retired (providers
+cap messages per connection), and a send that finds its session dropped is
+retried once on a fresh one.
+
+Settings come from the environment:
+  SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS   server and login (no login without SMTP_PASS)
+  SMTP_STARTTLS                                 "0" for plain connections (e.g. the local sink)
+  SMTP_POOL_SIZE, SMTP_MAX_PER_SESSION          pool bounds
+
+Messages can be plain strings or a `StreamingMessage`, which produces the
+MIME text chunk by chunk: attachments are read from disk and base64-encoded
+a block at a time (optionally zipped on the fly into one attachment) and
+written straight into the SMTP DATA stream, so memory use per delivery
+stays flat however large the files are.
+
+`run_sink` starts an aiosmtpd server that accepts everything and writes
+each message to a directory, for trying delivery without a real account.
+"""
+
+import base64
+import mimetypes
+import os
+import queue
+import quopri
+import smtplib
+import threading
+import time
+import uuid
+import zipfile
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SINK_DIR = PROJECT_ROOT / "delivery" / "smtp-sink"
+B64_LINE_BYTES = 57             # raw bytes per 76-character base64 line
+READ_BYTES = B64_LINE_BYTES * 1024
+
+
+class _Base64Lines:
+    """Incremental base64: whole 76-char CRLF lines out, the remainder held back."""
+
+    def __init__(self):
+        self.carry = b""
+
+    def feed(self, data):
+        data = self.carry + data
+        cut = len(data) - len(data) % B64_LINE_BYTES
+        self.carry = data[cut:]
+        return base64.encodebytes(data[:cut]).replace(b"\n", b"\r\n")
+
+    def flush(self):
+        data, self.carry = self.carry, b""
+        return base64.encodebytes(data).replace(b"\n", b"\r\n")
+
+
+class _Spool:
+    """Write-only, unseekable sink that ZipFile streams into."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _dot_stuff(text):
+    """CRLF line endings, with lines starting "." doubled per RFC 5321."""
+    lines = text.replace("\r\n", "\n").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return "".join(("." + line if line.startswith(".") else line) + "\r\n" for line in lines).encode()
+
+
+class StreamingMessage:
+    """A multipart/mixed email whose attachments stream from disk.
+
+    Iterating yields the dot-stuffed DATA payload in chunks of about
+    READ_BYTES; it can be iterated again (for a retry) since files are
+    reopened each time. With ``zip_name`` the attachments travel as one
+    zip built while sending.
+    """
+
+    def __init__(self, from_addr, to_addr, subject, body, attachments=(), zip_name=None):
+        self.from_addr = from_addr
+        self.to_addr = to_addr
+        self.subject = subject
+        self.body = body
+        self.attachments = [Path(p) for p in attachments]
+        self.zip_name = zip_name
+
+    def _headers(self, boundary):
+        return _dot_stuff(
+            f"From: {self.from_addr}\n"
+            f"To: {self.to_addr}\n"
+            f"Subject: {Header(self.subject, 'utf-8').encode()}\n"
+            f"Date: {formatdate(localtime=True)}\n"
+            f"Message-ID: {make_msgid()}\n"
+            f"MIME-Version: 1.0\n"
+            f'Content-Type: multipart/mixed; boundary="{boundary}"\n'
+            f"\n"
+            f"--{boundary}\n"
+            f'Content-Type: text/plain; charset="utf-8"\n'
+            f"Content-Transfer-Encoding: quoted-printable\n"
+            f"\n"
+            f"{quopri.encodestring(self.body.encode()).decode()}\n"
+        )
+
+    @staticmethod
+    def _part_header(boundary, filename):
+        ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return (
+            f"--{boundary}\r\n"
+            f"Content-Type: {ctype}\r\n"
+            f"Content-Transfer-Encoding: base64\r\n"
+            f'Content-Disposition: attachment; filename="{filename}"\r\n'
+            f"\r\n"
+        ).encode()
+
+    def _file_chunks(self, path):
+        encoder = _Base64Lines()
+        with open(path, "rb") as f:
+            while block := f.read(READ_BYTES):
+                yield encoder.feed(block)
+        yield encoder.flush()
+
+    def _zip_chunks(self):
+        encoder, spool = _Base64Lines(), _Spool()
+        with zipfile.ZipFile(spool, "w", zipfile.ZIP_STORED) as bundle:
+            for path in self.attachments:
+                with open(path, "rb") as src, bundle.open(zipfile.ZipInfo.from_file(path, path.name), "w") as dest:
+                    while block := src.read(READ_BYTES):
+                        dest.write(block)
+                        yield encoder.feed(spool.take())
+        yield encoder.feed(spool.take())
+        yield encoder.flush()
+
+    def __iter__(self):
+        boundary = f"=_{uuid.uuid4().hex}"
+        yield self._headers(boundary)
+        if self.zip_name and self.attachments:
+            yield self._part_header(boundary, self.zip_name)
+            yield from self._zip_chunks()
+        else:
+            for path in self.attachments:
+                yield self._part_header(boundary, path.name)
+                yield from self._file_chunks(path)
+        yield f"--{boundary}--\r\n".encode()
+
+
+def _send_stream(smtp, from_addr, to_addrs, message):
+    """MAIL/RCPT/DATA by hand so the payload is written chunk by chunk."""
+    smtp.ehlo_or_helo_if_needed()
+    code, resp = smtp.mail(from_addr)
+    if code != 250:
+        smtp.rset()
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+    refused = {}
+    for rcpt in to_addrs:
+        code, resp = smtp.rcpt(rcpt)
+        if code not in (250, 251):
+            refused[rcpt] = (code, resp)
+    if len(refused) == len(to_addrs):
+        smtp.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    smtp.putcmd("data")
+    code, resp = smtp.getreply()
+    if code != 354:
+        smtp.rset()
+        raise smtplib.SMTPDataError(code, resp)
+    for chunk in message:
+        smtp.send(chunk)
+    smtp.send(b".\r\n")
+    code, resp = smtp.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+def _send(smtp, from_addr, to_addrs, message):
+    if isinstance(message, (str, bytes)):
+        return smtp.sendmail(from_addr, to_addrs, message)
+    return _send_stream(smtp, from_addr, to_addrs, message)
+
+
+class SMTPConfig:
+    """Where and how to connect, and how hard to reuse each session."""
+
+    def __init__(self, host="smtp.gmail.com", port=587, user=None, password=None, starttls=True,
+                 pool_size=2, max_per_session=50, idle_check_s=30, timeout_s=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.pool_size = pool_size
+        self.max_per_session = max_per_session
+        self.idle_check_s = idle_check_s
+        self.timeout_s = timeout_s
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            host=os.environ.get("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.environ.get("SMTP_PORT", 587)),
+            user=os.environ.get("SMTP_USER"),
+            password=os.environ.get("SMTP_PASS"),
+            starttls=os.environ.get("SMTP_STARTTLS", "1") != "0",
+            pool_size=int(os.environ.get("SMTP_POOL_SIZE", 2)),
+            max_per_session=int(os.environ.get("SMTP_MAX_PER_SESSION", 50)),
+        )
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """Up to ``config.pool_size`` logged-in SMTP sessions shared by threads."""
+
+    def __init__(self, config=None):
+        self.config = config or SMTPConfig.from_env()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.config.pool_size)
+        self.stats = {"connects": 0, "messages": 0, "reconnects": 0}
+
+    def _connect(self):
+        cfg = self.config
+        smtp = smtplib.SMTP(cfg.host, cfg.port, timeout=cfg.timeout_s)
+        try:
+            if cfg.starttls:
+                smtp.starttls()
+            if cfg.user and cfg.password:
+                smtp.login(cfg.user, cfg.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self.stats["connects"] += 1
+        return _Session(smtp)
+
+    def _healthy(self, session):
+        if time.monotonic() - session.last_used < self.config.idle_check_s:
+            return True
+        try:
+            return session.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _discard(session):
+        try:
+            session.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            session.smtp.close()
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    session = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._healthy(session):
+                    return session
+                self._discard(session)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, session, broken=False):
+        session.last_used = time.monotonic()
+        if broken or session.sent >= self.config.max_per_session:
+            self._discard(session)
+        else:
+            self._idle.put(session)
+        self._slots.release()
+
+    def send(self, from_addr, to_addrs, message):
+        """Send one message (str, bytes or StreamingMessage) through a pooled session."""
+        self.send_many([(from_addr, to_addrs, message)])
+
+    def send_many(self, messages):
+        """Send ``(from_addr, to_addrs, message)`` tuples over one session.
+
+        A session that drops mid-batch is replaced and the unsent message
+        retried once; any other SMTP error propagates.
+        """
+        session = self._acquire()
+        broken = False
+        try:
+            for from_addr, to_addrs, message in messages:
+                if session.sent >= self.config.max_per_session:
+                    self._discard(session)
+                    session = self._connect()
+                try:
+                    _send(session.smtp, from_addr, to_addrs, message)
+                except smtplib.SMTPServerDisconnected:
+                    self.stats["reconnects"] += 1
+                    try:
+                        session.smtp.close()  # drop the dead socket before replacing it
+                    except OSError:
+                        pass
+                    session = self._connect()
+                    _send(session.smtp, from_addr, to_addrs, message)
+                session.sent += 1
+                self.stats["messages"] += 1
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self._release(session, broken)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def run_sink(host="127.0.0.1", port=1025, out_dir=SINK_DIR):
+    """Accept mail on ``host:port`` and save each message as an .eml file."""
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("❌ Install the SMTP sink: pip install aiosmtpd")
+        raise SystemExit(1)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    class SaveHandler:
+        def __init__(self):
+            self.count = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            self.count += 1
+            path = out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{self.count:05d}.eml"
+            path.write_bytes(envelope.original_content or envelope.content)
+            print(f"📨 {envelope.mail_from} → {', '.join(envelope.rcpt_tos)} ({path.name})")
+            return "250 Message accepted for delivery"
+
+    controller = Controller(SaveHandler(), hostname=host, port=port)
+    controller.start()
+    print(f"📮 SMTP sink listening on {host}:{port}, saving to {out_dir}")
+    print(f"   Deliver to it with: SMTP_HOST={host} SMTP_PORT={port} SMTP_STARTTLS=0 SMTP_USER=you@example.com")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+    return controller
+
+
+def benchmark(messages=50, config=None):
+    """Time sending ``messages`` small emails pooled vs one connection each."""
+    config = config or SMTPConfig.from_env()
+    sender = config.user or "bench@example.com"
+    body = "Subject: transport benchmark\r\n\r\nhello\r\n"
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        fresh = SMTPPool(config)
+        fresh.send(sender, [sender], body)
+        fresh.close()
+    results["connection per message"] = time.perf_counter() - start
+
+    pool = SMTPPool(config)
+    start = time.perf_counter()
+    for _ in range(messages):
+        pool.send(sender, [sender], body)
+    pool.close()
+    results["pooled"] = time.perf_counter() - start
+
+    print(f"\n⏱️  SMTP benchmark ({messages} messages to {config.host}:{config.port})")
+    for label, seconds in results.items():
+        print(f"  {label:<24} {messages / seconds:8.1f} msg/s")
+    print(f"  pooled sessions opened: {pool.stats['connects']}")
+    return results
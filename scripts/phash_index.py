@@ -0,0 +1,174 @@
+"""
+Perceptual-Hash Index
+=====================
+Finds screenshots of a card that has already been ingested, so a card
+reposted across several groups is only extracted and rendered once.
+
+Each image gets two 64-bit perceptual hashes (Pillow needed):
+
+  dHash  9x8 grayscale thumbnail, one bit per "brighter than the pixel to
+         its right"; survives rescaling, recompression and brightness
+         changes
+  aHash  8x8 grayscale thumbnail, one bit per "brighter than the mean";
+         a cheap second opinion against dHash collisions
+
+Two screenshots are the same card when their dHashes differ in at most
+MAX_DISTANCE bits and their aHashes in at most AHASH_MAX_DISTANCE.
+
+Hashes live in array('Q') columns (8 bytes per image each). Lookup is
+multi-index hashing: the dHash is cut into four 16-bit chunks, each with a
+table from chunk value to positions. Two hashes within distance d agree to
+within d // 4 bits on at least one chunk (pigeonhole), so probing every
+chunk value within MAX_DISTANCE // 4 bits of the query's (17 per chunk at
+the default) finds every candidate; only those get a full popcount. At
+100k images a bucket averages under two entries, so a lookup touches a
+few dozen positions instead of the whole collection.
+"""
+
+import random
+import time
+from array import array
+from itertools import combinations
+
+MAX_DISTANCE = 6
+AHASH_MAX_DISTANCE = 10
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def image_hashes(path):
+    """``(dhash, ahash)`` of an image file as unsigned 64-bit ints."""
+    from PIL import Image
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))  # JPEG: decode at reduced size
+        gray = img.convert("L")
+    wide = list(gray.resize((9, 8), Image.LANCZOS).getdata())
+    dhash = 0
+    for row in range(8):
+        for col in range(8):
+            dhash = dhash << 1 | (wide[row * 9 + col] > wide[row * 9 + col + 1])
+    square = list(gray.resize((8, 8), Image.LANCZOS).getdata())
+    mean = sum(square) / 64
+    ahash = 0
+    for value in square:
+        ahash = ahash << 1 | (value > mean)
+    return dhash, ahash
+
+
+def _flip_masks(radius):
+    """Every CHUNK_BITS-bit mask with at most ``radius`` bits set."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return masks
+
+
+class PHashIndex:
+    """Near-duplicate lookup over (dhash, ahash) pairs by Hamming distance.
+
+    ``add`` returns the entry's position; ``labels[pos]`` is whatever the
+    caller attached (the ledger stores path and prospect id). ``remove``
+    tombstones an entry, for screenshots whose extraction failed.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE, ahash_distance=AHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.ahash_distance = ahash_distance
+        self.dhashes = array("Q")
+        self.ahashes = array("Q")
+        self.live = bytearray()
+        self.labels = []
+        self.tables = [{} for _ in range(CHUNKS)]
+        self.masks = _flip_masks(max_distance // CHUNKS)
+
+    def __len__(self):
+        return len(self.dhashes)
+
+    def add(self, dhash, ahash, label=None):
+        pos = len(self.dhashes)
+        self.dhashes.append(dhash)
+        self.ahashes.append(ahash)
+        self.live.append(1)
+        self.labels.append(label)
+        for i, table in enumerate(self.tables):
+            table.setdefault(dhash >> (i * CHUNK_BITS) & CHUNK_MASK, []).append(pos)
+        return pos
+
+    def remove(self, pos):
+        self.live[pos] = 0
+
+    def find(self, dhash, ahash):
+        """``(pos, dhash distance, ahash distance)`` of the closest match, or None."""
+        best = None
+        seen = set()
+        for i, table in enumerate(self.tables):
+            chunk = dhash >> (i * CHUNK_BITS) & CHUNK_MASK
+            for mask in self.masks:
+                for pos in table.get(chunk ^ mask, ()):
+                    if pos in seen:
+                        continue
+                    seen.add(pos)
+                    if not self.live[pos]:
+                        continue
+                    distance = (self.dhashes[pos] ^ dhash).bit_count()
+                    if distance > self.max_distance or (best and distance >= best[1]):
+                        continue
+                    a_distance = (self.ahashes[pos] ^ ahash).bit_count()
+                    if a_distance <= self.ahash_distance:
+                        best = (pos, distance, a_distance)
+        return best
+
+    def find_linear(self, dhash, ahash):
+        """`find` by brute force over every entry, to check it against."""
+        best = None
+        for pos, (d, a) in enumerate(zip(self.dhashes, self.ahashes)):
+            if not self.live[pos]:
+                continue
+            distance, a_distance = (d ^ dhash).bit_count(), (a ^ ahash).bit_count()
+            if (distance <= self.max_distance and a_distance <= self.ahash_distance
+                    and (best is None or distance < best[1])):
+                best = (pos, distance, a_distance)
+        return best
+
+
+def _near(value, bits, rng):
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+def benchmark(images=100_000, queries=10_000, seed=7):
+    """Lookup latency at ``images`` entries, checked against brute force on a sample."""
+    rng = random.Random(seed)
+    index = PHashIndex()
+    start = time.perf_counter()
+    for _ in range(images):
+        index.add(rng.getrandbits(64), rng.getrandbits(64))
+    built = time.perf_counter() - start
+    # Half reposts (a stored card with a few bits flipped), half new cards
+    probes = []
+    for n in range(queries):
+        if n % 2:
+            probes.append((rng.getrandbits(64), rng.getrandbits(64)))
+        else:
+            pos = rng.randrange(images)
+            probes.append((_near(index.dhashes[pos], rng.randint(0, MAX_DISTANCE), rng),
+                           _near(index.ahashes[pos], rng.randint(0, AHASH_MAX_DISTANCE), rng)))
+    start = time.perf_counter()
+    found = [index.find(d, a) for d, a in probes]
+    elapsed = time.perf_counter() - start
+    hits = sum(1 for f in found if f)
+    sample = rng.sample(range(queries), min(200, queries))
+    start = time.perf_counter()
+    linear = {n: index.find_linear(*probes[n]) for n in sample}
+    linear_elapsed = time.perf_counter() - start
+    wrong = sum(1 for n in sample if (found[n] is None) != (linear[n] is None))
+    memory = (index.dhashes.itemsize + index.ahashes.itemsize + 1) * len(index)
+    print(f"\n⏱️  {images:,} images indexed in {built:.2f}s ({memory / 1e6:.1f} MB of hashes)")
+    print(f"   {queries:,} lookups: {elapsed / queries * 1e6:.1f} µs each, {hits:,} duplicates found "
+          f"(expected {(queries + 1) // 2:,})")
+    print(f"   Brute force: {linear_elapsed / len(sample) * 1e3:.1f} ms each; on {len(sample)} lookups "
+          f"{'✅ identical' if not wrong else f'❌ {wrong} differ'}")
+    return elapsed / queries
@@ -0,0 +1,1205 @@
+"""
+Prospect Store
+==============
+SQLite-backed prospect database shared by the pipeline scripts.
+
+research/prospects.json stays the import/export format: it is imported the
+first time the database is created, and `export_json` writes it back out.
+Lookups by id, status, found_date and group_source are indexed, and every
+write runs in its own transaction, so concurrent CLI invocations are safe.
+
+Status changes are not written to the prospects table directly. They are
+appended to the database's event log (research/prospect-events.jsonl for
+the project database, ``<name>-events.jsonl`` beside any other), one JSON
+event per line, and `sync_events` folds any events past the last applied
+offset into the prospects table and the status_events history. Once the
+whole log has been applied and it has grown past EVENTS_COMPACT_BYTES it
+is replaced by an empty file, after the offset covering it has been
+committed; the offset is stored with the log file's identity, so one left
+stale by a crash mid-compaction is never applied to the new file.
+status_events keeps the full funnel history.
+
+Report counters live in the aggregates table: per found-day, status, source
+group and trade, the number of prospects, how many were ever contacted and
+converted, and their revenue. Every insert and transition adjusts them in
+the same transaction, and `verify_aggregates` checks them against a full
+recompute.
+
+Duplicates are caught through two indexed keys kept beside each row:
+name_key (the name lowercased with punctuation and legal suffixes dropped,
+so "Big Jim's Plumbing LLC" and "big jims plumbing" collide) and phone_key
+(the last ten digits). Near-misses are found by fuzzy-matching name_key
+against rows that share its first word, an index range scan rather than a
+full table pass.
+
+The assets table is the manifest of rendered cards: for each prospect,
+template and kind (preview, final or a print export) the newest file's path,
+pixel size and sha256. redesign-pipeline.py writes it; DMs and delivery read
+it by primary key instead of globbing the asset folders. Re-recording a
+final drops print exports of the old one that weren't re-exported with it.
+
+The contact_queue table ranks the prospects still to contact by expected
+value: the chance a DM converts (the source group's and trade's smoothed
+conversion rates, and how bad the card is) times what a sale is worth,
+halving every PRIORITY["half_life_days"] after the prospect was found.
+Because that decay is the same for everyone, log(EV) + decay * found-day
+orders prospects the same way on any date, so it is stored once as the
+priority and indexed: adding, re-ranking and popping a prospect are
+B-tree operations, O(log n), with no re-sort as the days pass. Entries
+follow every insert and transition in the same transaction, each touching
+only that prospect's entry. Conversions move the group and trade rates
+only slowly, so instead of re-scoring a whole cohort per event, the queue
+is re-ranked in full on the first connect of each day (and whenever the
+weights, overridable in the "priority" section of config.json, change).
+
+The followups table schedules the follow-up DMs of templates/dm-messages.md
+(FOLLOWUPS): entering a status cancels the prospect's pending follow-ups
+and schedules the new status's, in the same transaction as the event, so a
+reply stops the no-response sequence. Pending rows are indexed by due
+time, so `due_followups` reads only the k that are due, O(log n + k) no
+matter how many conversations are in flight. Sent and skipped rows are
+kept, and each template goes to a prospect at most once.
+
+The screenshots table is the ledger of the ingestion inbox: one row per
+screenshot file with its sha256, what became of it (the prospect it
+created, the duplicate it matched, or the extraction error), when it was
+seen, extracted and previewed, for turnaround reporting, its 64-bit
+perceptual hashes (dHash and aHash), from which screenshot_ingest rebuilds
+its near-duplicate index, and the card's text as extracted, which
+card_score reads when rescoring the folder.
+"""
+
+import difflib
+import fcntl
+import json
+import math
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "research" / "prospects.db"
+PROSPECTS_FILE = PROJECT_ROOT / "research" / "prospects.json"
+EVENTS_LOG = PROJECT_ROOT / "research" / "prospect-events.jsonl"
+EVENTS_COMPACT_BYTES = 1024 * 1024
+CONFIG_PATH = PROJECT_ROOT / "config.json"
+
+STATUSES = ["new", "contacted", "replied", "converted", "delivered"]
+# aggregates dimension -> prospects column it buckets by
+AGGREGATE_DIMENSIONS = {"day": "found_date", "status": "status", "group": "group_source", "trade": "trade"}
+CONVERSION_REVENUE = 50
+FIELDS = [
+    "id", "name", "trade", "phone", "group_source", "card_score", "screenshot_path",
+    "notes", "status", "found_date", "contacted_date", "converted_date", "revenue",
+]
+# Name words that don't tell two businesses apart
+NAME_NOISE = {"the", "llc", "inc", "co", "corp", "corporation", "company", "ltd"}
+FUZZY_THRESHOLD = 0.9
+FUZZY_CANDIDATES = 500
+# Contact queue weights; config.json's "priority" section overrides them
+PRIORITY = {
+    "half_life_days": 7,     # a prospect's value halves every week it waits
+    "prior_rate": 0.05,      # conversion rate assumed before there is history
+    "prior_strength": 10,    # contacts of history worth as much as the prior
+    "score_weight": 1.0,     # exponent on card need, (11 - card_score) / 10
+    "group_weight": 1.0,     # exponent on the group's rate relative to overall
+    "trade_weight": 1.0,     # exponent on the trade's rate relative to overall
+}
+# Status entered -> the follow-up DMs it schedules (dm-messages.md key, delay)
+FOLLOWUPS = {
+    "contacted": [("followup-1", timedelta(hours=48)), ("followup-2", timedelta(days=7))],
+    "delivered": [("post-purchase", timedelta(days=7))],
+}
+# Asset kind -> kinds exported from it, stale once it is re-rendered
+DERIVED_ASSET_KINDS = {"final": ("print_png", "print_pdf")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prospects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    trade TEXT,
+    phone TEXT,
+    group_source TEXT,
+    card_score INTEGER,
+    screenshot_path TEXT,
+    notes TEXT,
+    status TEXT NOT NULL DEFAULT 'new',
+    found_date TEXT NOT NULL,
+    contacted_date TEXT,
+    converted_date TEXT,
+    revenue INTEGER NOT NULL DEFAULT 0,
+    name_key TEXT,
+    phone_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_prospects_status ON prospects(status);
+CREATE INDEX IF NOT EXISTS idx_prospects_found_date ON prospects(found_date);
+CREATE INDEX IF NOT EXISTS idx_prospects_group_source ON prospects(group_source);
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    contacted INTEGER NOT NULL DEFAULT 0,
+    converted INTEGER NOT NULL DEFAULT 0,
+    revenue INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS assets (
+    prospect_id INTEGER NOT NULL,
+    template TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    sha256 TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (prospect_id, template, kind)
+);
+
+CREATE TABLE IF NOT EXISTS screenshots (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL,
+    prospect_id INTEGER,
+    detail TEXT,
+    seen_at REAL NOT NULL,
+    extracted_at REAL,
+    previewed_at REAL,
+    dhash INTEGER,
+    ahash INTEGER,
+    card_text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_screenshots_sha256 ON screenshots(sha256);
+
+CREATE TABLE IF NOT EXISTS contact_queue (
+    prospect_id INTEGER PRIMARY KEY,
+    priority REAL NOT NULL,
+    log_ev REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contact_queue_priority ON contact_queue(priority);
+
+CREATE TABLE IF NOT EXISTS followups (
+    prospect_id INTEGER NOT NULL,
+    template TEXT NOT NULL,
+    due_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    done_at TEXT,
+    PRIMARY KEY (prospect_id, template)
+);
+CREATE INDEX IF NOT EXISTS idx_followups_due ON followups(due_at) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS status_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prospect_id INTEGER NOT NULL,
+    from_status TEXT,
+    status TEXT NOT NULL,
+    ts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_status_events_prospect ON status_events(prospect_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_db = None
+
+
+def _forget_db():
+    # A forked child (generate-batch workers) must not share the parent's
+    # SQLite handle; it opens its own on first use
+    global _db
+    _db = None
+
+
+os.register_at_fork(after_in_child=_forget_db)
+
+
+def connect(path=DB_PATH):
+    """Open (creating and seeding from prospects.json if needed) a database."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM prospects)").fetchone()[0]
+    if empty and path == DB_PATH and PROSPECTS_FILE.exists():
+        import_json(PROSPECTS_FILE, conn)
+    elif not empty and conn.execute("SELECT NOT EXISTS (SELECT 1 FROM aggregates)").fetchone()[0]:
+        with transaction(conn) as db:
+            rebuild_aggregates(db)
+    _check_contact_queue(conn)
+    if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM meta WHERE key = 'followups_built')").fetchone()[0]:
+        with transaction(conn) as db:
+            rebuild_followups(db)
+    return conn
+
+
+def _migrate(conn):
+    """Bring databases created before the dedup keys and image hashes existed up to date."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(prospects)")}
+    shot_columns = {row["name"] for row in conn.execute("PRAGMA table_info(screenshots)")}
+    with transaction(conn) as db:
+        for column in ("name_key", "phone_key"):
+            if column not in columns:
+                db.execute(f"ALTER TABLE prospects ADD COLUMN {column} TEXT")
+        for column, kind in (("dhash", "INTEGER"), ("ahash", "INTEGER"), ("card_text", "TEXT")):
+            if column not in shot_columns:
+                db.execute(f"ALTER TABLE screenshots ADD COLUMN {column} {kind}")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_prospects_name_key ON prospects(name_key)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_prospects_phone_key ON prospects(phone_key)")
+        _backfill_keys(db)
+
+
+def get_db():
+    """The process-wide connection to the project database."""
+    global _db
+    if _db is None:
+        _db = connect()
+        sync_events(_db)  # pick up events a crashed writer appended but never applied
+    return _db
+
+
+class transaction:
+    """``BEGIN IMMEDIATE`` … ``COMMIT`` block; rolls back on error."""
+
+    def __init__(self, conn=None):
+        self.conn = conn or get_db()
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _row(row):
+    return dict(row) if row is not None else None
+
+
+def add_prospect(name, trade, phone=None, group_source=None, card_score=None,
+                 screenshot_path=None, notes=None, found_date=None, conn=None):
+    """Insert a new prospect and return it as a dict."""
+    with transaction(conn) as db:
+        cursor = db.execute(
+            "INSERT INTO prospects (name, trade, phone, group_source, card_score, screenshot_path,"
+            " notes, status, found_date, name_key, phone_key) VALUES (?, ?, ?, ?, ?, ?, ?, 'new', ?, ?, ?)",
+            (name, trade, phone, group_source, card_score, screenshot_path, notes,
+             found_date or date.today().isoformat(), normalize_name(name), normalize_phone(phone)),
+        )
+        prospect = _row(db.execute("SELECT * FROM prospects WHERE id = ?", (cursor.lastrowid,)).fetchone())
+        update_aggregates(db, None, prospect)
+        update_contact_queue(db, None, prospect)
+        return prospect
+
+
+def get_prospect(prospect_id, conn=None):
+    db = conn or get_db()
+    return _row(db.execute("SELECT * FROM prospects WHERE id = ?", (prospect_id,)).fetchone())
+
+
+def iter_prospects(status=None, found_date=None, limit=None, conn=None, batch_size=500):
+    """Yield prospects as dicts in id order without loading them all at once."""
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if found_date is not None:
+        clauses.append("found_date = ?")
+        params.append(found_date)
+    sql = "SELECT * FROM prospects"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    cursor = (conn or get_db()).execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+
+
+def count_prospects(status=None, found_date=None, conn=None):
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if found_date is not None:
+        clauses.append("found_date = ?")
+        params.append(found_date)
+    sql = "SELECT COUNT(*) FROM prospects"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return (conn or get_db()).execute(sql, params).fetchone()[0]
+
+
+# ─── Deduplication ───────────────────────────────────────────────────────
+
+def normalize_name(name):
+    """Collapse a business name to the key duplicates share."""
+    name = (name or "").lower().replace("&", " and ")
+    name = re.sub(r"['\u2019`]", "", name)
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    return " ".join(w for w in words if w not in NAME_NOISE)
+
+
+def normalize_phone(phone):
+    """Last ten digits of a phone number, or None if it has too few."""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits[-10:] if len(digits) >= 10 else None
+
+
+def _backfill_keys(db):
+    rows = db.execute("SELECT id, name, phone FROM prospects WHERE name_key IS NULL").fetchall()
+    db.executemany(
+        "UPDATE prospects SET name_key = ?, phone_key = ? WHERE id = ?",
+        [(normalize_name(r["name"]), normalize_phone(r["phone"]), r["id"]) for r in rows],
+    )
+
+
+def _numbers(name_key):
+    return re.findall(r"\d+", name_key)
+
+
+def _phones_conflict(a, b):
+    """Two known, different numbers mean two businesses whatever the name."""
+    return a is not None and b is not None and a != b
+
+
+class DuplicateIndex:
+    """Find existing prospects (or earlier rows of a batch) matching a new one.
+
+    A match is a dict with the matched prospect's ``id`` (None for a batch
+    row), ``name`` and ``reason``: "phone", "name" or "similar name (0.93)".
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.phones = {}   # phone_key -> name, for batch rows
+        self.blocks = {}   # first word of name_key -> [(name_key, name, phone_key)]
+
+    def find(self, name, phone=None):
+        name_key, phone_key = normalize_name(name), normalize_phone(phone)
+        if phone_key:
+            if phone_key in self.phones:
+                return {"id": None, "name": self.phones[phone_key], "reason": "phone"}
+            row = self.db.execute(
+                "SELECT id, name FROM prospects WHERE phone_key = ? LIMIT 1", (phone_key,)
+            ).fetchone()
+            if row:
+                return {"id": row["id"], "name": row["name"], "reason": "phone"}
+        if not name_key:
+            return None
+
+        # The same name first, by index lookup, so the cap on fuzzy
+        # candidates below can never hide an exact duplicate
+        first = name_key.split()[0]
+        for key, other, other_phone in self.blocks.get(first, ()):
+            if key == name_key and not _phones_conflict(phone_key, other_phone):
+                return {"id": None, "name": other, "reason": "name"}
+        for row in self.db.execute("SELECT id, name, phone_key FROM prospects WHERE name_key = ?", (name_key,)):
+            if not _phones_conflict(phone_key, row["phone_key"]):
+                return {"id": row["id"], "name": row["name"], "reason": "name"}
+
+        # Candidates share the first word: "big jims plumbing" is only
+        # compared with other "big ..." names, a range scan on name_key
+        candidates = [(None, *entry) for entry in self.blocks.get(first, ())]
+        candidates += [
+            (row["id"], row["name_key"], row["name"], row["phone_key"])
+            for row in self.db.execute(
+                "SELECT id, name, name_key, phone_key FROM prospects"
+                " WHERE name_key >= ? AND name_key < ? LIMIT ?",
+                (first, first + "\uffff", FUZZY_CANDIDATES),
+            )
+        ]
+        best, best_ratio = None, FUZZY_THRESHOLD
+        # "A1 Roofing" and "A2 Roofing" are as similar as a typo, but
+        # different numbers make different businesses
+        numbers = _numbers(name_key)
+        for prospect_id, key, other, other_phone in candidates:
+            if _phones_conflict(phone_key, other_phone) or _numbers(key) != numbers:
+                continue
+            ratio = difflib.SequenceMatcher(None, name_key, key).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = {"id": prospect_id, "name": other}, ratio
+        if best:
+            best["reason"] = f"similar name ({best_ratio:.2f})"
+        return best
+
+    def add(self, name, phone=None):
+        """Remember a batch row so later rows of the same batch match it."""
+        name_key, phone_key = normalize_name(name), normalize_phone(phone)
+        if phone_key:
+            self.phones[phone_key] = name
+        if name_key:
+            self.blocks.setdefault(name_key.split()[0], []).append((name_key, name, phone_key))
+
+
+def find_prospect_id(name, conn=None):
+    """Id of the newest prospect whose name normalizes to the same key, or None."""
+    db = conn or get_db()
+    row = db.execute(
+        "SELECT id FROM prospects WHERE name_key = ? ORDER BY id DESC LIMIT 1", (normalize_name(name),)
+    ).fetchone()
+    return row["id"] if row else None
+
+
+def find_duplicate(name, phone=None, conn=None):
+    """The existing prospect a new (name, phone) would duplicate, or None."""
+    return DuplicateIndex(conn or get_db()).find(name, phone)
+
+
+def import_prospects(records, found_date=None, dry_run=False, conn=None):
+    """Insert many prospects in one transaction, skipping duplicates.
+
+    ``records`` are dicts with at least ``name`` and ``trade``; they are
+    checked against the database and against each other. Returns
+    ``(added, duplicates)`` where ``duplicates`` pairs each skipped record
+    with its match. With ``dry_run`` nothing is written.
+    """
+    today = found_date or date.today().isoformat()
+    added, duplicates, rows = [], [], []
+    with transaction(conn) as db:
+        last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM prospects").fetchone()[0]
+        index = DuplicateIndex(db)
+        for record in records:
+            match = index.find(record["name"], record.get("phone"))
+            if match:
+                duplicates.append((record, match))
+                continue
+            index.add(record["name"], record.get("phone"))
+            prospect = {field: record.get(field) for field in FIELDS[1:]}
+            prospect.update(
+                status="new", found_date=record.get("found_date") or today,
+                contacted_date=None, converted_date=None, revenue=0,
+            )
+            added.append(prospect)
+            rows.append((
+                *(prospect[field] for field in FIELDS[1:]),
+                normalize_name(prospect["name"]), normalize_phone(prospect["phone"]),
+            ))
+        if dry_run:
+            return added, duplicates
+        columns = FIELDS[1:] + ["name_key", "phone_key"]
+        db.executemany(
+            f"INSERT INTO prospects ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", rows
+        )
+        add_aggregates(db, added)
+        requeue(db, "id > ?", (last_id,))
+    return added, duplicates
+
+
+# ─── Aggregates ──────────────────────────────────────────────────────────
+
+def _contributions(prospect):
+    """What one prospect adds to each aggregates bucket."""
+    values = (
+        1,
+        int(prospect["contacted_date"] is not None),
+        int(prospect["converted_date"] is not None),
+        prospect["revenue"] or 0,
+    )
+    return {(dim, prospect[col] or ""): values for dim, col in AGGREGATE_DIMENSIONS.items()}
+
+
+def update_aggregates(db, before, after):
+    """Move a prospect's contribution from its ``before`` to ``after`` state."""
+    _apply_contributions(db, ((-1, before), (1, after)))
+
+
+def add_aggregates(db, prospects):
+    """Count a batch of newly inserted prospects with one upsert per bucket."""
+    _apply_contributions(db, ((1, prospect) for prospect in prospects))
+
+
+def _apply_contributions(db, signed):
+    deltas = {}
+    for sign, prospect in signed:
+        if prospect is None:
+            continue
+        for bucket, values in _contributions(prospect).items():
+            current = deltas.setdefault(bucket, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                current[i] += sign * value
+    rows = [(dim, key, *values) for (dim, key), values in deltas.items() if any(values)]
+    db.executemany(
+        "INSERT INTO aggregates (dimension, key, count, contacted, converted, revenue) VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count,"
+        " contacted = contacted + excluded.contacted, converted = converted + excluded.converted,"
+        " revenue = revenue + excluded.revenue",
+        rows,
+    )
+
+
+def compute_aggregates(db):
+    """Aggregates recomputed from scratch: {(dimension, key): (count, contacted, converted, revenue)}."""
+    totals = {}
+    for dim, col in AGGREGATE_DIMENSIONS.items():
+        for row in db.execute(
+            f"SELECT COALESCE({col}, ''), COUNT(*), SUM(contacted_date IS NOT NULL),"
+            f" SUM(converted_date IS NOT NULL), SUM(revenue) FROM prospects GROUP BY 1"
+        ):
+            totals[(dim, row[0])] = tuple(row[1:])
+    return totals
+
+
+def rebuild_aggregates(db):
+    db.execute("DELETE FROM aggregates")
+    db.executemany(
+        "INSERT INTO aggregates (dimension, key, count, contacted, converted, revenue) VALUES (?, ?, ?, ?, ?, ?)",
+        [(dim, key, *values) for (dim, key), values in compute_aggregates(db).items()],
+    )
+
+
+def verify_aggregates(conn=None):
+    """Differences between the maintained aggregates and a full recompute.
+
+    Returns ``{(dimension, key): (maintained, recomputed)}``; empty when in sync.
+    """
+    db = conn or get_db()
+    expected = compute_aggregates(db)
+    actual = {
+        (row[0], row[1]): tuple(row[2:])
+        for row in db.execute("SELECT dimension, key, count, contacted, converted, revenue FROM aggregates")
+        if any(row[2:])
+    }
+    return {
+        bucket: (actual.get(bucket), expected.get(bucket))
+        for bucket in set(expected) | set(actual)
+        if actual.get(bucket) != expected.get(bucket)
+    }
+
+
+def get_aggregate(dimension, key, conn=None):
+    """``{"count", "contacted", "converted", "revenue"}`` for one bucket."""
+    row = (conn or get_db()).execute(
+        "SELECT count, contacted, converted, revenue FROM aggregates WHERE dimension = ? AND key = ?",
+        (dimension, key or ""),
+    ).fetchone()
+    return dict(row) if row else {"count": 0, "contacted": 0, "converted": 0, "revenue": 0}
+
+
+def get_aggregates(dimension, conn=None):
+    """Every bucket of one dimension, keyed by bucket key."""
+    return {
+        row["key"]: {"count": row["count"], "contacted": row["contacted"],
+                     "converted": row["converted"], "revenue": row["revenue"]}
+        for row in (conn or get_db()).execute(
+            "SELECT key, count, contacted, converted, revenue FROM aggregates WHERE dimension = ?", (dimension,)
+        )
+    }
+
+
+def total_revenue(conn=None):
+    return sum(bucket["revenue"] for bucket in get_aggregates("status", conn).values())
+
+
+def get_stats(conn=None):
+    """Headline totals in the prospects.json ``stats`` shape."""
+    buckets = get_aggregates("status", conn).values()
+    return {
+        "total_found": sum(b["count"] for b in buckets),
+        "contacted": sum(b["contacted"] for b in buckets),
+        "converted": sum(b["converted"] for b in buckets),
+    }
+
+
+# ─── Status event log ────────────────────────────────────────────────────
+
+class _locked_log:
+    """Exclusive flock on the event log, shared by appenders and sync."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            # A compaction may have swapped in a new file while we waited
+            try:
+                if os.path.samestat(os.fstat(self.fd), os.stat(self.path)):
+                    return self.fd
+            except FileNotFoundError:
+                pass
+            os.close(self.fd)
+
+    def __exit__(self, exc_type, exc, tb):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        return False
+
+
+def _log_id(fd):
+    st = os.fstat(fd)
+    return f"{st.st_dev}:{st.st_ino}"
+
+
+def _compact_log(path):
+    """Atomically replace the (fully applied) log with an empty one; returns its id.
+
+    Call with the old log locked: appenders waiting on it re-open the new file.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.fsync(fd)
+        os.replace(tmp, path)
+        return _log_id(fd)
+    finally:
+        os.close(fd)
+
+
+def events_log(conn=None):
+    """The event log belonging to a database: EVENTS_LOG for the project one."""
+    file = (conn or get_db()).execute("PRAGMA database_list").fetchone()["file"]
+    path = Path(file).resolve()
+    if path == DB_PATH.resolve():
+        return EVENTS_LOG
+    return path.with_name(f"{path.stem}-events.jsonl")
+
+
+def append_event(prospect_id, status, ts=None, log_path=None, conn=None):
+    """Append one status change to the database's event log (an O(1) write)."""
+    event = {"prospect_id": prospect_id, "status": status, "ts": ts or datetime.now().isoformat(timespec="seconds")}
+    line = (json.dumps(event) + "\n").encode()
+    with _locked_log(Path(log_path or events_log(conn))) as fd:
+        os.write(fd, line)
+    return event
+
+
+def _apply_event(db, event):
+    before = get_prospect(event["prospect_id"], db)
+    if before is None:
+        return
+    prospect_id, new_status, ts = event["prospect_id"], event["status"], event["ts"]
+    after = dict(before, status=new_status)
+    if new_status == "contacted":
+        after["contacted_date"] = ts[:10]
+    elif new_status == "converted" and before["converted_date"] is None:
+        # Only the first conversion books revenue; re-marking changes nothing
+        after["converted_date"] = ts[:10]
+        after["revenue"] = CONVERSION_REVENUE
+    db.execute(
+        "UPDATE prospects SET status = ?, contacted_date = ?, converted_date = ?, revenue = ? WHERE id = ?",
+        (after["status"], after["contacted_date"], after["converted_date"], after["revenue"], prospect_id),
+    )
+    update_aggregates(db, before, after)
+    update_contact_queue(db, before, after)
+    if new_status != before["status"]:
+        schedule_followups(db, prospect_id, new_status, ts)
+    db.execute(
+        "INSERT INTO status_events (prospect_id, from_status, status, ts) VALUES (?, ?, ?, ?)",
+        (prospect_id, before["status"], new_status, ts),
+    )
+
+
+def _apply_log(db, fd):
+    """Apply the locked log ``fd`` past the stored offset inside ``db``'s transaction.
+
+    Returns ``(applied, offset, size)``.
+    """
+    applied = 0
+    log_id = _log_id(fd)
+    meta = dict(db.execute("SELECT key, value FROM meta WHERE key IN ('events_offset', 'events_log_id')").fetchall())
+    offset = int(meta.get("events_offset", 0))
+    size = os.fstat(fd).st_size
+    if meta.get("events_log_id", log_id) != log_id or size < offset:
+        offset = 0  # compacted, but the offset reset in sync_events never ran
+    if size > offset:
+        chunk = os.pread(fd, size - offset, offset)
+        complete = chunk[:chunk.rfind(b"\n") + 1]  # ignore a torn last line
+        for line in complete.splitlines():
+            if line.strip():
+                _apply_event(db, json.loads(line))
+                applied += 1
+        offset += len(complete)
+    db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                   [("events_offset", str(offset)), ("events_log_id", log_id)])
+    return applied, offset, size
+
+
+def sync_events(conn=None, log_path=None):
+    """Apply events appended since the last sync. Returns how many were applied."""
+    conn = conn or get_db()
+    log_path = Path(log_path or events_log(conn))
+    with _locked_log(log_path) as fd:
+        with transaction(conn) as db:
+            applied, offset, size = _apply_log(db, fd)
+        # Compact only once the commit above made status_events cover the
+        # whole log. The offset is stored with the log's identity, so a crash
+        # before the reset below leaves an offset the next sync won't trust.
+        if offset == size and offset >= EVENTS_COMPACT_BYTES:
+            with transaction(conn) as db:
+                db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               [("events_offset", "0"), ("events_log_id", _compact_log(log_path))])
+    return applied
+
+
+def set_status(prospect_id, new_status, conn=None):
+    """Move a prospect to ``new_status``; returns ``(old_status, prospect)``.
+
+    The change is appended to the event log and then materialized.
+    Returns ``(None, None)`` when no prospect has that id.
+    """
+    db = conn or get_db()
+    sync_events(db)
+    current = get_prospect(prospect_id, db)
+    if current is None:
+        return None, None
+    append_event(prospect_id, new_status, conn=db)
+    sync_events(db)
+    return current["status"], get_prospect(prospect_id, db)
+
+
+# ─── Contact queue ───────────────────────────────────────────────────────
+
+def priority_weights():
+    """PRIORITY with config.json's "priority" overrides applied."""
+    weights = dict(PRIORITY)
+    try:
+        with open(CONFIG_PATH) as f:
+            weights.update(json.load(f).get("priority", {}))
+    except (OSError, ValueError):
+        pass
+    return weights
+
+
+class Prioritizer:
+    """Expected value and queue priority of prospects, from current conversion history.
+
+    Group and trade rates are shrunk toward the fixed prior_rate, so a
+    prospect's priority depends only on its own group's and trade's history.
+    """
+
+    def __init__(self, db, weights=None):
+        self.weights = weights or priority_weights()
+        self.groups = get_aggregates("group", db)
+        self.trades = get_aggregates("trade", db)
+        self.prior = self.weights["prior_rate"]
+        self.decay = math.log(2) / self.weights["half_life_days"]
+
+    def rate(self, buckets, key):
+        """Conversions per contact in one group or trade, shrunk toward the prior."""
+        bucket = buckets.get(key or "", {"converted": 0, "contacted": 0})
+        k = self.weights["prior_strength"]
+        return (bucket["converted"] + k * self.prior) / (bucket["contacted"] + k)
+
+    def value(self, trade):
+        """Revenue per conversion in this trade, shrunk toward CONVERSION_REVENUE."""
+        bucket = self.trades.get(trade or "", {"converted": 0, "revenue": 0})
+        return (bucket["revenue"] + 2 * CONVERSION_REVENUE) / (bucket["converted"] + 2)
+
+    def log_ev(self, prospect):
+        w = self.weights
+        score = min(10, max(1, prospect["card_score"] or 5))
+        return (
+            math.log(self.value(prospect["trade"]))
+            + math.log(self.prior)
+            + w["group_weight"] * math.log(self.rate(self.groups, prospect["group_source"]) / self.prior)
+            + w["trade_weight"] * math.log(self.rate(self.trades, prospect["trade"]) / self.prior)
+            + w["score_weight"] * math.log((11 - score) / 10)
+        )
+
+    def priority(self, prospect):
+        """``(priority, log_ev)``: log EV as of the found date, plus the decay it is spared."""
+        log_ev = self.log_ev(prospect)
+        return log_ev + self.decay * date.fromisoformat(prospect["found_date"]).toordinal(), log_ev
+
+    def ev_on(self, priority, day=None):
+        """EV on ``day`` (default today) of a queue entry with this priority."""
+        return math.exp(priority - self.decay * (day or date.today()).toordinal())
+
+
+def requeue(db, where="1", params=(), prioritizer=None):
+    """(Re)rank the ``status = 'new'`` prospects matching ``where``. Returns how many."""
+    prioritizer = prioritizer or Prioritizer(db)
+    rows = [
+        (p["id"], *prioritizer.priority(p))
+        for p in db.execute(f"SELECT * FROM prospects WHERE status = 'new' AND ({where})", params)
+    ]
+    db.executemany(
+        "INSERT OR REPLACE INTO contact_queue (prospect_id, priority, log_ev) VALUES (?, ?, ?)", rows
+    )
+    return len(rows)
+
+
+def update_contact_queue(db, before, after):
+    """Keep the queue in step with one prospect changing from ``before`` to ``after``.
+
+    Only that prospect's entry changes; the daily rebuild picks up what its
+    contact or conversion did to the rest of its group and trade.
+    """
+    if after["status"] == "new":
+        requeue(db, "id = ?", (after["id"],))
+    elif before is not None and before["status"] == "new":
+        db.execute("DELETE FROM contact_queue WHERE prospect_id = ?", (after["id"],))
+
+
+def rebuild_contact_queue(db):
+    """Re-rank every new prospect from current history and weights."""
+    weights = priority_weights()
+    db.execute("DELETE FROM contact_queue")
+    count = requeue(db, prioritizer=Prioritizer(db, weights))
+    db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+        ("priority_weights", json.dumps(weights, sort_keys=True)),
+        ("contact_queue_ranked", date.today().isoformat()),
+    ])
+    return count
+
+
+def _check_contact_queue(conn):
+    """Rebuild the queue if the weights changed or it hasn't been re-ranked today."""
+    meta = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('priority_weights', 'contact_queue_ranked')"
+    ).fetchall())
+    if (meta.get("priority_weights") != json.dumps(priority_weights(), sort_keys=True)
+            or meta.get("contact_queue_ranked") != date.today().isoformat()):
+        with transaction(conn) as db:
+            rebuild_contact_queue(db)
+
+
+def peek_contacts(n=5, conn=None):
+    """The ``n`` highest-priority prospects to contact, best first.
+
+    Each carries ``ev`` (expected value today) and ``found_ev`` (when found).
+    """
+    db = conn or get_db()
+    prioritizer = Prioritizer(db)
+    return [
+        dict(row, ev=prioritizer.ev_on(row["priority"]), found_ev=math.exp(row["log_ev"]))
+        for row in db.execute(
+            "SELECT p.*, q.priority, q.log_ev FROM contact_queue q JOIN prospects p ON p.id = q.prospect_id"
+            " ORDER BY q.priority DESC LIMIT ?", (n,)
+        )
+    ]
+
+
+def pop_contacts(n=5, conn=None):
+    """Take the top ``n`` prospects off the queue by marking them contacted.
+
+    Choosing them, logging their events and applying those happen under
+    the log lock and one transaction, so concurrent pops never share a
+    prospect.
+    """
+    db = conn or get_db()
+    ts = datetime.now().isoformat(timespec="seconds")
+    # Log lock first, then the database: the same order as sync_events
+    with _locked_log(events_log(db)) as fd:
+        with transaction(db):
+            _apply_log(db, fd)
+            top = peek_contacts(n, db)
+            os.write(fd, b"".join(
+                (json.dumps({"prospect_id": p["id"], "status": "contacted", "ts": ts}) + "\n").encode() for p in top
+            ))
+            _apply_log(db, fd)
+    return top
+
+
+# ─── Follow-ups ──────────────────────────────────────────────────────────
+
+def _followup_rows(prospect_id, status, ts):
+    start = datetime.fromisoformat(ts)
+    return [
+        (prospect_id, template, (start + delay).isoformat(timespec="seconds"))
+        for template, delay in FOLLOWUPS.get(status, ())
+    ]
+
+
+def schedule_followups(db, prospect_id, status, ts):
+    """Replace a prospect's pending follow-ups with the ones ``status`` calls for, timed from ``ts``."""
+    db.execute("DELETE FROM followups WHERE prospect_id = ? AND status = 'pending'", (prospect_id,))
+    # OR IGNORE: a template already sent or skipped stays that way
+    db.executemany(
+        "INSERT OR IGNORE INTO followups (prospect_id, template, due_at) VALUES (?, ?, ?)",
+        _followup_rows(prospect_id, status, ts),
+    )
+
+
+def rebuild_followups(db):
+    """Reschedule every pending follow-up from the prospects' current status."""
+    db.execute("DELETE FROM followups WHERE status = 'pending'")
+    placeholders = ", ".join("?" for _ in FOLLOWUPS)
+    # Timed from when the status was entered; imported rows without history
+    # fall back to the matching date column
+    rows = db.execute(
+        "SELECT p.id, p.status, COALESCE(MAX(e.ts), CASE p.status WHEN 'delivered' THEN p.converted_date END,"
+        " p.contacted_date, p.found_date) AS ts"
+        " FROM prospects p LEFT JOIN status_events e ON e.prospect_id = p.id AND e.status = p.status"
+        f" WHERE p.status IN ({placeholders}) GROUP BY p.id",
+        list(FOLLOWUPS),
+    ).fetchall()
+    db.executemany(
+        "INSERT OR IGNORE INTO followups (prospect_id, template, due_at) VALUES (?, ?, ?)",
+        [item for row in rows for item in _followup_rows(row["id"], row["status"], row["ts"])],
+    )
+    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('followups_built', ?)",
+               (datetime.now().isoformat(timespec="seconds"),))
+
+
+def due_followups(now=None, conn=None):
+    """Follow-ups due by ``now`` (default: now), as ``(due, superseded)``.
+
+    ``due`` has one per prospect, earliest first: the prospect dict plus
+    ``template`` and ``due_at``. When several of a prospect's follow-ups
+    are due at once (both no-response ones, after a long gap) only the
+    last is due; the earlier ones come back in ``superseded``.
+    """
+    db = conn or get_db()
+    now = now or datetime.now().isoformat(timespec="seconds")
+    latest, superseded = {}, []
+    for row in db.execute(
+        "SELECT p.*, f.template, f.due_at FROM followups f JOIN prospects p ON p.id = f.prospect_id"
+        " WHERE f.status = 'pending' AND f.due_at <= ? ORDER BY f.due_at", (now,)
+    ):
+        if row["id"] in latest:
+            superseded.append(latest[row["id"]])
+        latest[row["id"]] = dict(row)
+    return sorted(latest.values(), key=lambda f: f["due_at"]), superseded
+
+
+def count_followups(now=None, conn=None):
+    """``(due, scheduled)``: prospects with a follow-up due by ``now``, and with any pending."""
+    db = conn or get_db()
+    now = now or datetime.now().isoformat(timespec="seconds")
+    row = db.execute(
+        "SELECT COUNT(DISTINCT prospect_id) AS scheduled,"
+        " COUNT(DISTINCT CASE WHEN due_at <= ? THEN prospect_id END) AS due"
+        " FROM followups WHERE status = 'pending'", (now,)
+    ).fetchone()
+    return row["due"], row["scheduled"]
+
+
+def complete_followups(sent, skipped=(), conn=None):
+    """Close follow-ups from `due_followups` as sent or skipped. Returns how many were sent."""
+    now = datetime.now().isoformat(timespec="seconds")
+    with transaction(conn) as db:
+        closed = {}
+        for status, followups in (("sent", sent), ("skipped", skipped)):
+            closed[status] = db.executemany(
+                "UPDATE followups SET status = ?, done_at = ?"
+                " WHERE prospect_id = ? AND template = ? AND status = 'pending'",
+                [(status, now, f["id"], f["template"]) for f in followups],
+            ).rowcount
+        return closed["sent"]
+
+
+FUNNEL_SQL = """
+SELECT p.found_date, p.group_source, p.trade, p.status, p.contacted_date, p.converted_date,
+       e.first_contacted, e.first_converted, e.max_status
+FROM prospects p
+LEFT JOIN (
+    SELECT prospect_id,
+           MIN(CASE WHEN status = 'contacted' THEN ts END) AS first_contacted,
+           MIN(CASE WHEN status = 'converted' THEN ts END) AS first_converted,
+           MAX(CASE status WHEN 'contacted' THEN 1 WHEN 'replied' THEN 2
+                           WHEN 'converted' THEN 3 WHEN 'delivered' THEN 4 ELSE 0 END) AS max_status
+    FROM status_events
+    GROUP BY prospect_id
+) e ON e.prospect_id = p.id
+WHERE p.found_date >= ? AND p.found_date <= ?
+"""
+
+
+def iter_funnel_rows(since=None, until=None, conn=None, batch_size=5000):
+    """Stream one row per prospect joined with its first contact/conversion times.
+
+    Rows are ``sqlite3.Row`` objects fetched ``batch_size`` at a time, so the
+    caller's memory use does not grow with the size of the history.
+    """
+    db = conn or get_db()
+    if conn is None:
+        sync_events(db)
+    cursor = db.execute(FUNNEL_SQL, (since or "0000-00-00", until or "9999-99-99"))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def status_history(prospect_id, conn=None):
+    """Every recorded status change for a prospect, oldest first."""
+    db = conn or get_db()
+    sync_events(db)
+    return [dict(row) for row in db.execute(
+        "SELECT from_status, status, ts FROM status_events WHERE prospect_id = ? ORDER BY id", (prospect_id,)
+    )]
+
+
+# ─── Asset manifest ──────────────────────────────────────────────────────
+
+def safe_name(name):
+    """File-name stem for a business: "Big Jim's Plumbing" -> big_jims_plumbing."""
+    return re.sub(r"[^a-z0-9_]", "", name.lower().replace(" ", "_"))
+
+
+def _relative(path):
+    path = Path(path).resolve()
+    if path.is_relative_to(PROJECT_ROOT.resolve()):
+        path = path.relative_to(PROJECT_ROOT.resolve())
+    return str(path)
+
+
+def _asset_row(row):
+    if row is None:
+        return None
+    asset = dict(row)
+    asset["path"] = PROJECT_ROOT / asset["path"]
+    return asset
+
+
+def record_assets(prospect_id, assets, conn=None):
+    """Point the manifest at freshly rendered files.
+
+    ``assets`` are dicts with template, kind, path, width, height and
+    sha256; each replaces the prospect's previous entry for its template
+    and kind. A new final also removes the template's print exports that
+    aren't among ``assets``, so delivery never prefers an outdated one.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    rows = [
+        (prospect_id, asset["template"], asset["kind"], _relative(asset["path"]),
+         asset.get("width"), asset.get("height"), asset.get("sha256"), now)
+        for asset in assets
+    ]
+    recorded = {(asset["template"], asset["kind"]) for asset in assets}
+    stale = [
+        (prospect_id, template, derived)
+        for template, kind in recorded for derived in DERIVED_ASSET_KINDS.get(kind, ())
+        if (template, derived) not in recorded
+    ]
+    with transaction(conn) as db:
+        db.executemany("DELETE FROM assets WHERE prospect_id = ? AND template = ? AND kind = ?", stale)
+        db.executemany(
+            "INSERT OR REPLACE INTO assets (prospect_id, template, kind, path, width, height, sha256, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def get_asset(prospect_id, template, kind="preview", conn=None):
+    """The newest render of one template for a prospect, or None."""
+    db = conn or get_db()
+    return _asset_row(db.execute(
+        "SELECT * FROM assets WHERE prospect_id = ? AND template = ? AND kind = ?",
+        (prospect_id, template, kind),
+    ).fetchone())
+
+
+def get_assets(prospect_id, kind=None, conn=None):
+    """All of a prospect's newest renders (optionally only one kind), newest first."""
+    db = conn or get_db()
+    sql = "SELECT * FROM assets WHERE prospect_id = ?"
+    params = [prospect_id]
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    return [_asset_row(row) for row in db.execute(sql + " ORDER BY created_at DESC, template", params)]
+
+
+# ─── Screenshot ledger ───────────────────────────────────────────────────
+
+def screenshot_known(path, sha256, conn=None):
+    """Whether this file, or another with the same bytes, was already ingested.
+
+    Screenshots whose extraction failed don't count, so they are retried.
+    """
+    db = conn or get_db()
+    return db.execute(
+        "SELECT EXISTS (SELECT 1 FROM screenshots WHERE (path = ? OR sha256 = ?) AND status != 'failed')",
+        (_relative(path), sha256),
+    ).fetchone()[0] == 1
+
+
+def _signed64(value):
+    # SQLite integers are signed; store unsigned 64-bit hashes two's-complement
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+def record_screenshot(path, sha256, status, prospect_id=None, detail=None, seen_at=None,
+                      extracted_at=None, previewed_at=None, dhash=None, ahash=None, card_text=None, conn=None):
+    """Write (or overwrite) a screenshot's ledger row.
+
+    ``status`` is ``prospect``, ``duplicate`` or ``failed``; the timestamps
+    are epoch seconds and the hashes unsigned 64-bit ints.
+    """
+    with transaction(conn) as db:
+        db.execute(
+            "INSERT OR REPLACE INTO screenshots (path, sha256, status, prospect_id, detail, seen_at,"
+            " extracted_at, previewed_at, dhash, ahash, card_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (_relative(path), sha256, status, prospect_id, detail, seen_at, extracted_at, previewed_at,
+             _signed64(dhash), _signed64(ahash), card_text),
+        )
+
+
+def iter_screenshot_hashes(conn=None):
+    """``(path, prospect_id, dhash, ahash)`` for every hashed screenshot not awaiting a retry."""
+    mask = (1 << 64) - 1
+    cursor = (conn or get_db()).execute(
+        "SELECT path, prospect_id, dhash, ahash FROM screenshots"
+        " WHERE dhash IS NOT NULL AND ahash IS NOT NULL AND status != 'failed' ORDER BY seen_at"
+    )
+    for row in cursor:
+        yield row["path"], row["prospect_id"], row["dhash"] & mask, row["ahash"] & mask
+
+
+def screenshot_records(conn=None):
+    """Ledger rows keyed by the screenshot's absolute path."""
+    db = conn or get_db()
+    return {
+        str((PROJECT_ROOT / row["path"]).resolve()): dict(row)
+        for row in db.execute("SELECT path, status, prospect_id, card_text FROM screenshots")
+    }
+
+
+def set_card_scores(scores, conn=None):
+    """Overwrite ``card_score`` for many prospects from ``(prospect_id, score)`` pairs."""
+    scores = list(scores)
+    with transaction(conn) as db:
+        updated = db.executemany("UPDATE prospects SET card_score = ? WHERE id = ?",
+                                 [(score, pid) for pid, score in scores]).rowcount
+        prioritizer = Prioritizer(db)
+        for pid, _ in scores:
+            requeue(db, "id = ?", (pid,), prioritizer)
+        return updated
+
+
+def import_json(path=PROSPECTS_FILE, conn=None):
+    """Load a prospects.json export, keeping its ids. Returns rows imported."""
+    with open(path) as f:
+        data = json.load(f)
+    rows = [tuple(p.get(field) for field in FIELDS) for p in data["prospects"]]
+    placeholders = ", ".join("?" for _ in FIELDS)
+    with transaction(conn) as db:
+        db.executemany(
+            f"INSERT OR REPLACE INTO prospects ({', '.join(FIELDS)}) VALUES ({placeholders})", rows
+        )
+        _backfill_keys(db)
+        rebuild_aggregates(db)
+        rebuild_contact_queue(db)
+        rebuild_followups(db)
+    return len(rows)
+
+
+def export_json(path=PROSPECTS_FILE, conn=None):
+    """Write the database out in the prospects.json format. Returns rows written."""
+    db = conn or get_db()
+    # Public columns only: name_key and phone_key are internal dedupe indexes
+    prospects = [{field: p[field] for field in FIELDS} for p in iter_prospects(conn=db)]
+    with open(path, 'w') as f:
+        json.dump({"prospects": prospects, "stats": get_stats(db)}, f, indent=2)
+    return len(prospects)
@@ -8,18 +8,33 @@ and generates a professional redesign using HTML/CSS templates.
 Pipeline: Screenshot → AI Extract → Template Fill → Render → Watermark → Deliver
 """
 
+import atexit
+import base64
+import hashlib
 import json
+import re
 import os
 import sys
+import shutil
+import struct
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from string import Template
+from urllib.request import Request, urlopen
 
 PROJECT_ROOT = Path(__file__).parent.parent
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
+CARD_TEMPLATES_DIR = TEMPLATES_DIR / "cards"
 OUTPUT_DIR = PROJECT_ROOT / "assets" / "redesigns"
 WATERMARK_DIR = PROJECT_ROOT / "assets" / "watermarked"
+FONTS_DIR = PROJECT_ROOT / "assets" / "fonts"
+FONTS_MANIFEST = FONTS_DIR / "fonts.json"
+RENDER_CACHE_DIR = PROJECT_ROOT / "assets" / ".render-cache"
 
 # Ensure dirs exist
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -33,7 +48,7 @@ CARD_TEMPLATES = {
 <!DOCTYPE html>
 <html>
 <head><style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
+${font_css}
 * { margin: 0; padding: 0; box-sizing: border-box; }
 .card {
     width: 700px; height: 400px;
@@ -100,7 +115,7 @@ ${watermark_css}
 <!DOCTYPE html>
 <html>
 <head><style>
-@import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;800&display=swap');
+${font_css}
 * { margin: 0; padding: 0; box-sizing: border-box; }
 .card {
     width: 700px; height: 400px;
@@ -155,7 +170,7 @@ ${watermark_css}
 <!DOCTYPE html>
 <html>
 <head><style>
-@import url('https://fonts.googleapis.com/css2?family=Archivo:wght@400;600;700;900&display=swap');
+${font_css}
 * { margin: 0; padding: 0; box-sizing: border-box; }
 .card {
     width: 700px; height: 400px;
@@ -273,127 +288,1112 @@ TRADE_COLORS = {
 }
 
 
+# ─── Fonts ───────────────────────────────────────────────────────────────
+
+# Web font used by each template: (family, weights)
+TEMPLATE_FONTS = {
+    "clean_professional": ("Inter", (400, 600, 700)),
+    "dark_bold": ("Montserrat", (400, 600, 800)),
+    "trade_badge": ("Archivo", (400, 600, 700, 900)),
+}
+
+GOOGLE_FONTS_CSS = "https://fonts.googleapis.com/css2?family={family}:wght@{weights}&display=swap"
+# Google only serves woff2 to browsers it recognises
+FONT_FETCH_UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+FONT_SUBSETS = ("latin", "latin-ext")
+FONT_FACE_RE = re.compile(r"/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}")
+
+
+def google_fonts_url(family, weights):
+    return GOOGLE_FONTS_CSS.format(family=family.replace(" ", "+"), weights=";".join(str(w) for w in weights))
+
+
+def fetch_fonts(refresh=False):
+    """Download the template fonts once into assets/fonts/ for offline renders."""
+    FONTS_DIR.mkdir(parents=True, exist_ok=True)
+    faces = []
+    for family, weights in dict(TEMPLATE_FONTS.values()).items():
+        print(f"🔤 {family} ({', '.join(str(w) for w in weights)})")
+        request = Request(google_fonts_url(family, weights), headers={"User-Agent": FONT_FETCH_UA})
+        css = urlopen(request, timeout=30).read().decode()
+        for subset, block in FONT_FACE_RE.findall(css):
+            if subset not in FONT_SUBSETS:
+                continue
+            props = dict(
+                (k.strip(), v.strip())
+                for k, v in (line.split(":", 1) for line in block.split(";") if ":" in line)
+            )
+            url = re.search(r"url\(([^)]+)\)", props["src"]).group(1)
+            font_file = FONTS_DIR / url.rsplit("/", 1)[-1]
+            if refresh or not font_file.exists():
+                font_file.write_bytes(urlopen(url, timeout=30).read())
+                print(f"  ⬇️  {font_file.name} ({subset}, {props['font-weight']})")
+            faces.append({
+                "family": family,
+                "style": props.get("font-style", "normal"),
+                "weight": int(props["font-weight"]),
+                "subset": subset,
+                "file": font_file.name,
+                "unicode_range": props.get("unicode-range", ""),
+            })
+    with open(FONTS_MANIFEST, 'w') as f:
+        json.dump({"faces": faces, "fetched": datetime.now().isoformat()}, f, indent=2)
+    font_face_css.cache_clear()
+    TEMPLATES.clear()
+    print(f"✅ {len(faces)} font faces saved to {FONTS_DIR}")
+
+
+@lru_cache(maxsize=None)
+def font_face_css(family, weights):
+    """@font-face rules for ``family`` with the vendored files inlined as base64.
+
+    Falls back to the Google Fonts @import when the bundle has not been
+    fetched yet, so renders still work (slower, and only when online).
+    """
+    faces = []
+    if FONTS_MANIFEST.exists():
+        with open(FONTS_MANIFEST) as f:
+            faces = [face for face in json.load(f)["faces"] if face["family"] == family]
+    if not faces:
+        print(f"⚠️  No local bundle for {family} — using Google Fonts. Run: redesign-pipeline.py fonts")
+        return f"@import url('{google_fonts_url(family, weights)}');"
+    
+    # Variable fonts share one file across weights: emit one rule per file
+    by_file = {}
+    for face in faces:
+        by_file.setdefault((face["file"], face["style"]), []).append(face)
+    rules = []
+    for (font_file, style), group in by_file.items():
+        data = base64.b64encode((FONTS_DIR / font_file).read_bytes()).decode()
+        low = min(face["weight"] for face in group)
+        high = max(face["weight"] for face in group)
+        rules.append(
+            "@font-face { "
+            f"font-family: '{family}'; font-style: {style}; font-weight: {low}{f' {high}' if high != low else ''}; "
+            f"font-display: block; src: url(data:font/woff2;base64,{data}) format('woff2'); "
+            f"unicode-range: {group[0]['unicode_range']}; }}"
+        )
+    return "\n".join(rules)
+
+
+def template_font_css(template_name):
+    if template_name not in TEMPLATE_FONTS:
+        return ""
+    return font_face_css(*TEMPLATE_FONTS[template_name])
+
+
 def get_trade_icon(trade):
-    return TRADE_ICONS.get(trade.lower(), TRADE_ICONS["default"])
+    return trade_style(trade)[0]
 
 def get_trade_color(trade):
-    return TRADE_COLORS.get(trade.lower(), TRADE_COLORS["default"])
+    return trade_style(trade)[1]
 
 
-def generate_card_html(card_info, template_name="clean_professional", watermark=True):
-    """Generate HTML for a business card design."""
-    template = CARD_TEMPLATES.get(template_name, CARD_TEMPLATES["clean_professional"])
-    
-    trade = card_info.get("trade", "contractor")
-    
-    # Build substitution dict
-    subs = {
-        "business_name": card_info.get("business_name", "Your Business Name"),
-        "trade_description": card_info.get("trade_description", trade.title()),
-        "phone": card_info.get("phone", "(615) 555-0000"),
-        "email": card_info.get("email", "info@example.com"),
-        "location": card_info.get("location", "Nashville, TN"),
-        "license_text": card_info.get("license_text", "Licensed & Insured"),
-        "trade_icon": get_trade_icon(trade),
-        "accent_color": card_info.get("accent_color", get_trade_color(trade)),
-        "watermark_css": WATERMARK_CSS if watermark else "",
-        "watermark_html": WATERMARK_HTML if watermark else "",
-    }
-    
-    # Use string.Template for safe substitution
-    tmpl = Template(template)
-    return tmpl.safe_substitute(subs)
+@lru_cache(maxsize=256)
+def trade_style(trade):
+    """(icon, accent color) for a trade, resolved once per distinct trade."""
+    key = trade.lower()
+    return TRADE_ICONS.get(key, TRADE_ICONS["default"]), TRADE_COLORS.get(key, TRADE_COLORS["default"])
+
+
+# ─── Template registry ───────────────────────────────────────────────────
+
+class CompiledTemplate:
+    """A card template pre-split into static chunks and named slots.
+
+    Parsing follows ``string.Template`` exactly (``$$`` escapes, ``$name``
+    and ``${name}`` slots), and substitution behaves like
+    ``safe_substitute``: unknown slots are left as written. Values given
+    as ``static`` are baked into the chunks at compile time.
+    """
+
+    def __init__(self, source, static=None):
+        static = static or {}
+        self.parts = []
+        self.slots = []  # (index into parts, name)
+        literal = []
+        pos = 0
+        for match in Template.pattern.finditer(source):
+            literal.append(source[pos:match.start()])
+            pos = match.end()
+            name = match.group("named") or match.group("braced")
+            if match.group("escaped") is not None:
+                literal.append(Template.delimiter)
+            elif name is None:
+                literal.append(match.group())
+            elif name in static:
+                literal.append(static[name])
+            else:
+                self.parts.append("".join(literal))
+                literal = []
+                self.slots.append((len(self.parts), name))
+                self.parts.append(match.group())
+        literal.append(source[pos:])
+        self.parts.append("".join(literal))
+
+    def substitute(self, values):
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            if name in values:
+                parts[index] = str(values[name])
+        return "".join(parts)
 
 
-def render_card_to_image(html_content, output_path, width=700, height=400):
-    """Render HTML card to PNG using Playwright (headless Chromium)."""
-    html_path = output_path.with_suffix('.html')
-    png_path = Path(str(output_path).replace('.html', '.png'))
-    if png_path.suffix != '.png':
-        png_path = output_path.with_suffix('.png')
+class TemplateRegistry:
+    """Compiled card templates: the built-ins plus ``templates/cards/*.html``.
+
+    Each template is compiled once per watermark/font variant. Files on disk
+    override built-ins of the same name and are recompiled when their mtime
+    changes.
+    """
+
+    def __init__(self, builtin, directory):
+        self.builtin = builtin
+        self.directory = directory
+        self._compiled = {}  # (name, watermark, inline_fonts) -> (mtime, CompiledTemplate)
+
+    def names(self):
+        names = list(self.builtin)
+        if self.directory.is_dir():
+            names += sorted(p.stem for p in self.directory.glob("*.html") if p.stem not in self.builtin)
+        return names
+
+    def resolve(self, name):
+        """``name`` if it exists, else the default template's name."""
+        if name in self.builtin or (self.directory / f"{name}.html").exists():
+            return name
+        return "clean_professional"
+
+    def get(self, name, watermark=True, inline_fonts=True):
+        name = self.resolve(name)
+        path = self.directory / f"{name}.html"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        key = (name, watermark, inline_fonts)
+        cached = self._compiled.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        source = path.read_text() if mtime is not None else self.builtin[name]
+        compiled = CompiledTemplate(source, {
+            "font_css": template_font_css(name) if inline_fonts else "",
+            "watermark_css": WATERMARK_CSS if watermark else "",
+            "watermark_html": WATERMARK_HTML if watermark else "",
+        })
+        self._compiled[key] = (mtime, compiled)
+        return compiled
+
+    def clear(self):
+        self._compiled.clear()
+
+
+TEMPLATES = TemplateRegistry(CARD_TEMPLATES, CARD_TEMPLATES_DIR)
+
+
+def generate_card_html(card_info, template_name="clean_professional", watermark=True, inline_fonts=True):
+    """Generate HTML for a business card design."""
+    template = TEMPLATES.get(template_name, watermark, inline_fonts)
     
-    # Save HTML
-    with open(html_path, 'w') as f:
-        f.write(html_content)
+    def field(key, default):
+        # Extracted info carries explicit nulls for fields it couldn't read
+        value = card_info.get(key)
+        return default if value is None else value
     
-    # Render with Playwright
-    try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page(viewport={"width": width + 100, "height": height + 100})
+    trade = str(field("trade", "contractor"))
+    trade_icon, trade_color = trade_style(trade)
+    
+    return template.substitute({
+        "business_name": field("business_name", "Your Business Name"),
+        "trade_description": field("trade_description", trade.title()),
+        "phone": field("phone", "(615) 555-0000"),
+        "email": field("email", "info@example.com"),
+        "location": field("location", "Nashville, TN"),
+        "license_text": field("license_text", "Licensed & Insured"),
+        "trade_icon": trade_icon,
+        "accent_color": field("accent_color", trade_color),
+    })
+
+
+CARD_STYLE_RE = re.compile(r"<style>(.*)</style>", re.S)
+CARD_BODY_RE = re.compile(r"<body>(.*)</body>", re.S)
+
+
+def card_html_parts(card_info, template_name="clean_professional", watermark=True):
+    """Split a card into ``(font_css, style, body)`` for batch rendering."""
+    template_name = TEMPLATES.resolve(template_name)
+    html = generate_card_html(card_info, template_name, watermark, inline_fonts=False)
+    return (
+        template_font_css(template_name),
+        CARD_STYLE_RE.search(html).group(1),
+        CARD_BODY_RE.search(html).group(1),
+    )
+
+
+# ─── Renderer ────────────────────────────────────────────────────────────
+
+# Upper bound on waiting for web fonts before screenshotting anyway
+FONT_TIMEOUT_MS = 3000
+
+# Resolves once pending font loads finish and two frames have been laid out,
+# or with false when the timeout passed in wins the race.
+FONTS_READY_JS = """
+(timeout) => Promise.race([
+    document.fonts.ready.then(() => new Promise(resolve =>
+        requestAnimationFrame(() => requestAnimationFrame(() => resolve(true))))),
+    new Promise(resolve => setTimeout(() => resolve(false), timeout)),
+])
+"""
+
+# Print export: the 700x400 CSS card is a 3.5" x 2" card at 200 CSS px per
+# inch, so device_scale_factor 1.5 gives 300 DPI. Bleed and the safe margin
+# inside the trim line are each 1/8" (25 CSS px). page.pdf lays out at 96 CSS
+# px per inch, hence the PDF scale.
+PRINT_DPI = 300
+CARD_PX_PER_INCH = 200
+PRINT_SCALE = PRINT_DPI / CARD_PX_PER_INCH
+BLEED_PX = 25
+SAFE_PX = 25
+PDF_SCALE = 96 / CARD_PX_PER_INCH
+PRINT_FORMATS = ("png", "pdf")  # what --print accepts; nothing is exported unless asked
+
+# Grows every mounted card by the bleed on each side, padding included so
+# the layout inside the trim line stays put, and squares off the corners.
+# Returns, per card, text that falls outside the safe area.
+APPLY_BLEED_JS = """
+([bleed, safe]) => Array.from(document.querySelectorAll('.host')).map(host => {
+    const card = host.shadowRoot.querySelector('.card');
+    const cs = getComputedStyle(card);
+    card.style.width = `${card.offsetWidth + 2 * bleed}px`;
+    card.style.height = `${card.offsetHeight + 2 * bleed}px`;
+    for (const side of ['Top', 'Right', 'Bottom', 'Left']) {
+        card.style[`padding${side}`] = `${(parseFloat(cs[`padding${side}`]) || 0) + bleed}px`;
+    }
+    card.style.borderRadius = '0';
+    card.style.boxShadow = 'none';
+    const box = card.getBoundingClientRect();
+    const inset = bleed + safe;
+    const outside = [];
+    const walker = document.createTreeWalker(host.shadowRoot, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        const text = walker.currentNode.textContent.trim();
+        if (!text || walker.currentNode.parentElement.closest('.watermark')) continue;
+        const range = document.createRange();
+        range.selectNodeContents(walker.currentNode);
+        const r = range.getBoundingClientRect();
+        if (r.width && (r.left < box.left + inset || r.top < box.top + inset
+                || r.right > box.right - inset || r.bottom > box.bottom - inset)) {
+            outside.push(text.slice(0, 40));
+        }
+    }
+    return outside;
+})
+"""
+
+# Leaves only card ``i`` displayed, for one-card-per-file PDF export
+SHOW_ONLY_CARD_JS = """
+(i) => document.querySelectorAll('.host').forEach(
+    (host, j) => { host.style.display = i === j ? 'block' : 'none'; })
+"""
+
+# Mounts each card in its own open shadow root so per-template CSS is isolated
+MOUNT_CARDS_JS = """
+(cards) => cards.forEach((card, i) => {
+    const host = document.createElement('div');
+    host.id = `card-${i}`;
+    host.className = 'host';
+    host.attachShadow({mode: 'open'}).innerHTML = `<style>${card.style}</style>${card.body}`;
+    document.body.appendChild(host);
+})
+"""
+
+class CardRenderer:
+    """Long-lived headless Chromium shared by every render in the process.
+
+    Launching Chromium costs far more than rendering a card, so one browser
+    is started lazily and its pages are reused between cards. Idle pages are
+    pooled per viewport size and the pool is bounded by ``max_pages``. If the
+    browser crashes or disconnects it is relaunched on the next render.
+
+    Each render waits for ``document.fonts.ready`` (bounded by
+    ``font_timeout_ms``) rather than a fixed sleep, and appends its per-stage
+    timings in milliseconds, tagged with the output format, to
+    ``self.timings``. Print renders run on pages with a higher device scale
+    factor, pooled separately from the preview pages.
+    """
+
+    def __init__(self, max_pages=4, font_timeout_ms=FONT_TIMEOUT_MS):
+        self.max_pages = max_pages
+        self.font_timeout_ms = font_timeout_ms
+        self.timings = []
+        self._playwright = None
+        self._browser = None
+        self._idle = {}  # (width, height, scale) -> [page, ...]
+
+    def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        self._discard_browser()
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True)
+        return self._browser
+
+    def _discard_browser(self):
+        self._idle = {}
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    def _acquire(self, key):
+        browser = self._ensure_browser()
+        pages = self._idle.get(key)
+        while pages:
+            page = pages.pop()
+            if not page.is_closed():
+                return page
+        width, height, scale = key
+        return browser.new_page(viewport={"width": width, "height": height}, device_scale_factor=scale)
+
+    def _release(self, key, page):
+        pages = self._idle.setdefault(key, [])
+        if sum(len(p) for p in self._idle.values()) < self.max_pages:
+            pages.append(page)
+        else:
+            page.close()
+
+    def _run(self, viewport, work, scale=1):
+        """Call ``work(page)`` on a pooled page, retrying once on a fresh
+        browser if the first attempt died with it."""
+        key = (*viewport, scale)
+        for attempt in range(2):
+            page = None
+            try:
+                page = self._acquire(key)
+                result = work(page)
+                self._release(key, page)
+                return result
+            except Exception:
+                if self._browser is None or self._browser.is_connected() or attempt:
+                    if page is not None and not page.is_closed():
+                        page.close()
+                    raise
+                print("⚠️  Chromium went away — relaunching")
+                self._discard_browser()
+
+    def _wait_for_fonts(self, page, label):
+        # Wait for web fonts and layout to settle, not a fixed delay
+        fonts_loaded = page.evaluate(FONTS_READY_JS, self.font_timeout_ms)
+        if not fonts_loaded:
+            print(f"⚠️  Fonts not ready after {self.font_timeout_ms} ms — rendered anyway: {label}")
+        return fonts_loaded
+
+    def render(self, html_path, png_path, width=700, height=400):
+        """Screenshot the ``.card`` in ``html_path`` to ``png_path``."""
+        def work(page):
+            t0 = time.perf_counter()
             page.goto(f"file://{html_path.resolve()}")
-            # Wait for Google Fonts to load
-            page.wait_for_timeout(1500)
+            t1 = time.perf_counter()
+            fonts_loaded = self._wait_for_fonts(page, png_path.name)
+            t2 = time.perf_counter()
             # Screenshot just the .card element for pixel-perfect output
             card = page.query_selector(".card")
             if card:
                 card.screenshot(path=str(png_path))
             else:
                 page.screenshot(path=str(png_path), clip={"x": 0, "y": 0, "width": width, "height": height})
-            browser.close()
-        print(f"✅ Rendered: {png_path}")
-        return str(png_path)
-    except Exception as e:
-        print(f"⚠️  Playwright render failed: {e}")
-        print(f"📄 HTML saved: {html_path}")
-        print(f"   Install renderer: pip3 install playwright && python3 -m playwright install chromium")
-        return str(html_path)
-
-
-def generate_redesign(card_info, prospect_name, templates=None):
-    """Generate full redesign package for a prospect."""
+            t3 = time.perf_counter()
+            self.timings.append({
+                "goto": (t1 - t0) * 1000,
+                "fonts": (t2 - t1) * 1000,
+                "screenshot": (t3 - t2) * 1000,
+                "fonts_timed_out": not fonts_loaded,
+                "format": "png",
+            })
+
+        self._run((width + 100, height + 100), work)
+
+    @staticmethod
+    def _batch_document(cards, host_css):
+        font_css = list(dict.fromkeys(card[0] for card in cards if card[0]))
+        return (
+            "<!DOCTYPE html><html><head>"
+            + "".join(f"<style>{css}</style>" for css in font_css)
+            + f"<style>body {{ margin: 0; }} {host_css}</style>"
+            + "</head><body></body></html>"
+        )
+
+    def render_batch(self, cards, png_paths, width=700, height=400, omit_background=False):
+        """Screenshot many cards from a single in-memory document.
+
+        ``cards`` is a list of ``(font_css, style, body)`` tuples as returned
+        by ``card_html_parts``. Each card is mounted in its own shadow root so
+        template styles cannot clash, while the @font-face rules live once in
+        the document head. Parsing, font loading and page setup are therefore
+        paid once per batch instead of once per image.
+        """
+        document = self._batch_document(cards, ".host { padding: 50px; }")
+
+        def work(page):
+            t0 = time.perf_counter()
+            page.set_content(document)
+            page.evaluate(MOUNT_CARDS_JS, [{"style": style, "body": body} for _, style, body in cards])
+            t1 = time.perf_counter()
+            fonts_loaded = self._wait_for_fonts(page, f"batch of {len(cards)}")
+            t2 = time.perf_counter()
+            for i, png_path in enumerate(png_paths):
+                t3 = time.perf_counter()
+                page.locator(f"#card-{i}").locator(".card").screenshot(path=str(png_path), omit_background=omit_background)
+                self.timings.append({
+                    "goto": (t1 - t0) * 1000 / len(cards),
+                    "fonts": (t2 - t1) * 1000 / len(cards),
+                    "screenshot": (time.perf_counter() - t3) * 1000,
+                    "fonts_timed_out": not fonts_loaded,
+                    "format": "png",
+                })
+
+        self._run((width + 100, height + 100), work)
+
+    def render_print(self, cards, paths, fmt="png", width=700, height=400):
+        """Print-ready renders of ``cards`` with bleed: 300 DPI PNG or vector PDF.
+
+        Takes the same ``(font_css, style, body)`` parts as ``render_batch``
+        and renders them in one document on this browser. Returns, per card,
+        any text found outside the safe area.
+        """
+        document = self._batch_document(cards, ".host { padding: 0; } @page { margin: 0; }")
+        full_w, full_h = width + 2 * BLEED_PX, height + 2 * BLEED_PX
+
+        def work(page):
+            t0 = time.perf_counter()
+            page.set_content(document)
+            page.evaluate(MOUNT_CARDS_JS, [{"style": style, "body": body} for _, style, body in cards])
+            outside = page.evaluate(APPLY_BLEED_JS, [BLEED_PX, SAFE_PX])
+            t1 = time.perf_counter()
+            fonts_loaded = self._wait_for_fonts(page, f"print batch of {len(cards)}")
+            t2 = time.perf_counter()
+            for i, path in enumerate(paths):
+                t3 = time.perf_counter()
+                if fmt == "pdf":
+                    page.evaluate(SHOW_ONLY_CARD_JS, i)
+                    page.pdf(
+                        path=str(path), scale=PDF_SCALE, print_background=True, page_ranges="1",
+                        width=f"{full_w / CARD_PX_PER_INCH}in", height=f"{full_h / CARD_PX_PER_INCH}in",
+                        margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
+                    )
+                else:
+                    page.locator(f"#card-{i}").locator(".card").screenshot(path=str(path))
+                self.timings.append({
+                    "goto": (t1 - t0) * 1000 / len(cards),
+                    "fonts": (t2 - t1) * 1000 / len(cards),
+                    "screenshot": (time.perf_counter() - t3) * 1000,
+                    "fonts_timed_out": not fonts_loaded,
+                    "format": f"print-{fmt}",
+                })
+            return outside
+
+        scale = PRINT_SCALE if fmt == "png" else 1
+        return self._run((full_w + 100, full_h + 100), work, scale)
+
+    def stage_summary(self):
+        """Average milliseconds per stage over every render so far."""
+        if not self.timings:
+            return {}
+        stages = ("goto", "fonts", "screenshot")
+        return {stage: sum(t[stage] for t in self.timings) / len(self.timings) for stage in stages}
+
+    def close(self):
+        """Shut down the browser and the Playwright driver."""
+        self._discard_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_renderer = None
+
+
+def get_renderer():
+    """Return the process-wide renderer, creating it on first use."""
+    global _renderer
+    if _renderer is None:
+        _renderer = CardRenderer(font_timeout_ms=int(os.environ.get("FONT_TIMEOUT_MS", FONT_TIMEOUT_MS)))
+        atexit.register(_renderer.close)
+    return _renderer
+
+
+# ─── Render cache ────────────────────────────────────────────────────────
+
+# Bump whenever a change to the renderer alters pixels for the same HTML
+RENDERER_VERSION = "1"
+RENDER_CACHE_MB = 500
+
+
+def render_key(html_content, width=700, height=400):
+    """Content address of a render: final HTML + renderer version + viewport."""
+    digest = hashlib.sha256(f"{RENDERER_VERSION}:{width}x{height}:".encode())
+    digest.update(html_content.encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Content-addressed PNG store with LRU eviction by total size.
+
+    Entries are hard-linked into place (copied across filesystems), and a
+    hit refreshes the entry's mtime, which is what eviction orders by.
+    Outputs must be unlinked before being rewritten so a render never
+    writes through a link into the cache.
+    """
+
+    def __init__(self, root=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size = None
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return self.root / f"{key}.png"
+
+    def lookup(self, key):
+        """Path of the cached render for ``key``, or None on a miss."""
+        entry = self._path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, src):
+        """Add a fresh render to the cache, evicting old entries if needed."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self._path(key)
+        tmp = self.root / f".{key}.{os.getpid()}.tmp"
+        _place(src, tmp)
+        os.replace(tmp, entry)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            try:
+                self._size += entry.stat().st_size
+            except FileNotFoundError:  # another worker already evicted it
+                pass
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """``(mtime, size, path)`` of each entry; other workers may evict any of them meanwhile."""
+        entries = []
+        for e in os.scandir(self.root):
+            if not e.name.endswith(".png"):
+                continue
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
+def _place(src, dest):
+    """Hard-link ``src`` to ``dest``, replacing it; copy if linking fails."""
+    dest = Path(dest)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+_render_cache = None
+
+
+def get_render_cache():
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache(max_bytes=int(os.environ.get("RENDER_CACHE_MB", RENDER_CACHE_MB)) * 1024 * 1024)
+    return _render_cache
+
+
+def render_cards(jobs, width=700, height=400, use_cache=True, watermark_mode=None):
+    """Render many cards in one page session.
+
+    ``jobs`` is a list of ``(card_info, template_name, watermark, output_path)``.
+    The standalone HTML for each card is still saved next to its PNG, but the
+    browser renders everything from a single in-memory document. Cards whose
+    HTML was rendered before are served from the render cache instead.
+
+    In ``overlay`` watermark mode only clean cards reach the browser; each
+    preview is the clean render with the PREVIEW overlay composited on top.
+    Returns the PNG path for each job, or the HTML path if rendering failed.
+    """
+    cache = get_render_cache() if use_cache else None
+    overlay = (watermark_mode or get_watermark_mode()) == "overlay"
+    entries = []  # (html path, png path, render key, overlay template or None)
+    pending = {}  # render key -> card parts still to render
+    for card_info, tmpl_name, watermark, output_path in jobs:
+        html_path = output_path.with_suffix('.html')
+        html_content = generate_card_html(card_info, tmpl_name, watermark)
+        with open(html_path, 'w') as f:
+            f.write(html_content)
+        derived = watermark and overlay
+        if derived:
+            html_content = generate_card_html(card_info, tmpl_name, watermark=False)
+        key = render_key(html_content, width, height)
+        entries.append((html_path, output_path.with_suffix('.png'), key, tmpl_name if derived else None))
+        if key not in pending and (cache is None or cache.lookup(key) is None):
+            pending[key] = card_html_parts(card_info, tmpl_name, watermark and not derived)
+    
+    with tempfile.TemporaryDirectory() as staging:
+        rendered = {}
+        if pending:
+            paths = [Path(staging) / f"{key}.png" for key in pending]
+            try:
+                get_renderer().render_batch(list(pending.values()), paths, width, height)
+            except Exception as e:
+                print(f"⚠️  Playwright render failed: {e}")
+                print(f"   Install renderer: pip3 install playwright && python3 -m playwright install chromium")
+            else:
+                rendered = dict(zip(pending, paths))
+            # A cache that can't be written costs later runs a re-render, never this one its cards
+            if cache is not None:
+                try:
+                    for key, path in rendered.items():
+                        cache.put(key, path)
+                except OSError as e:
+                    print(f"⚠️  Render cache not updated: {e}")
+        
+        results = []
+        for html_path, png_path, key, overlay_template in entries:
+            src = rendered.get(key) or (cache.lookup(key) if cache is not None else None)
+            try:
+                if src is None:
+                    raise RuntimeError("no render available")
+                if overlay_template:
+                    composite_watermark(src, png_path, overlay_template, width, height)
+                else:
+                    _place(src, png_path)
+            except Exception as e:
+                if src is not None:
+                    print(f"⚠️  Watermark overlay failed: {e}")
+                print(f"📄 HTML saved: {html_path}")
+                results.append(str(html_path))
+                continue
+            print(f"{'✅ Rendered' if key in rendered else '♻️  Cached'}: {png_path}")
+            results.append(str(png_path))
+    return results
+
+
+def _stamp_dpi(png_path, dpi=PRINT_DPI):
+    """Tag a PNG with its print resolution (pHYs) so print shops size it right."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    with Image.open(png_path) as image:
+        image.load()
+    image.save(png_path, dpi=(dpi, dpi))
+
+
+def render_print_files(jobs, formats=PRINT_FORMATS, width=700, height=400):
+    """Print-ready exports with bleed for clean cards.
+
+    ``jobs`` is a list of ``(card_info, template_name, base_path)``; each
+    format is written next to ``base_path`` with a ``_print.png`` or
+    ``_print.pdf`` suffix. All cards of a format render in one batch on the
+    shared browser. Returns ``{format: [path or None, ...]}``.
+    """
+    cards = [card_html_parts(card_info, tmpl_name, watermark=False) for card_info, tmpl_name, _ in jobs]
+    results = {}
+    for fmt in formats:
+        paths = [Path(f"{base_path}_print.{fmt}") for _, _, base_path in jobs]
+        try:
+            outside = get_renderer().render_print(cards, paths, fmt, width, height)
+        except Exception as e:
+            print(f"⚠️  Print export ({fmt}) failed: {e}")
+            results[fmt] = [None] * len(jobs)
+            continue
+        for path, (_, tmpl_name, _), unsafe in zip(paths, jobs, outside):
+            if fmt == "png":
+                _stamp_dpi(path)
+            if unsafe:
+                print(f"⚠️  {tmpl_name}: text inside the 1/8\" safe margin: {', '.join(unsafe)}")
+            print(f"🖨️  Print {fmt.upper()}: {path}")
+        results[fmt] = paths
+    return results
+
+
+# ─── Watermark overlay ───────────────────────────────────────────────────
+
+def get_watermark_mode():
+    """``overlay`` (composite in Python) when Pillow is available, else ``browser``."""
+    mode = os.environ.get("WATERMARK_MODE")
+    if mode:
+        return mode
+    try:
+        import PIL  # noqa: F401
+        return "overlay"
+    except ImportError:
+        return "browser"
+
+
+def watermark_overlay_parts(template_name, width=700, height=400):
+    """Card parts for a transparent card holding nothing but the watermark."""
+    family = TEMPLATE_FONTS.get(template_name, ("sans-serif",))[0]
+    style = (
+        "* { margin: 0; padding: 0; box-sizing: border-box; }\n"
+        f".card {{ width: {width}px; height: {height}px; position: relative; overflow: hidden;"
+        f" font-family: '{family}', sans-serif; }}\n"
+        + WATERMARK_CSS
+    )
+    return (template_font_css(template_name), style, f'<div class="card">{WATERMARK_HTML}</div>')
+
+
+@lru_cache(maxsize=None)
+def watermark_overlay(template_name, width=700, height=400):
+    """Pre-rendered RGBA PREVIEW overlay for a template's font and card size.
+
+    Rendered once in the browser with a transparent background, then kept
+    in the render cache and in memory for every later preview.
+    """
+    from PIL import Image
+    parts = watermark_overlay_parts(template_name, width, height)
+    cache = get_render_cache()
+    key = render_key("overlay:" + "".join(parts), width, height)
+    path = cache.lookup(key)
+    if path is None:
+        with tempfile.TemporaryDirectory() as staging:
+            staged = Path(staging) / "overlay.png"
+            get_renderer().render_batch([parts], [staged], width, height, omit_background=True)
+            cache.put(key, staged)
+        path = cache.lookup(key)
+    with Image.open(path) as overlay:
+        return overlay.convert("RGBA")
+
+
+def composite_watermark(card_png, output_path, template_name, width=700, height=400):
+    """Write ``card_png`` with the PREVIEW overlay alpha-blended on top."""
+    from PIL import Image
+    overlay = watermark_overlay(template_name, width, height)
+    with Image.open(card_png) as card:
+        card = card.convert("RGBA")
+    if card.size != overlay.size:
+        overlay = overlay.resize(card.size, Image.LANCZOS)
+    output_path = Path(output_path)
+    output_path.unlink(missing_ok=True)
+    Image.alpha_composite(card, overlay).convert("RGB").save(output_path)
+
+
+def verify_watermark_overlay(threshold=2.0):
+    """Pixel-diff composited previews against browser-rendered watermarks.
+
+    Returns True when every template's mean absolute channel difference is
+    at or below ``threshold`` (0-255 scale).
+    """
+    from PIL import Image, ImageChops, ImageStat
+    card_info = {"business_name": "Overlay Check Plumbing", "trade": "plumbing", "phone": "(615) 555-1234"}
+    ok = True
+    print("\n🔍 Watermark overlay vs browser render")
+    with tempfile.TemporaryDirectory() as tmp:
+        for tmpl_name in CARD_TEMPLATES:
+            browser_png = Path(tmp) / f"{tmpl_name}_browser.png"
+            overlay_png = Path(tmp) / f"{tmpl_name}_overlay.png"
+            render_cards([(card_info, tmpl_name, True, browser_png)], use_cache=False, watermark_mode="browser")
+            render_cards([(card_info, tmpl_name, True, overlay_png)], use_cache=False, watermark_mode="overlay")
+            with Image.open(browser_png) as a, Image.open(overlay_png) as b:
+                diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+            mean = sum(ImageStat.Stat(diff).mean) / 3
+            worst = max(high for _, high in diff.getextrema())
+            passed = mean <= threshold
+            ok = ok and passed
+            print(f"  {'✅' if passed else '❌'} {tmpl_name:<20} mean {mean:5.2f}  max {worst:3d}")
+    return ok
+
+
+def _render_cold(html_path, png_path, width=700, height=400):
+    """Original one-browser-per-card render, kept as the benchmark baseline."""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page(viewport={"width": width + 100, "height": height + 100})
+        page.goto(f"file://{html_path.resolve()}")
+        page.wait_for_timeout(1500)
+        page.query_selector(".card").screenshot(path=str(png_path))
+        browser.close()
+
+
+def benchmark_render(cards=6):
+    """Compare per-card latency of cold launches against the shared renderer."""
+    card_info = {"business_name": "Benchmark Plumbing", "trade": "plumbing"}
+    templates = list(CARD_TEMPLATES)
+    renderer = get_renderer()
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = []
+        for i in range(cards):
+            tmpl_name, watermark = templates[i % len(templates)], i % 2 == 0
+            html_path = Path(tmp) / f"bench_{i}.html"
+            html_path.write_text(generate_card_html(card_info, tmpl_name, watermark))
+            jobs.append((html_path, html_path.with_suffix('.png'), card_html_parts(card_info, tmpl_name, watermark)))
+        
+        def one_by_one(render):
+            return lambda: [render(html_path, png_path) for html_path, png_path, _ in jobs]
+        
+        modes = (
+            ("cold launch", one_by_one(_render_cold)),
+            ("shared pool", one_by_one(renderer.render)),
+            ("one batch", lambda: renderer.render_batch([j[2] for j in jobs], [j[1] for j in jobs])),
+        )
+        results, stages = {}, {}
+        for label, run in modes:
+            renderer.timings = []
+            start = time.perf_counter()
+            run()
+            results[label] = (time.perf_counter() - start) / cards * 1000
+            stages[label] = renderer.stage_summary()
+    
+    print(f"\n⏱️  Render benchmark ({cards} cards)")
+    for label, ms in results.items():
+        print(f"  {label:<12} {ms:8.1f} ms/card  ({results['cold launch'] / ms:.1f}x)")
+        for stage, stage_ms in stages[label].items():
+            print(f"    {stage:<10} {stage_ms:8.1f} ms")
+    return results
+
+
+# generate_redesign result key -> asset manifest kind
+ASSET_KINDS = ("preview", "final", "print_png", "print_pdf")
+
+
+def asset_info(path):
+    """Pixel size and sha256 of a rendered file (no size for HTML fallbacks)."""
+    data = Path(path).read_bytes()
+    width = height = None
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        width, height = struct.unpack(">II", data[16:24])
+    return {"width": width, "height": height, "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def generate_redesign(card_info, prospect_name, templates=None, use_cache=True, watermark_mode=None,
+                      prospect_id=None, print_formats=()):
+    """Generate full redesign package for a prospect.
+
+    Besides the preview and final PNGs, each template gets print-ready
+    exports in ``print_formats`` (300 DPI PNG and/or PDF, with bleed),
+    if any; they are worth the browser time once a prospect has paid. With
+    a ``prospect_id`` the outputs are recorded in the asset manifest,
+    replacing that prospect's earlier renders of the same templates. HTML
+    fallbacks (the browser failed) are not recorded, so they never
+    displace an earlier good render.
+    """
+    import prospect_db
     if templates is None:
         templates = ["clean_professional", "dark_bold", "trade_badge"]
     
-    safe_name = prospect_name.lower().replace(' ', '_')
+    safe_name = prospect_db.safe_name(prospect_name)
     timestamp = datetime.now().strftime("%Y%m%d")
-    results = []
     
+    jobs = []
     for tmpl_name in templates:
         # Watermarked preview
-        html_wm = generate_card_html(card_info, tmpl_name, watermark=True)
-        wm_path = WATERMARK_DIR / f"{safe_name}_{tmpl_name}_{timestamp}_preview.png"
-        wm_result = render_card_to_image(html_wm, wm_path)
-        
+        jobs.append((card_info, tmpl_name, True, WATERMARK_DIR / f"{safe_name}_{tmpl_name}_{timestamp}_preview.png"))
         # Clean version (for delivery after payment)
-        html_clean = generate_card_html(card_info, tmpl_name, watermark=False)
-        clean_path = OUTPUT_DIR / f"{safe_name}_{tmpl_name}_{timestamp}_final.png"
-        clean_result = render_card_to_image(html_clean, clean_path)
-        
+        jobs.append((card_info, tmpl_name, False, OUTPUT_DIR / f"{safe_name}_{tmpl_name}_{timestamp}_final.png"))
+    rendered = render_cards(jobs, use_cache=use_cache, watermark_mode=watermark_mode)
+    
+    results = []
+    for i, tmpl_name in enumerate(templates):
         results.append({
             "template": tmpl_name,
-            "preview": wm_result,
-            "final": clean_result
+            "preview": rendered[2 * i],
+            "final": rendered[2 * i + 1]
         })
     
+    if print_formats:
+        exports = render_print_files(
+            [(card_info, tmpl_name, OUTPUT_DIR / f"{safe_name}_{tmpl_name}_{timestamp}") for tmpl_name in templates],
+            print_formats,
+        )
+        for fmt, paths in exports.items():
+            for result, path in zip(results, paths):
+                if path is not None:
+                    result[f"print_{fmt}"] = str(path)
+    
+    if prospect_id is not None:
+        prospect_db.record_assets(prospect_id, [
+            {"template": r["template"], "kind": kind, "path": r[kind], **asset_info(r[kind])}
+            for r in results for kind in ASSET_KINDS if kind in r and not r[kind].endswith(".html")
+        ])
+    
     print(f"\n✅ Generated {len(results)} redesign variants for {prospect_name}")
     return results
 
 
+def prospect_card_info(prospect):
+    """Card fields for a prospect record, as run-daily.sh fills them in."""
+    return {
+        "business_name": prospect["name"],
+        "trade": prospect["trade"],
+        "trade_description": prospect["trade"].title(),
+        "phone": prospect.get("phone") or "(615) 555-0000",
+        "email": "",
+        "location": "Tennessee",
+        "license_text": "Licensed & Insured",
+    }
+
+
+def _init_batch_worker():
+    # Pool workers exit without running atexit hooks; multiprocessing
+    # finalizers do run, so close the worker's browser from one.
+    from multiprocessing.util import Finalize
+    Finalize(None, get_renderer().close, exitpriority=10)
+
+
+def _generate_for_prospect(prospect, use_cache=True, print_formats=()):
+    renderer = get_renderer()
+    seen = len(renderer.timings)
+    results = generate_redesign(
+        prospect_card_info(prospect), prospect["name"], use_cache=use_cache, prospect_id=prospect["id"],
+        print_formats=print_formats,
+    )
+    return prospect, results, renderer.timings[seen:]
+
+
+def print_format_costs(timings):
+    """One line of average render cost per output format."""
+    costs = {}
+    for t in timings:
+        costs.setdefault(t.get("format", "png"), []).append(t["goto"] + t["fonts"] + t["screenshot"])
+    if costs:
+        print("⏱️  Avg per output: " + ", ".join(
+            f"{fmt} {sum(ms) / len(ms):.0f} ms (×{len(ms)})" for fmt, ms in costs.items()
+        ))
+
+
+def generate_batch(status="new", found_date=None, workers=4, use_cache=True, print_formats=()):
+    """Render redesigns for many prospects concurrently.
+
+    Each worker process keeps its own long-lived Chromium, so throughput
+    scales with ``workers`` until CPU or memory runs out. A prospect whose
+    render raises is reported and skipped; the rest of the batch goes on.
+    """
+    import prospect_db
+    prospects = list(prospect_db.iter_prospects(status=status, found_date=found_date))
+    if not prospects:
+        print("No matching prospects.")
+        return []
+    
+    print(f"\n🎨 Generating {len(prospects)} prospects with {workers} worker(s)...")
+    start = time.perf_counter()
+    done, failed, timings = [], [], []
+    pool = None
+    
+    def outcomes():
+        # (prospect, result or the exception it raised): one bad prospect
+        # is reported and the rest of the batch carries on
+        if pool is None:
+            for p in prospects:
+                try:
+                    yield p, _generate_for_prospect(p, use_cache, print_formats)
+                except Exception as e:
+                    yield p, e
+            return
+        futures = {pool.submit(_generate_for_prospect, p, use_cache, print_formats): p for p in prospects}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+    
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker)
+    try:
+        for prospect, outcome in outcomes():
+            position = f"[{len(done) + len(failed) + 1}/{len(prospects)}] #{prospect['id']} {prospect['name']}"
+            if isinstance(outcome, Exception):
+                failed.append((prospect, outcome))
+                print(f"  {position} ❌ {outcome}")
+                continue
+            _, results, prospect_timings = outcome
+            done.append((prospect, results))
+            timings += prospect_timings
+            print(f"  {position}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    elapsed = time.perf_counter() - start
+    cards = sum(
+        path.endswith(".png")
+        for _, results in done for r in results for path in (r["preview"], r["final"])
+    )
+    print(f"\n✅ {len(done)} prospects, {cards} cards in {elapsed:.1f}s — {cards / elapsed:.2f} cards/s")
+    if failed:
+        print(f"❌ {len(failed)} prospect(s) failed: " + ", ".join(f"#{p['id']}" for p, _ in failed))
+    print_format_costs(timings)
+    return done
+
+
 def extract_info_prompt(screenshot_path):
     """Generate the prompt for AI vision extraction of business card info."""
-    return f"""Analyze this business card image and extract the following information.
-Return it as a JSON object:
+    import screenshot_ingest
+    return screenshot_ingest.extraction_prompt(screenshot_path)
 
-{{
-    "business_name": "The business or person's name",
-    "trade": "Their trade/service (e.g., plumber, electrician)",
-    "trade_description": "Full description of services",
-    "phone": "Phone number",
-    "email": "Email if visible",
-    "location": "City/area",
-    "license_text": "License number or 'Licensed & Insured'",
-    "quality_issues": ["list", "of", "design", "problems"],
-    "score": 3
-}}
 
-Be specific about quality issues (bad fonts, too many colors, pixelated logo, etc.)
-Image: {screenshot_path}"""
+def watch_screenshots(directory=None, backend=None, concurrency=None, group_source=None, once=False,
+                      poll_s=None, use_cache=True, print_formats=()):
+    """Ingest screenshots as they land: extract, add the prospect, render its redesigns."""
+    import screenshot_ingest
+    try:
+        extractor = screenshot_ingest.get_extractor(backend)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    def render(prospect, card_info):
+        generate_redesign(card_info, prospect["name"], use_cache=use_cache, prospect_id=prospect["id"],
+                          print_formats=print_formats)
+    
+    ingester = screenshot_ingest.Ingester(
+        extractor, render,
+        directory=directory or screenshot_ingest.SCREENSHOTS_DIR,
+        concurrency=concurrency or screenshot_ingest.EXTRACT_CONCURRENCY,
+        group_source=group_source,
+    )
+    counts = ingester.run(once=once, poll_s=poll_s or screenshot_ingest.POLL_S)
+    print_format_costs(get_renderer().timings)
+    return counts
 
 
 # ─── CLI ─────────────────────────────────────────────────────────────────
 
+def _print_formats(value):
+    import argparse
+    formats = () if value == "none" else tuple(f.strip() for f in value.split(",") if f.strip())
+    unknown = set(formats) - set(PRINT_FORMATS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown print format(s): {', '.join(sorted(unknown))}")
+    return formats
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="AI Business Card Redesign Pipeline")
@@ -409,16 +1409,63 @@ def main():
     gen.add_argument("--license", default="Licensed & Insured")
     gen.add_argument("--template", default="all", help="Template name or 'all'")
     gen.add_argument("--prospect", help="Prospect name (for file naming)")
+    gen.add_argument("--prospect-id", type=int, help="Record the renders in this prospect's asset manifest")
+    
+    # Generate for many prospects
+    batch = subparsers.add_parser("generate-batch", help="Generate redesigns for many prospects in parallel")
+    batch.add_argument("--status", default="new", help="Only prospects with this status ('all' for any)")
+    batch.add_argument("--date", help="Only prospects found on this date (YYYY-MM-DD)")
+    batch.add_argument("--workers", type=int, default=4, help="Parallel render processes")
     
     # Extract prompt
     ext = subparsers.add_parser("extract", help="Get AI extraction prompt for a screenshot")
     ext.add_argument("screenshot", help="Path to screenshot")
     
+    # Watch the screenshot inbox
+    watch = subparsers.add_parser("watch", help="Ingest screenshots as they land: AI extract → prospect → redesigns")
+    watch.add_argument("--dir", help="Folder to watch (default assets/screenshots/)")
+    watch.add_argument("--backend", help="Extraction backend: 'stub' or 'command:<cmd>' (default $EXTRACT_BACKEND)")
+    watch.add_argument("--concurrency", type=int, help="Extractions in flight at once (default $EXTRACT_CONCURRENCY or 4)")
+    watch.add_argument("--group", help="Source group for the new prospects")
+    watch.add_argument("--poll", type=float, help="Rescan interval in seconds when watchdog isn't installed")
+    watch.add_argument("--once", action="store_true", help="Ingest what is in the folder now, then exit")
+    
+    # Benchmark the screenshot dedup index
+    pb = subparsers.add_parser("phash-bench", help="Benchmark perceptual-hash duplicate lookup")
+    pb.add_argument("--images", type=int, default=100_000, help="Synthetic images to index")
+    pb.add_argument("--queries", type=int, default=10_000, help="Lookups to time")
+    
     # List templates
     subparsers.add_parser("templates", help="List available templates")
     
+    # Check overlay watermark against the browser-rendered one
+    vw = subparsers.add_parser("verify-watermark", help="Pixel-diff overlay previews against browser watermarks")
+    vw.add_argument("--threshold", type=float, default=2.0, help="Max mean channel difference (0-255)")
+    
+    # Vendor fonts
+    fonts = subparsers.add_parser("fonts", help="Download template fonts for offline rendering")
+    fonts.add_argument("--refresh", action="store_true", help="Re-download files already present")
+    
+    # Benchmark renderer
+    bench = subparsers.add_parser("bench", help="Benchmark per-card render latency")
+    bench.add_argument("--cards", type=int, default=6, help="Cards to render per mode")
+    
+    for sub in (gen, batch, watch, bench):
+        sub.add_argument("--font-timeout", type=int, help=f"Max ms to wait for web fonts (default {FONT_TIMEOUT_MS})")
+    for sub in (gen, batch, watch):
+        sub.add_argument("--no-cache", action="store_true", help="Re-render even if an identical card is cached")
+        sub.add_argument("--watermark-mode", choices=["overlay", "browser"],
+                         help="Composite the PREVIEW overlay in Python, or render it in the browser")
+        sub.add_argument("--print", dest="print_formats", type=_print_formats, default=(),
+                         help="Print-ready exports: comma-separated png,pdf or 'none' (default none)")
+    
     args = parser.parse_args()
     
+    if getattr(args, "font_timeout", None) is not None:
+        os.environ["FONT_TIMEOUT_MS"] = str(args.font_timeout)  # read by every renderer, batch workers' too
+    if getattr(args, "watermark_mode", None):
+        os.environ["WATERMARK_MODE"] = args.watermark_mode  # inherited by batch workers
+    
     if args.command == "generate":
         card_info = {
             "business_name": args.name,
@@ -431,16 +1478,43 @@ def main():
         }
         prospect = args.prospect or args.name
         templates = None if args.template == "all" else [args.template]
-        generate_redesign(card_info, prospect, templates)
+        generate_redesign(card_info, prospect, templates, use_cache=not args.no_cache, prospect_id=args.prospect_id,
+                          print_formats=args.print_formats)
+        stages = get_renderer().stage_summary()
+        if stages:
+            print("⏱️  Avg per card: " + ", ".join(f"{k} {v:.0f} ms" for k, v in stages.items()))
+        print_format_costs(get_renderer().timings)
+    
+    elif args.command == "generate-batch":
+        status = None if args.status == "all" else args.status
+        generate_batch(status=status, found_date=args.date, workers=args.workers, use_cache=not args.no_cache,
+                       print_formats=args.print_formats)
     
     elif args.command == "extract":
         print(extract_info_prompt(args.screenshot))
     
+    elif args.command == "watch":
+        watch_screenshots(args.dir, args.backend, args.concurrency, args.group, once=args.once, poll_s=args.poll,
+                          use_cache=not args.no_cache, print_formats=args.print_formats)
+    
+    elif args.command == "phash-bench":
+        import phash_index
+        phash_index.benchmark(args.images, args.queries)
+    
     elif args.command == "templates":
         print("Available templates:")
-        for name in CARD_TEMPLATES:
+        for name in TEMPLATES.names():
             print(f"  • {name}")
     
+    elif args.command == "verify-watermark":
+        sys.exit(0 if verify_watermark_overlay(args.threshold) else 1)
+    
+    elif args.command == "fonts":
+        fetch_fonts(refresh=args.refresh)
+    
+    elif args.command == "bench":
+        benchmark_render(args.cards)
+    
     else:
         parser.print_help()
 
@@ -22,6 +22,7 @@ echo ""
 echo "⏸️  Browse the groups above. When you find a bad business card:"
 echo "   1. Screenshot it (Cmd+Shift+4)"
 echo "   2. Save to: $PROJECT_DIR/assets/screenshots/"
+echo "   (Or keep 'redesign-pipeline.py watch' running to add and render them automatically)"
 echo ""
 read -p "Press Enter when done browsing (or 'skip' to skip)... " response
 
@@ -47,22 +48,17 @@ if [ "$response" != "skip" ]; then
             --group "$group" \
             --score "$score" \
             --notes "$notes"
-        
-        # Auto-generate redesign
-        echo ""
-        echo "🎨 Generating redesigns..."
-        safe_name=$(echo "$biz_name" | tr '[:upper:]' '[:lower:]' | tr ' ' '_' | tr -cd 'a-z0-9_')
-        python3 "$SCRIPT_DIR/redesign-pipeline.py" generate \
-            --name "$biz_name" \
-            --trade "$trade" \
-            --phone "$phone" \
-            --location "Tennessee" \
-            --prospect "$safe_name"
-        
-        echo ""
-        echo "📤 Preview files ready in: $PROJECT_DIR/assets/watermarked/"
-        echo "   Open the HTML files in your browser to see designs."
     done
+    
+    # Auto-generate redesigns for everything added today, in parallel
+    echo ""
+    echo "🎨 Generating redesigns..."
+    python3 "$SCRIPT_DIR/redesign-pipeline.py" generate-batch \
+        --date "$(date '+%Y-%m-%d')"
+    
+    echo ""
+    echo "📤 Preview files ready in: $PROJECT_DIR/assets/watermarked/"
+    echo "   Open the HTML files in your browser to see designs."
 fi
 
 # Step 3: Daily report
@@ -83,6 +79,12 @@ echo "   1. Open the watermarked preview for the prospect"
 echo "   2. Copy Template A from: templates/dm-messages.md"
 echo "   3. Fill in the variables and send via Facebook Messenger"
 echo "   4. Update status: python3 fb-group-monitor.py update <ID> contacted"
+
+# Step 5: Follow-ups due (48h, 1 week, post-purchase)
+echo ""
+echo "📬 STEP 5: Follow-Ups Due"
+echo "-----------------------------------"
+python3 "$SCRIPT_DIR/fb-group-monitor.py" due
 echo ""
 echo "=================================================="
 echo "✅ Daily run complete!"
@@ -0,0 +1,493 @@
+"""
+Screenshot Ingestion
+====================
+Turns business-card screenshots dropped into assets/screenshots/ into
+prospects with rendered previews, without anyone typing the fields in.
+
+The inbox is watched with watchdog (inotify on Linux, FSEvents on macOS)
+when it is installed, and by rescanning the folder every POLL_S seconds
+when it isn't. Either way a file is only queued once its size has stopped
+changing for SETTLE_S seconds, so half-written screenshots are never read.
+Hidden files (macOS writes ".Screenshot ..." first, then renames) and
+non-images are ignored.
+
+Queued screenshots go through an extraction backend on a thread pool of
+`concurrency` workers; the backends are I/O-bound (a model API call or a
+subprocess), so threads are enough. A backend takes the prompt below and
+an image path and returns the model's reply; the reply is parsed as the
+JSON object the prompt asks for. Two backends ship:
+
+  stub             deterministic fields derived from the file name and
+                   bytes, for testing the pipeline offline
+  command:<cmd>    runs <cmd> with the prompt on stdin and the image path
+                   substituted for {image} (appended if absent), e.g.
+                   "command:llm -m gpt-4o -a {image}"
+
+With NumPy installed the card score is the local rubric from card_score
+(computed in the extraction thread, from the image and the extracted card
+text) rather than the model's guess, so every card is scored the same way.
+
+Before a screenshot is queued it is checked against everything already
+ingested: byte-identical files by sha256, and reposts of the same card
+(rescaled, recompressed, screenshotted from another group) by perceptual
+hash through phash_index. Either way it is recorded as a duplicate without
+paying for extraction or rendering.
+
+Results come back to the calling thread, which adds the prospect (skipping
+duplicates of existing ones) and renders it through the `render` callback,
+since the renderer's browser is not shared between threads. Every file is
+written to the screenshot ledger in prospects.db, hashes included, so a
+restarted watcher skips what it has already ingested.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import phash_index
+import prospect_db
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCREENSHOTS_DIR = PROJECT_ROOT / "assets" / "screenshots"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+SETTLE_S = 1.0
+POLL_S = 2.0
+EXTRACT_CONCURRENCY = int(os.environ.get("EXTRACT_CONCURRENCY", 4))
+EXTRACT_TIMEOUT_S = 120
+
+EXTRACT_PROMPT = """Analyze this business card image and extract the following information.
+Return it as a JSON object:
+
+{{
+    "business_name": "The business or person's name",
+    "trade": "Their trade/service (e.g., plumber, electrician)",
+    "trade_description": "Full description of services",
+    "phone": "Phone number",
+    "email": "Email if visible",
+    "location": "City/area",
+    "license_text": "License number or 'Licensed & Insured'",
+    "quality_issues": ["list", "of", "design", "problems"],
+    "score": 3,
+    "card_text": "All text on the card, verbatim (same capitalization), one line per line"
+}}
+
+Be specific about quality issues (bad fonts, too many colors, pixelated logo, etc.)
+Image: {path}"""
+
+
+def extraction_prompt(screenshot_path):
+    """The prompt for AI vision extraction of business card info."""
+    return EXTRACT_PROMPT.format(path=screenshot_path)
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────
+
+TEXT_FIELDS = ("business_name", "trade", "trade_description", "phone", "email", "location", "license_text",
+               "card_text")
+
+
+def _text(value):
+    # Models answer "phone": 6155550100 or "email": null as often as with strings
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return ""
+
+
+def parse_extraction(text):
+    """The card fields from a model reply, or ValueError if it has none.
+
+    Tolerates the prose and ```json fences models wrap JSON in. Text fields
+    come back as strings ("" when missing or not text); business_name and
+    trade must be non-empty. The score is clamped to 1-10.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in extraction output")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ValueError(f"bad JSON in extraction output: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError("extraction output is not a JSON object")
+    fields = dict(data)
+    fields.update((k, _text(data.get(k))) for k in TEXT_FIELDS)
+    for required in ("business_name", "trade"):
+        if not fields[required]:
+            raise ValueError(f"extraction output has no {required}")
+    try:
+        fields["score"] = min(10, max(1, int(fields.get("score") or 3)))
+    except (TypeError, ValueError):
+        fields["score"] = 3
+    issues = fields.get("quality_issues") or []
+    if isinstance(issues, str):
+        issues = [issues]
+    fields["quality_issues"] = [str(i) for i in issues] if isinstance(issues, list) else []
+    if not fields["card_text"]:
+        fields["card_text"] = "\n".join(
+            fields[k] for k in ("business_name", "trade_description", "phone", "email", "license_text") if fields[k]
+        )
+    return fields
+
+
+# ─── Extraction backends ─────────────────────────────────────────────────
+
+class StubExtractor:
+    """Deterministic offline stand-in for a vision model.
+
+    The business name comes from the file name (as capture_screenshot
+    writes it, minus the timestamp), the trade from the first trade word
+    in it, the phone from the name (re-shots of one card agree on it), and
+    score and issues from the file's sha256, so the same file always
+    extracts the same way.
+    """
+
+    name = "stub"
+    TRADES = ("plumb", "electric", "hvac", "roof", "paint", "landscap", "handyman", "concrete",
+              "fenc", "floor", "pressure", "clean", "pest", "pool", "tree", "carpent")
+    ISSUES = ("too many fonts", "low-contrast text", "clip-art logo", "crowded layout",
+              "pixelated photo", "clashing colors", "tiny phone number")
+
+    def __call__(self, prompt, image_path):
+        digest = hashlib.sha256(Path(image_path).read_bytes()).digest()
+        stem = re.sub(r"_\d{8}_\d{6}$", "", Path(image_path).stem)
+        words = [w for w in re.split(r"[\s_-]+", stem) if w]
+        name = " ".join(w.capitalize() for w in words) or "Unknown Business"
+        trade = next((w.lower() for w in words if w.lower().startswith(self.TRADES)), "handyman")
+        name_digest = hashlib.sha256(name.lower().encode()).digest()
+        phone = f"(615) 555-{int.from_bytes(name_digest[:2], 'big') % 10000:04d}"
+        return json.dumps({
+            "business_name": name,
+            "trade": trade,
+            "trade_description": trade.title(),
+            "phone": phone,
+            "email": "",
+            "location": "Nashville, TN",
+            "license_text": "Licensed & Insured",
+            "quality_issues": [self.ISSUES[digest[2] % len(self.ISSUES)], self.ISSUES[digest[3] % len(self.ISSUES)]],
+            "score": 1 + digest[4] % 5,
+            "card_text": f"{name.upper() if digest[5] % 2 else name}\n{trade.title()}\n{phone}\nLicensed & Insured",
+        })
+
+
+class CommandExtractor:
+    """Runs an external command per screenshot: prompt on stdin, reply on stdout."""
+
+    def __init__(self, command, timeout=EXTRACT_TIMEOUT_S):
+        self.command = command
+        self.timeout = timeout
+        self.name = f"command:{command}"
+
+    def __call__(self, prompt, image_path):
+        args = shlex.split(self.command)
+        if any("{image}" in a for a in args):
+            args = [a.replace("{image}", str(image_path)) for a in args]
+        else:
+            args.append(str(image_path))
+        proc = subprocess.run(args, input=prompt, capture_output=True, text=True, timeout=self.timeout)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{args[0]} exited {proc.returncode}: {proc.stderr.strip()[-300:]}")
+        return proc.stdout
+
+
+def get_extractor(spec=None):
+    """The backend named by ``spec`` (or $EXTRACT_BACKEND): 'stub' or 'command:<cmd>'."""
+    spec = spec or os.environ.get("EXTRACT_BACKEND")
+    if not spec:
+        raise ValueError("No extraction backend: pass --backend or set EXTRACT_BACKEND ('stub' or 'command:<cmd>')")
+    if spec == "stub":
+        return StubExtractor()
+    if spec.startswith("command:") and spec[len("command:"):].strip():
+        return CommandExtractor(spec[len("command:"):].strip())
+    raise ValueError(f"Unknown extraction backend {spec!r} (use 'stub' or 'command:<cmd>')")
+
+
+# ─── Inbox ───────────────────────────────────────────────────────────────
+
+class Inbox:
+    """Screenshot files noticed in a folder, released once they stop growing."""
+
+    def __init__(self, directory=SCREENSHOTS_DIR, settle_s=SETTLE_S):
+        self.directory = Path(directory)
+        self.settle_s = settle_s
+        self._lock = threading.Lock()
+        self._pending = {}  # path -> [first seen, size, size unchanged since]
+        self._taken = set()
+
+    def notice(self, path):
+        path = Path(path)
+        if path.name.startswith(".") or path.suffix.lower() not in IMAGE_SUFFIXES:
+            return
+        with self._lock:
+            if path not in self._taken and path not in self._pending:
+                self._pending[path] = [time.time(), -1, time.monotonic()]
+
+    def scan(self):
+        for path in self.directory.iterdir():
+            if path.is_file():
+                self.notice(path)
+
+    def ready(self):
+        """``(path, first seen)`` for every file whose size has held for settle_s."""
+        now = time.monotonic()
+        settled = []
+        with self._lock:
+            for path, state in list(self._pending.items()):
+                try:
+                    size = path.stat().st_size
+                except FileNotFoundError:  # renamed or deleted before it settled
+                    del self._pending[path]
+                    continue
+                if size != state[1]:
+                    state[1], state[2] = size, now
+                elif size > 0 and now - state[2] >= self.settle_s:
+                    settled.append((path, state[0]))
+                    del self._pending[path]
+                    self._taken.add(path)
+        return settled
+
+    def idle(self):
+        with self._lock:
+            return not self._pending
+
+
+def start_watching(inbox):
+    """A watchdog observer feeding ``inbox``, or None if watchdog isn't installed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_created(self, event):
+            if not event.is_directory:
+                inbox.notice(event.src_path)
+
+        on_modified = on_created
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                inbox.notice(event.dest_path)
+
+    observer = Observer()
+    observer.schedule(Handler(), str(inbox.directory), recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+# ─── Pipeline ────────────────────────────────────────────────────────────
+
+def load_phash_index():
+    """A PHashIndex of every screenshot in the ledger, or None without Pillow."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("⚠️  Pillow not installed — reposted cards won't be caught before extraction (pip install Pillow)")
+        return None
+    index = phash_index.PHashIndex()
+    for path, prospect_id, dhash, ahash in prospect_db.iter_screenshot_hashes():
+        index.add(dhash, ahash, (path, prospect_id))
+    return index
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Ingester:
+    """Watch → extract (concurrently) → add prospect → render, with timings.
+
+    ``render(prospect, card_info)`` renders one prospect's previews; it is
+    always called from the thread running `run`.
+    """
+
+    def __init__(self, extractor, render, directory=SCREENSHOTS_DIR, concurrency=EXTRACT_CONCURRENCY,
+                 group_source=None, settle_s=SETTLE_S):
+        self.extractor = extractor
+        self.render = render
+        self.inbox = Inbox(directory, settle_s)
+        self.concurrency = concurrency
+        self.group_source = group_source
+        self.turnarounds = []  # {"total", "wait", "extract", "render"} seconds per preview
+        self.counts = {"prospect": 0, "duplicate": 0, "reposted": 0, "failed": 0, "skipped": 0}
+        self._queued = set()  # sha256 of files queued this run
+        self.index = load_phash_index()
+        try:
+            import card_score
+            self.scorer = card_score
+        except ImportError:
+            print("⚠️  NumPy not installed — using the model's card score (pip install numpy)")
+            self.scorer = None
+
+    def _queue(self, path, seen_at):
+        """The job for a settled screenshot, or None if it's one already ingested or failed."""
+        job = {"path": path, "sha256": "", "seen_at": seen_at, "dhash": None, "ahash": None, "pos": None}
+        try:
+            return self._check(job)
+        except Exception as e:
+            self._fail(job, e)
+            return None
+
+    def _check(self, job):
+        path = job["path"]
+        job["sha256"] = sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+        if sha256 in self._queued or prospect_db.screenshot_known(path, sha256):
+            self.counts["skipped"] += 1
+            return None
+        self._queued.add(sha256)
+        if self.index is None:
+            return job
+        try:
+            job["dhash"], job["ahash"] = phash_index.image_hashes(path)
+        except OSError as e:  # not an image Pillow can read; let extraction have a go
+            print(f"⚠️  {path.name}: can't hash ({e})")
+            return job
+        match = self.index.find(job["dhash"], job["ahash"])
+        if match:
+            pos, distance, _ = match
+            original, prospect_id = self.index.labels[pos]
+            self.counts["reposted"] += 1
+            self._record(job, "duplicate", prospect_id=prospect_id,
+                         detail=f"same card as {original} (dHash distance {distance})")
+            print(f"⏭️  {path.name}: same card as {Path(original).name}"
+                  + (f" (#{prospect_id})" if prospect_id else "") + " — skipped before extraction")
+            return None
+        job["pos"] = self.index.add(job["dhash"], job["ahash"], (str(path), None))
+        return job
+
+    def _fail(self, job, error):
+        """Count and ledger a screenshot that couldn't be ingested; the next run retries it."""
+        self.counts["failed"] += 1
+        detail = str(error) or type(error).__name__
+        print(f"❌ {job['path'].name}: {detail}")
+        try:
+            self._record(job, "failed", detail=detail)
+        except Exception as e:
+            print(f"   (couldn't record the failure: {e})")
+
+    def _record(self, job, status, **fields):
+        prospect_db.record_screenshot(job["path"], job["sha256"], status, seen_at=job["seen_at"],
+                                      dhash=job["dhash"], ahash=job["ahash"], **fields)
+        if job["pos"] is not None:
+            if status == "failed":
+                self.index.remove(job["pos"])
+            else:
+                self.index.labels[job["pos"]] = (str(job["path"]), fields.get("prospect_id"))
+
+    def _extract(self, path):
+        started = time.time()
+        fields = parse_extraction(self.extractor(extraction_prompt(path), path))
+        if self.scorer is not None:
+            scored = self.scorer.score_card(path, fields["card_text"])
+            if "error" not in scored:
+                fields["score"] = scored["card_score"]
+                fields["quality_issues"] += [s for s in scored["sins"] if s not in fields["quality_issues"]]
+        return fields, started, time.time()
+
+    def _card_info(self, fields):
+        return {
+            "business_name": fields["business_name"],
+            "trade": fields["trade"],
+            "trade_description": fields.get("trade_description") or fields["trade"].title(),
+            "phone": fields.get("phone") or "(615) 555-0000",
+            "email": fields.get("email") or "",
+            "location": fields.get("location") or "Tennessee",
+            "license_text": fields.get("license_text") or "Licensed & Insured",
+        }
+
+    def _finish(self, job, future):
+        try:
+            self._ingest(job, *future.result())
+        except Exception as e:
+            self._fail(job, e)
+
+    def _ingest(self, job, fields, started, extracted_at):
+        path, seen_at = job["path"], job["seen_at"]
+        name, phone = fields["business_name"], fields.get("phone") or None
+        match = prospect_db.find_duplicate(name, phone)
+        if match:
+            self.counts["duplicate"] += 1
+            self._record(job, "duplicate", prospect_id=match["id"], detail=match["reason"], extracted_at=extracted_at,
+                         card_text=fields["card_text"])
+            print(f"⏭️  {path.name}: {name} looks like #{match['id']} {match['name']} ({match['reason']})")
+            return
+        prospect = prospect_db.add_prospect(
+            name, fields["trade"], phone=phone, group_source=self.group_source, card_score=fields["score"],
+            screenshot_path=str(path), notes="; ".join(fields["quality_issues"]) or None,
+        )
+        render_start = time.time()
+        self.render(prospect, self._card_info(fields))
+        previewed_at = time.time()
+        self._record(job, "prospect", prospect_id=prospect["id"], extracted_at=extracted_at, previewed_at=previewed_at,
+                     card_text=fields["card_text"])
+        self.counts["prospect"] += 1
+        timing = {
+            "total": previewed_at - seen_at,
+            "wait": started - seen_at,
+            "extract": extracted_at - started,
+            "render": previewed_at - render_start,
+        }
+        self.turnarounds.append(timing)
+        print(f"🖼️  {path.name} → #{prospect['id']} {name} ({fields['trade']}, score {fields['score']}/10): "
+              f"preview in {timing['total']:.1f}s (queued {timing['wait']:.1f}s, extract {timing['extract']:.1f}s, "
+              f"render {timing['render']:.1f}s)")
+
+    def run(self, once=False, poll_s=POLL_S):
+        """Ingest until interrupted, or with ``once`` until the folder's backlog is done."""
+        self.inbox.directory.mkdir(parents=True, exist_ok=True)
+        observer = None if once else start_watching(self.inbox)
+        mode = "backlog only" if once else "inotify/FSEvents via watchdog" if observer else f"polling every {poll_s:g}s"
+        print(f"👀 Watching {self.inbox.directory} ({mode}) — backend {self.extractor.name}, "
+              f"{self.concurrency} concurrent extraction(s)")
+        if observer is None and not once:
+            print("   (pip install watchdog to pick screenshots up the moment they land)")
+        self.inbox.scan()
+        in_flight = {}
+        last_scan = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="extract") as pool:
+                while True:
+                    if observer is None and time.monotonic() - last_scan >= poll_s:
+                        self.inbox.scan()
+                        last_scan = time.monotonic()
+                    for path, seen_at in self.inbox.ready():
+                        job = self._queue(path, seen_at)
+                        if job:
+                            in_flight[pool.submit(self._extract, path)] = job
+                    if once and not in_flight and self.inbox.idle():
+                        break
+                    tick = max(min(self.inbox.settle_s, poll_s) / 2, 0.05)
+                    if not in_flight:
+                        time.sleep(tick)
+                        continue
+                    done, _ = wait(in_flight, timeout=tick, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(in_flight.pop(future), future)
+        except KeyboardInterrupt:
+            print("\n⏹️  Stopped")
+        finally:
+            if observer is not None:
+                observer.stop()
+        self.summary()
+        return self.counts
+
+    def summary(self):
+        counts = ", ".join(f"{n} {k}" for k, n in self.counts.items() if n)
+        print(f"\n✅ Ingested: {counts or 'nothing new'}")
+        if self.turnarounds:
+            totals = [t["total"] for t in self.turnarounds]
+            avg = {k: sum(t[k] for t in self.turnarounds) / len(self.turnarounds) for k in ("wait", "extract", "render")}
+            print(f"⏱️  Screenshot → preview: p50 {_percentile(totals, 50):.1f}s, p95 {_percentile(totals, 95):.1f}s, "
+                  f"max {max(totals):.1f}s (avg queued {avg['wait']:.1f}s, extract {avg['extract']:.1f}s, "
+                  f"render {avg['render']:.1f}s)")
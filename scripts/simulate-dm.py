@@ -4,94 +4,72 @@ Simulate DM Outreach — Test the full message pipeline without sending.
 Generates personalized DMs for each prospect using templates.
 """
 
-import json
+import sys
+import time
 from pathlib import Path
 from datetime import date
 
+import dm_engine
+import prospect_db
+
 PROJECT_ROOT = Path(__file__).parent.parent
-PROSPECTS_FILE = PROJECT_ROOT / "research" / "prospects.json"
-DM_TEMPLATES_FILE = PROJECT_ROOT / "templates" / "dm-messages.md"
+DM_TEMPLATES_FILE = dm_engine.DM_TEMPLATES_FILE
 SIMULATIONS_DIR = PROJECT_ROOT / "delivery" / "simulated-dms"
 
-# Template A (best performer)
-TEMPLATE_A = """Hey {name}! 👋
-
-Saw your post in {group} — looks like you do great {trade} work! I actually do business card and brand design for contractors here in Tennessee.
-
-I took a few minutes and mocked up what a refreshed version of your card could look like (totally free, no strings attached). Thought you might like to see it:
-
-📎 [ATTACHED: {preview_file}]
 
-If you want the full print-ready files, it's just $50 and I can have them to you today. Includes 3 different design options + unlimited tweaks until you love it.
-
-Payment link: {stripe_link}
+def _echo(dms, sim_dir):
+    """Print each DM as it streams past on its way to disk."""
+    for dm in dms:
+        print(f"\n{'─'*60}")
+        print(f"📬 TO: {dm['to']} ({dm['trade']})")
+        print(f"   Source: {dm['group_source']}")
+        print(f"   Card Score: {dm['card_score']}/10")
+        print(f"   Issues: {dm['notes']}")
+        print(f"{'─'*60}")
+        print(dm["message"])
+        if sim_dir:
+            print(f"\n   💾 Saved to: {sim_dir / dm_engine.dm_filename(dm)}")
+        yield dm
 
-Either way, keep crushing it! 💪"""
 
+def _tally(dms, missing):
+    """Note DMs going out without a rendered preview."""
+    for dm in dms:
+        if not dm["attachments"]:
+            missing.append(dm["to"])
+        yield dm
 
-def load_prospects():
-    with open(PROSPECTS_FILE) as f:
-        return json.load(f)
 
+def simulate_all(template="A", status="new", outbox=None, quiet=False, stripe_link=None, workers=4):
+    prospects = prospect_db.iter_prospects(status=status)
 
-def simulate_all():
-    SIMULATIONS_DIR.mkdir(parents=True, exist_ok=True)
-    data = load_prospects()
-    
     print("\n" + "=" * 60)
     print("📨 SIMULATED DM OUTREACH")
     print(f"   Date: {date.today()}")
-    print(f"   Prospects: {len(data['prospects'])}")
+    print(f"   Template: {template}")
+    print(f"   Prospects: {prospect_db.count_prospects(status=status)} {status}")
     print("=" * 60)
-    
-    stripe_link = "https://buy.stripe.com/test_XXXXXXXX"  # Replace with real link
-    
-    for prospect in data["prospects"]:
-        if prospect["status"] != "new":
-            continue
-        
-        safe_name = prospect["name"].lower().replace(" ", "_").replace("'", "")
-        preview_file = f"{safe_name}_clean_professional_*_preview.html"
-        
-        # Use business name as-is (in real usage, use the owner's first name)
-        display_name = prospect.get("owner_name", prospect["name"])
-        dm = TEMPLATE_A.format(
-            name=display_name,
-            group=prospect["group_source"],
-            trade=prospect["trade"],
-            preview_file=preview_file,
-            stripe_link=stripe_link
-        )
-        
-        # Save simulation
-        sim_file = SIMULATIONS_DIR / f"dm_{safe_name}_{date.today()}.txt"
-        with open(sim_file, 'w') as f:
-            f.write(f"TO: {prospect['name']} (Facebook Messenger)\n")
-            f.write(f"FROM: Design Arbitrage\n")
-            f.write(f"DATE: {date.today()}\n")
-            f.write(f"STATUS: SIMULATED (not sent)\n")
-            f.write(f"CARD SCORE: {prospect['card_score']}/10\n")
-            f.write(f"NOTES: {prospect['notes']}\n")
-            f.write(f"\n{'='*50}\n\n")
-            f.write(dm)
-            f.write(f"\n\n{'='*50}\n")
-            f.write(f"ATTACHMENTS:\n")
-            f.write(f"  1. {safe_name}_clean_professional_preview.html\n")
-            f.write(f"  2. {safe_name}_dark_bold_preview.html\n")
-            f.write(f"  3. {safe_name}_trade_badge_preview.html\n")
-        
-        print(f"\n{'─'*60}")
-        print(f"📬 TO: {prospect['name']} ({prospect['trade']})")
-        print(f"   Source: {prospect['group_source']}")
-        print(f"   Card Score: {prospect['card_score']}/10")
-        print(f"   Issues: {prospect['notes']}")
-        print(f"{'─'*60}")
-        print(dm)
-        print(f"\n   💾 Saved to: {sim_file}")
-    
+
+    start = time.perf_counter()
+    missing = []
+    try:
+        dms = _tally(dm_engine.generate_dms(prospects, template, stripe_link), missing)
+        if not quiet:
+            dms = _echo(dms, None if outbox else SIMULATIONS_DIR)
+        if outbox:
+            count = dm_engine.write_outbox(dms, outbox)
+        else:
+            count = dm_engine.write_dm_files(dms, SIMULATIONS_DIR, workers=workers)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
     print(f"\n{'='*60}")
-    print(f"✅ Simulated {len([p for p in data['prospects'] if p['status'] == 'new'])} DMs")
-    print(f"   Files saved to: {SIMULATIONS_DIR}")
+    print(f"✅ Simulated {count} DMs in {elapsed:.2f}s")
+    print(f"   Saved to: {outbox or SIMULATIONS_DIR}")
+    if missing:
+        print(f"   ⚠️  {len(missing)} without a preview: run redesign-pipeline.py generate-batch first")
     print(f"\n   To go LIVE:")
     print(f"   1. Open each prospect's Facebook profile")
     print(f"   2. Copy the DM text above")
@@ -99,7 +77,22 @@ def simulate_all():
     print(f"   4. Send!")
     print(f"   5. Run: python3 fb-group-monitor.py update <ID> contacted")
     print(f"{'='*60}")
+    return count
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate outreach DMs without sending them")
+    parser.add_argument("--template", default="A",
+                        help="Template from dm-messages.md: A, B, C, D, D-dm, followup-1, followup-2, post-purchase")
+    parser.add_argument("--status", default="new", choices=prospect_db.STATUSES, help="Prospects to message")
+    parser.add_argument("--outbox", help="Append DMs to this JSONL file instead of one text file each")
+    parser.add_argument("--quiet", action="store_true", help="Don't print each DM")
+    parser.add_argument("--stripe-link", help="Payment link (default: from config/stripe.json)")
+    parser.add_argument("--workers", type=int, default=4, help="Threads writing DM files")
+    args = parser.parse_args()
+    simulate_all(args.template, args.status, args.outbox, args.quiet, args.stripe_link, args.workers)
 
 
 if __name__ == "__main__":
-    simulate_all()
+    main()
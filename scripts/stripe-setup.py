@@ -137,22 +137,40 @@ def create_webhook_server():
 Stripe Webhook Server — Handles payment completion and file delivery.
 Run: python webhook-server.py
 Expose: ngrok http 4242 (for testing)
+
+The webhook only queues the delivery (research/delivery-queue.db, keyed on
+the Stripe event id, so redelivered events are ignored) and answers at once;
+DELIVERY_WORKERS background threads send the email, retrying with backoff,
+over a pool of persistent SMTP sessions (see mail_transport.py).
 """
 import json
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email.mime.text import MIMEText
-from email import encoders
 from pathlib import Path
 from flask import Flask, request, jsonify
 import stripe
 
+import delivery_queue
+import mail_transport
+import prospect_db
+
 app = Flask(__name__)
 stripe.api_key = os.environ.get("STRIPE_SECRET_KEY")
 WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET")
 REDESIGNS_DIR = Path(__file__).parent.parent / "assets" / "redesigns"
+# Only rendered finals are deliverables; HTML fallbacks stay for manual work
+DELIVERABLE_SUFFIXES = {".png", ".pdf"}
+# Manifest kinds sent, best first: the 300 DPI print exports, else screen finals
+DELIVERABLE_KINDS = (("print_png", "print_pdf"), ("final",))
+# What the email promises for each kind actually attached
+INCLUDED = (
+    ("print_png", 'Print-ready PNG files (300 DPI), 3.5" × 2" plus 1/8" bleed'),
+    ("print_pdf", 'Vector PDFs, 3.5" × 2" plus 1/8" bleed'),
+    ("final", 'PNG files sized for standard 3.5" × 2" business cards'),
+)
+# Zip the deliverables into one attachment when together they exceed this
+ZIP_OVER_BYTES = float(os.environ.get("DELIVERY_ZIP_OVER_MB", "inf")) * 1024 * 1024
+QUEUE = delivery_queue.DeliveryQueue()
+MAIL = mail_transport.SMTPPool()
 
 @app.route("/webhook", methods=["POST"])
 def stripe_webhook():
@@ -175,29 +193,63 @@ def stripe_webhook():
         print(f"💰 Payment received from {customer_email}")
         print(f"   Type: {metadata.get('type', 'unknown')}")
         
-        # Trigger file delivery
-        deliver_files(customer_email, customer_name, metadata)
+        # Queue file delivery; the workers send it after we answer Stripe
+        queued = QUEUE.enqueue(event["id"], {
+            "email": customer_email,
+            "name": customer_name,
+            "session": {"client_reference_id": session.get("client_reference_id"), "metadata": metadata},
+        })
+        if not queued:
+            print(f"   ↩️ Event {event['id']} already queued — ignoring duplicate")
     
     return jsonify({"status": "ok"}), 200
 
 
-def deliver_files(email, name, metadata):
+def run_delivery(job):
+    """Queue worker entry point: raises if the send should be retried."""
+    deliver_files(job["email"], job["name"], resolve_prospect_id(job["session"]))
+
+
+def resolve_prospect_id(session):
+    """Which prospect paid: the DM link's client_reference_id, else metadata."""
+    metadata = session.get("metadata") or {}
+    for ref in (session.get("client_reference_id"), metadata.get("prospect_id")):
+        if ref and str(ref).isdigit():
+            return int(ref)
+    if metadata.get("prospect_name"):
+        return prospect_db.find_prospect_id(metadata["prospect_name"])
+    return None
+
+
+def final_files(prospect_id):
+    """The prospect's newest final renders (manifest rows), straight from the asset manifest."""
+    assets = [
+        asset for asset in prospect_db.get_assets(prospect_id)
+        if asset["path"].suffix in DELIVERABLE_SUFFIXES and asset["path"].exists()
+    ]
+    for kinds in DELIVERABLE_KINDS:
+        chosen = [asset for asset in assets if asset["kind"] in kinds]
+        if chosen:
+            return chosen
+    return []
+
+
+def deliver_files(email, name, prospect_id):
     """Deliver redesign files to customer via email."""
-    prospect_name = metadata.get("prospect_name", "customer")
-    safe_name = prospect_name.lower().replace(" ", "_")
+    if prospect_id is None:
+        print(f"⚠️ Payment from {email} has no prospect reference — manual delivery needed")
+        return
     
     # Find their files
-    files = list(REDESIGNS_DIR.glob(f"{safe_name}_*_final.*"))
+    assets = final_files(prospect_id)
+    files = [asset["path"] for asset in assets]
     
     if not files:
-        print(f"⚠️ No files found for {prospect_name} — manual delivery needed")
+        print(f"⚠️ No rendered files for prospect #{prospect_id} — manual delivery needed")
         return
     
-    # Send via email (configure SMTP settings)
-    smtp_host = os.environ.get("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.environ.get("SMTP_PORT", 587))
-    smtp_user = os.environ.get("SMTP_USER")
-    smtp_pass = os.environ.get("SMTP_PASS")
+    # Send via email (configure SMTP_* settings, see mail_transport.py)
+    smtp_user = MAIL.config.user
     
     if not smtp_user:
         print(f"📧 Email delivery not configured. Files ready at: {REDESIGNS_DIR}")
@@ -205,19 +257,17 @@ def deliver_files(email, name, metadata):
             print(f"   → {f}")
         return
     
-    msg = MIMEMultipart()
-    msg["From"] = smtp_user
-    msg["To"] = email
-    msg["Subject"] = f"Your Professional Business Card Redesign — {name}"
-    
+    designs = len({asset["template"] for asset in assets})
+    kinds = {asset["kind"] for asset in assets}
+    included = [f"{designs} unique design variation{'s' if designs != 1 else ''}"]
+    included += [text for kind, text in INCLUDED if kind in kinds]
+    included = "\\n".join(f"• {line}" for line in included)
     body = f"""Hi {name},
 
 Thank you for your order! Your professional business card redesigns are attached.
 
 What's included:
-• 3 unique design variations
-• Print-ready PNG files (300 DPI)
-• Files sized for standard 3.5" × 2" business cards
+{included}
 
 NEXT STEPS:
 1. Pick your favorite design
@@ -230,31 +280,29 @@ Best,
 [Your Name]
 Design Arbitrage Co.
 """
-    msg.attach(MIMEText(body, "plain"))
-    
-    for filepath in files:
-        with open(filepath, "rb") as f:
-            part = MIMEBase("application", "octet-stream")
-            part.set_payload(f.read())
-            encoders.encode_base64(part)
-            part.add_header("Content-Disposition", f"attachment; filename={filepath.name}")
-            msg.attach(part)
+    # Attachments stream from disk while sending, never held in memory whole
+    bundle = sum(f.stat().st_size for f in files) > ZIP_OVER_BYTES
+    msg = mail_transport.StreamingMessage(
+        smtp_user, email, f"Your Professional Business Card Redesign — {name}", body, files,
+        zip_name=f"{prospect_db.safe_name(name) or 'redesign'}_designs.zip" if bundle else None,
+    )
     
     try:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, email, msg.as_string())
+        MAIL.send(smtp_user, [email], msg)
         print(f"✅ Files delivered to {email}")
     except Exception as e:
         print(f"❌ Email failed: {e}")
-        print(f"   Files ready for manual delivery at: {REDESIGNS_DIR}")
+        raise
 
 
 if __name__ == "__main__":
+    workers = delivery_queue.DeliveryWorkers(
+        QUEUE, run_delivery, count=int(os.environ.get("DELIVERY_WORKERS", 2))
+    ).start()
     print("🚀 Webhook server running on port 4242")
     print("   Expose with: ngrok http 4242")
-    app.run(port=4242)
+    print(f"   Delivery queue: {QUEUE.path} ({len(workers.threads)} workers)")
+    app.run(port=4242, threaded=True)
 '''
     
     server_path = PROJECT_ROOT / "scripts" / "webhook-server.py"
@@ -293,6 +341,23 @@ def show_payment_links():
     print("\n" + "=" * 60)
 
 
+def show_deliveries(retry_failed=False):
+    """Summarize the webhook's delivery queue, optionally re-queueing failures."""
+    import delivery_queue
+    queue = delivery_queue.DeliveryQueue()
+    if retry_failed:
+        print(f"🔁 Re-queued {queue.retry_failed()} failed deliveries")
+    counts = queue.counts()
+    print("\n📦 DELIVERY QUEUE")
+    print("=" * 60)
+    for status in ("pending", "running", "done", "failed"):
+        print(f"  {status:<8} {counts.get(status, 0)}")
+    for job in queue.failed():
+        print(f"\n  ❌ {job['event_id']} — {job['attempts']} attempts")
+        print(f"     {job['last_error']}")
+    print("=" * 60)
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Stripe Setup for Design Arbitrage")
@@ -301,6 +366,14 @@ def main():
     subparsers.add_parser("create-products", help="Create Stripe products")
     subparsers.add_parser("create-webhook", help="Generate webhook server")
     subparsers.add_parser("links", help="Show payment links")
+    sink = subparsers.add_parser("smtp-sink", help="Run a local SMTP server that saves mail instead of sending it")
+    sink.add_argument("--host", default="127.0.0.1")
+    sink.add_argument("--port", type=int, default=1025)
+    sink.add_argument("--dir", help="Where to save received messages (default delivery/smtp-sink)")
+    sb = subparsers.add_parser("smtp-bench", help="Compare pooled SMTP sends against one connection per message")
+    sb.add_argument("--messages", type=int, default=50)
+    dq = subparsers.add_parser("deliveries", help="Show the webhook delivery queue")
+    dq.add_argument("--retry-failed", action="store_true", help="Re-queue deliveries that ran out of retries")
     
     args = parser.parse_args()
     
@@ -310,6 +383,14 @@ def main():
         create_webhook_server()
     elif args.command == "links":
         show_payment_links()
+    elif args.command == "smtp-sink":
+        import mail_transport
+        mail_transport.run_sink(args.host, args.port, args.dir or mail_transport.SINK_DIR)
+    elif args.command == "smtp-bench":
+        import mail_transport
+        mail_transport.benchmark(args.messages)
+    elif args.command == "deliveries":
+        show_deliveries(args.retry_failed)
     else:
         parser.print_help()
         print("\n💡 Quick start:")
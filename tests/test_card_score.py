@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import card_score  # noqa: E402
+
+
+def _palette(path):
+    Image.new("RGB", (1400, 800), (200, 30, 30)).quantize(4).save(path)
+
+
+def _gray16(path):
+    values = np.linspace(0, 65535, 1400 * 800).reshape(800, 1400).astype(np.uint16)
+    Image.fromarray(values).convert("I;16").save(path)
+
+
+def _gif(path):
+    Image.new("RGB", (1400, 800), (30, 30, 200)).save(path)
+
+
+@pytest.mark.parametrize("name, make, mode", [
+    ("palette.png", _palette, "P"),
+    ("gray16.png", _gray16, "I;16"),
+    ("card.gif", _gif, "P"),
+])
+def test_load_image_converts_non_rgb_modes(tmp_path, name, make, mode):
+    path = tmp_path / name
+    make(path)
+    with Image.open(path) as img:
+        assert img.mode == mode
+    image = card_score.load_image(path)
+    assert image.shape == (card_score.SIZE[1], card_score.SIZE[0], 3)
+    assert image.dtype == np.uint8
+
+
+@pytest.mark.parametrize("make", [_palette, _gray16])
+def test_score_card_scores_non_rgb_modes(tmp_path, make):
+    path = tmp_path / "card.png"
+    make(path)
+    result = card_score.score_card(path)
+    assert "error" not in result
+    assert 1 <= result["card_score"] <= 10
+
+
+def test_load_image_unreadable(tmp_path):
+    path = tmp_path / "broken.png"
+    path.write_bytes(b"not an image")
+    assert card_score.load_image(path) is None
@@ -0,0 +1,57 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+spec = importlib.util.spec_from_file_location("fb_group_monitor", SCRIPTS / "fb-group-monitor.py")
+monitor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(monitor)
+
+
+def test_read_import_file_skips_bad_rows(tmp_path, capsys):
+    path = tmp_path / "leads.jsonl"
+    lines = [
+        json.dumps({"name": "Ace Roofing", "trade": "roofing", "phone": 6155550100, "card_score": "n/a"}),
+        "{not json",
+        json.dumps({"name": "Bolt Electric", "trade": "electrical", "card_score": ""}),
+        json.dumps({"name": "No Trade"}),
+        json.dumps(["not", "a", "record"]),
+        json.dumps({"name": "Clean Pools", "trade": "pools", "card_score": "7"}),
+    ]
+    path.write_text("\n".join(lines) + "\n")
+
+    records = list(monitor.read_import_file(path))
+
+    assert [r["name"] for r in records] == ["Ace Roofing", "Bolt Electric", "Clean Pools"]
+    assert records[0]["phone"] == "6155550100"
+    assert records[0]["card_score"] is None
+    assert records[1]["card_score"] is None
+    assert records[2]["card_score"] == 7
+    out = capsys.readouterr().out
+    for line_no in (1, 2, 4, 5):
+        assert f"Row {line_no}:" in out
+
+
+def test_read_import_file_csv(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text("name,trade,phone,score\nAce Roofing,roofing,(615) 555-0100,oops\n")
+    records = list(monitor.read_import_file(path))
+    assert len(records) == 1
+    assert records[0]["card_score"] is None
+
+
+@pytest.mark.parametrize("value, text", [
+    (12.345, "$12.35"),
+    (1234.5, "$1,234.50"),
+    (0.01, "$0.01"),
+    (0.0034, "$0.0034"),
+    (0.000034, "$0.000034"),
+    (0, "$0.00"),
+])
+def test_format_ev_keeps_small_values_visible(value, text):
+    assert monitor.format_ev(value) == text
@@ -0,0 +1,123 @@
+import email
+import io
+import os
+import socketserver
+import sys
+import threading
+import zipfile
+from email import policy
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import mail_transport  # noqa: E402
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; hangs up on MAIL after ``drop_after`` messages."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server
+        sink.connections.append(self.connection)
+        self.reply("220 sink ready")
+        sent = 0
+        while line := self.rfile.readline():
+            verb = line[:4].decode().upper()
+            if verb in ("EHLO", "HELO", "RCPT", "NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "MAIL":
+                if sink.drop_after is not None and sent >= sink.drop_after:
+                    return
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                while (data := self.rfile.readline()) != b".\r\n":
+                    lines.append(data[1:] if data.startswith(b".") else data)
+                sink.messages.append(b"".join(lines))
+                sent += 1
+                self.reply("250 accepted")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("500 unknown command")
+
+
+@pytest.fixture
+def sink():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SinkHandler)
+    server.daemon_threads = True
+    server.messages, server.connections, server.drop_after = [], [], None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(sink):
+    config = mail_transport.SMTPConfig(host="127.0.0.1", port=sink.server_address[1], starttls=False, timeout_s=5)
+    pool = mail_transport.SMTPPool(config)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def files(tmp_path):
+    # Sizes straddle the base64 line and read-block boundaries
+    sizes = {"card-front.png": mail_transport.READ_BYTES * 2 + 1, "card-back.pdf": 1000, "empty.txt": 0}
+    paths = []
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.write_bytes(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def _attachments(raw):
+    message = email.message_from_bytes(raw, policy=policy.default)
+    return message, {part.get_filename(): part.get_payload(decode=True) for part in message.iter_attachments()}
+
+
+def test_streaming_attachments_round_trip(pool, sink, files):
+    body = "Your cards are attached.\n.a line that starts with a dot\n"
+    pool.send("studio@example.com", ["client@example.com"],
+              mail_transport.StreamingMessage("studio@example.com", "client@example.com", "Your cards", body, files))
+
+    message, attachments = _attachments(sink.messages[0])
+    assert message["Subject"] == "Your cards"
+    assert message.get_body(("plain",)).get_content().replace("\r\n", "\n") == body
+    assert attachments == {path.name: path.read_bytes() for path in files}
+
+
+def test_streaming_zip_round_trip(pool, sink, files):
+    pool.send("studio@example.com", ["client@example.com"],
+              mail_transport.StreamingMessage("studio@example.com", "client@example.com", "Your cards", "Zipped.",
+                                              files, zip_name="cards.zip"))
+
+    _, attachments = _attachments(sink.messages[0])
+    assert list(attachments) == ["cards.zip"]
+    with zipfile.ZipFile(io.BytesIO(attachments["cards.zip"])) as bundle:
+        assert bundle.testzip() is None
+        assert {name: bundle.read(name) for name in bundle.namelist()} == {p.name: p.read_bytes() for p in files}
+
+
+def test_reconnect_closes_the_dropped_session(pool, sink, files):
+    sink.drop_after = 1
+    opened = []
+    connect = pool._connect
+    pool._connect = lambda: opened.append(connect()) or opened[-1]
+
+    message = mail_transport.StreamingMessage("studio@example.com", "client@example.com", "Cards", "Hi.", files[:1])
+    pool.send_many([("studio@example.com", ["client@example.com"], message)] * 2)
+
+    assert pool.stats == {"connects": 2, "messages": 2, "reconnects": 1}
+    assert opened[0].smtp.sock is None
+    assert [_attachments(raw)[1] for raw in sink.messages] == [{files[0].name: files[0].read_bytes()}] * 2
@@ -0,0 +1,236 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import prospect_db  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    conn = prospect_db.connect(tmp_path / "prospects.db")
+    yield conn
+    conn.close()
+
+
+def test_exact_duplicate_found_past_fuzzy_candidate_cap(db):
+    count = prospect_db.FUZZY_CANDIDATES + 200
+    # Distinct phones keep the similar names apart
+    records = [{"name": f"Nashville Handyman {i}", "trade": "handyman", "phone": f"615555{i:04d}"}
+               for i in range(count)]
+    added, duplicates = prospect_db.import_prospects(records, conn=db)
+    assert len(added) == count and not duplicates
+
+    added, duplicates = prospect_db.import_prospects([{"name": "Nashville Handyman 699", "trade": "handyman"}],
+                                                     conn=db)
+    assert not added
+    assert duplicates[0][1]["reason"] == "name"
+
+
+def test_names_differing_only_in_numbers_are_not_duplicates(db):
+    records = [{"name": f"A{i} Roofing", "trade": "roofing"} for i in range(1, 601)]
+    added, duplicates = prospect_db.import_prospects(records, conn=db)
+    assert len(added) == 600 and not duplicates
+
+
+def test_similar_name_is_a_duplicate(db):
+    prospect_db.import_prospects([{"name": "Volunteer State Roofing", "trade": "roofing"}], conn=db)
+    match = prospect_db.find_duplicate("Volunteer State Roofng", conn=db)
+    assert match and match["reason"].startswith("similar name")
+
+
+def _statuses(db):
+    return dict(db.execute("SELECT name, status FROM prospects"))
+
+
+def test_sync_replays_events_appended_after_compaction(db, monkeypatch):
+    monkeypatch.setattr(prospect_db, "EVENTS_COMPACT_BYTES", 1)
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", conn=db)
+    bolt = prospect_db.add_prospect("Bolt Electric", "electrical", conn=db)
+    log = prospect_db.events_log(db)
+
+    prospect_db.set_status(ace["id"], "contacted", conn=db)
+    assert log.stat().st_size == 0
+    assert db.execute("SELECT value FROM meta WHERE key = 'events_offset'").fetchone()[0] == "0"
+
+    prospect_db.append_event(bolt["id"], "contacted", conn=db)
+    assert prospect_db.sync_events(db) == 1
+    assert _statuses(db) == {"Ace Roofing": "contacted", "Bolt Electric": "contacted"}
+    assert prospect_db.sync_events(db) == 0
+    assert db.execute("SELECT COUNT(*) FROM status_events").fetchone()[0] == 2
+
+
+def test_sync_rereads_a_log_shorter_than_its_offset(db):
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", conn=db)
+    # A compaction whose offset reset never ran, followed by a fresh append
+    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('events_offset', '100000')")
+    prospect_db.append_event(ace["id"], "contacted", conn=db)
+
+    assert prospect_db.sync_events(db) == 1
+    assert _statuses(db) == {"Ace Roofing": "contacted"}
+    offset = db.execute("SELECT value FROM meta WHERE key = 'events_offset'").fetchone()[0]
+    assert int(offset) == prospect_db.events_log(db).stat().st_size
+
+
+def test_sync_leaves_a_torn_last_line_for_later(db):
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", conn=db)
+    log = prospect_db.events_log(db)
+    line = json.dumps({"prospect_id": ace["id"], "status": "contacted", "ts": "2026-01-01T09:00:00"}) + "\n"
+    with open(log, "a") as f:
+        f.write(line[:20])
+    assert prospect_db.sync_events(db) == 0
+    with open(log, "a") as f:
+        f.write(line[20:])
+    assert prospect_db.sync_events(db) == 1
+    assert _statuses(db) == {"Ace Roofing": "contacted"}
+
+
+def test_aggregates_match_a_full_recompute(db):
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", group_source="Nashville Contractors",
+                                   found_date="2026-01-01", conn=db)
+    prospect_db.import_prospects([
+        {"name": "Bolt Electric", "trade": "electrical", "group_source": "Nashville Contractors"},
+        {"name": "Clean Pools", "trade": "pools"},
+        {"name": "Drip Plumbing", "trade": "plumbing", "group_source": "Franklin Trades"},
+    ], found_date="2026-01-02", conn=db)
+    ids = dict(db.execute("SELECT name, id FROM prospects"))
+    assert prospect_db.verify_aggregates(db) == {}
+
+    for name, status in [("Ace Roofing", "contacted"), ("Ace Roofing", "converted"), ("Ace Roofing", "delivered"),
+                         ("Bolt Electric", "contacted"), ("Bolt Electric", "converted"),
+                         ("Bolt Electric", "converted"), ("Clean Pools", "contacted"), ("Clean Pools", "replied")]:
+        prospect_db.set_status(ids[name], status, conn=db)
+    assert prospect_db.verify_aggregates(db) == {}
+
+    with prospect_db.transaction(db):
+        for prospect_id in (ace["id"], ids["Drip Plumbing"]):
+            before = prospect_db.get_prospect(prospect_id, db)
+            db.execute("DELETE FROM prospects WHERE id = ?", (prospect_id,))
+            prospect_db.update_aggregates(db, before, None)
+    assert prospect_db.verify_aggregates(db) == {}
+    assert prospect_db.get_stats(db) == {"total_found": 2, "contacted": 2, "converted": 1}
+    assert prospect_db.total_revenue(db) == prospect_db.CONVERSION_REVENUE
+    assert prospect_db.get_aggregate("group", "Franklin Trades", db)["count"] == 0
+
+
+def test_pop_contacts_takes_the_queue_in_priority_order(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(prospect_db, "CONFIG_PATH", tmp_path / "config.json")
+    # Worse cards are worth more; older finds have decayed
+    for name, score, found in [("Ace Roofing", 2, "2026-03-01"), ("Bolt Electric", 9, "2026-03-01"),
+                               ("Clean Pools", 5, "2026-03-01"), ("Drip Plumbing", 2, "2026-02-01"),
+                               ("Even Floors", 3, "2026-03-01")]:
+        prospect_db.add_prospect(name, "handyman", card_score=score, found_date=found, conn=db)
+    expected = ["Ace Roofing", "Even Floors", "Clean Pools", "Bolt Electric", "Drip Plumbing"]
+    assert [p["name"] for p in prospect_db.peek_contacts(10, db)] == expected
+
+    first = prospect_db.pop_contacts(2, db)
+    assert [p["name"] for p in first] == expected[:2]
+    assert first[0]["ev"] > first[1]["ev"]
+    rest = prospect_db.pop_contacts(10, db)
+    assert [p["name"] for p in rest] == expected[2:]
+    assert prospect_db.pop_contacts(10, db) == []
+    assert set(_statuses(db).values()) == {"contacted"}
+
+
+def test_concurrent_pops_never_share_a_prospect(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(prospect_db, "CONFIG_PATH", tmp_path / "config.json")
+    prospect_db.import_prospects([{"name": f"Handyman {i}", "trade": "handyman", "card_score": 1 + i % 10}
+                                  for i in range(40)], conn=db)
+    popped, errors = [], []
+
+    def worker():
+        conn = prospect_db.connect(tmp_path / "prospects.db")
+        try:
+            while batch := prospect_db.pop_contacts(3, conn):
+                popped.extend(p["id"] for p in batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert not errors
+    assert sorted(popped) == sorted(dict(db.execute("SELECT id, name FROM prospects")))
+    assert set(_statuses(db).values()) == {"contacted"}
+
+
+def _contact(db, name, ts, status="contacted"):
+    prospect = prospect_db.add_prospect(name, "handyman", found_date=ts[:10], conn=db)
+    prospect_db.append_event(prospect["id"], status, ts=ts, conn=db)
+    prospect_db.sync_events(db)
+    return prospect
+
+
+def test_due_followups_selects_pending_by_due_time(db):
+    ace = _contact(db, "Ace Roofing", "2026-03-01T09:00:00")
+    _contact(db, "Bolt Electric", "2026-03-02T09:00:00")
+    clean = _contact(db, "Clean Pools", "2026-03-01T09:00:00")
+    prospect_db.append_event(clean["id"], "replied", ts="2026-03-02T10:00:00", conn=db)
+    prospect_db.sync_events(db)
+
+    plan = " ".join(row["detail"] for row in db.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM followups WHERE status = 'pending' AND due_at <= ?", ("2026-03-04",)
+    ))
+    assert "idx_followups_due" in plan
+
+    due, superseded = prospect_db.due_followups("2026-03-03T08:59:59", db)
+    assert due == [] and superseded == []
+    due, _ = prospect_db.due_followups("2026-03-04T08:00:00", db)
+    assert [(f["name"], f["template"]) for f in due] == [("Ace Roofing", "followup-1")]
+    assert prospect_db.count_followups("2026-03-04T08:00:00", db) == (1, 2)
+
+    # A week on both reminders are due; only the later one goes out
+    due, superseded = prospect_db.due_followups("2026-03-08T09:00:00", db)
+    assert [(f["name"], f["template"]) for f in due] == [("Bolt Electric", "followup-1"), ("Ace Roofing", "followup-2")]
+    assert [(f["name"], f["template"]) for f in superseded] == [("Ace Roofing", "followup-1")]
+
+    assert prospect_db.complete_followups(due, superseded, conn=db) == 2
+    due, _ = prospect_db.due_followups("2026-03-08T09:00:00", db)
+    assert due == []
+    assert prospect_db.count_followups("2026-03-30T00:00:00", db) == (1, 1)
+    assert ace["id"] not in {f["id"] for f in prospect_db.due_followups("2026-03-30T00:00:00", db)[0]}
+
+
+def test_sync_after_a_crash_between_compaction_and_offset_reset(db):
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", conn=db)
+    prospect_db.set_status(ace["id"], "contacted", conn=db)
+    log = prospect_db.events_log(db)
+    stale = int(db.execute("SELECT value FROM meta WHERE key = 'events_offset'").fetchone()[0])
+    assert stale == log.stat().st_size > 0
+
+    # The log was swapped for an empty one but the offset reset never committed;
+    # new events then grow the fresh log well past the stale offset
+    prospect_db._compact_log(log)
+    others = [prospect_db.add_prospect(f"Handyman {i}", "handyman", conn=db) for i in range(5)]
+    for prospect in others:
+        prospect_db.append_event(prospect["id"], "contacted", conn=db)
+    assert log.stat().st_size > stale
+
+    assert prospect_db.sync_events(db) == len(others)
+    assert set(_statuses(db).values()) == {"contacted"}
+
+
+def test_append_waiting_on_a_compacted_log_lands_in_the_new_one(db):
+    ace = prospect_db.add_prospect("Ace Roofing", "roofing", conn=db)
+    log = prospect_db.events_log(db)
+    with prospect_db._locked_log(log):
+        appender = threading.Thread(target=prospect_db.append_event, args=(ace["id"], "contacted"),
+                                    kwargs={"log_path": log})
+        appender.start()
+        time.sleep(0.2)  # let it open the old file and block on the lock
+        prospect_db._compact_log(log)
+    appender.join(5)
+
+    assert json.loads(log.read_text())["prospect_id"] == ace["id"]
+    assert prospect_db.sync_events(db) == 1
+    assert _statuses(db) == {"Ace Roofing": "contacted"}
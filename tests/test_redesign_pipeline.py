@@ -0,0 +1,83 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+spec = importlib.util.spec_from_file_location("redesign_pipeline", SCRIPTS / "redesign-pipeline.py")
+pipeline = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(pipeline)
+
+
+def test_substitute_converts_values_to_text():
+    template = pipeline.CompiledTemplate("$name has $count stars, $$5 for ${missing}")
+    assert template.substitute({"name": "Ace", "count": 5}) == "Ace has 5 stars, $5 for ${missing}"
+
+
+def test_generate_card_html_uses_defaults_for_null_fields():
+    html = pipeline.generate_card_html({"business_name": "Ace Roofing", "trade": None, "phone": None, "email": None},
+                                       inline_fonts=False)
+    assert "Ace Roofing" in html
+    assert "(615) 555-0000" in html
+    assert "info@example.com" in html
+    assert "None" not in html
+
+
+@pytest.fixture(scope="module")
+def chromium():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    try:
+        with sync_api.sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+    except Exception as e:
+        pytest.skip(f"Chromium can't launch: {str(e).splitlines()[0]}")
+
+
+def test_watermark_overlay_matches_browser_render(chromium):
+    pytest.importorskip("PIL")
+    assert pipeline.verify_watermark_overlay()
+
+
+def _png(path, size):
+    path.write_bytes(b"\x89PNG" + bytes(size))
+    return path
+
+
+def test_render_cache_tolerates_entries_evicted_by_another_worker(tmp_path, monkeypatch):
+    cache = pipeline.RenderCache(root=tmp_path / "cache", max_bytes=250)
+    cache.put("a", _png(tmp_path / "a.png", 100))
+    cache.put("b", _png(tmp_path / "b.png", 100))
+    # Another worker evicts "a" between our scan and our unlink
+    real_unlink = os.unlink
+
+    def racing_unlink(path):
+        real_unlink(path)
+        real_unlink(path)
+
+    monkeypatch.setattr(pipeline.os, "unlink", racing_unlink)
+    cache.put("c", _png(tmp_path / "c.png", 100))
+    assert cache.lookup("a") is None
+    assert cache.lookup("c") is not None
+
+
+def test_render_cards_keeps_renders_the_cache_fails_to_store(tmp_path, monkeypatch):
+    class Renderer:
+        def render_batch(self, parts, paths, width, height):
+            for path in paths:
+                _png(path, 10)
+
+    class BrokenCache(pipeline.RenderCache):
+        def put(self, key, src):
+            raise OSError("No space left on device")
+
+    monkeypatch.setattr(pipeline, "get_renderer", lambda: Renderer())
+    monkeypatch.setattr(pipeline, "get_render_cache", lambda: BrokenCache(root=tmp_path / "cache"))
+    output = tmp_path / "card.png"
+    results = pipeline.render_cards([({"business_name": "Ace Roofing", "trade": "roofing"}, "clean_professional",
+                                      False, output)], watermark_mode="browser")
+    assert results == [str(output)]
+    assert output.read_bytes().startswith(b"\x89PNG")
@@ -0,0 +1,131 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import prospect_db  # noqa: E402
+import screenshot_ingest  # noqa: E402
+
+
+def test_parse_extraction_coerces_fields_to_text():
+    reply = "Here you go:\n```json\n" + json.dumps({
+        "business_name": " Ace Roofing ",
+        "trade": "roofing",
+        "phone": 6155550100,
+        "email": None,
+        "location": ["Nashville"],
+        "license_text": 12345,
+        "quality_issues": "tiny phone number",
+        "score": "12",
+    }) + "\n```"
+    fields = screenshot_ingest.parse_extraction(reply)
+    assert fields["business_name"] == "Ace Roofing"
+    assert fields["phone"] == "6155550100"
+    assert fields["email"] == "" and fields["location"] == "" and fields["trade_description"] == ""
+    assert fields["license_text"] == "12345"
+    assert fields["quality_issues"] == ["tiny phone number"]
+    assert fields["score"] == 10
+    assert fields["card_text"] == "Ace Roofing\n6155550100\n12345"
+
+
+@pytest.mark.parametrize("data", [
+    {"business_name": 42.0, "trade": ""},
+    {"business_name": None, "trade": "roofing"},
+    {"business_name": {"name": "Ace"}, "trade": "roofing"},
+])
+def test_parse_extraction_needs_name_and_trade(data):
+    with pytest.raises(ValueError):
+        screenshot_ingest.parse_extraction(json.dumps(data))
+
+
+def _card(path, seed, size=(640, 360)):
+    # Coarse random blocks: distinct per seed, stable under rescaling and recompression
+    blocks = np.random.default_rng(seed).integers(0, 256, (9, 16, 3), dtype=np.uint8)
+    Image.fromarray(blocks).resize(size, Image.NEAREST).save(path)
+
+
+class FlakyExtractor(screenshot_ingest.StubExtractor):
+    def __call__(self, prompt, image_path):
+        if "broken" in Path(image_path).name:
+            raise RuntimeError("model timed out")
+        return super().__call__(prompt, image_path)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    conn = prospect_db.connect(tmp_path / "prospects.db")
+    monkeypatch.setattr(prospect_db, "_db", conn)
+    yield conn
+    conn.close()
+
+
+def _ingest(directory):
+    rendered = []
+    ingester = screenshot_ingest.Ingester(FlakyExtractor(), lambda prospect, card: rendered.append(card["business_name"]),
+                                          directory=directory, concurrency=2, settle_s=0)
+    counts = ingester.run(once=True, poll_s=0.05)
+    return counts, rendered
+
+
+def test_ingester_ledgers_prospects_reposts_and_failures(tmp_path, db):
+    inbox = tmp_path / "screenshots"
+    inbox.mkdir()
+    _card(inbox / "ace_roofing.png", 1)
+    _card(inbox / "bolt_electric.png", 2)
+    _card(inbox / "broken_plumbing.png", 3)
+    counts, rendered = _ingest(inbox)
+    assert sorted(rendered) == ["Ace Roofing", "Bolt Electric"]
+    assert counts["prospect"] == 2 and counts["failed"] == 1
+
+    # The same card, rescaled and recompressed, shared again in another group
+    _card(inbox / "ace_roofing_repost.jpg", 1, size=(480, 270))
+    counts, rendered = _ingest(inbox)
+
+    assert not rendered
+    assert counts["reposted"] == 1 and counts["skipped"] == 2 and counts["failed"] == 1
+    ledger = {Path(row["path"]).name: dict(row)
+              for row in db.execute("SELECT path, status, prospect_id, detail FROM screenshots")}
+    prospects = {row["name"]: row["id"] for row in db.execute("SELECT id, name FROM prospects")}
+    assert set(prospects) == {"Ace Roofing", "Bolt Electric"}
+    assert ledger["ace_roofing.png"]["status"] == "prospect"
+    assert ledger["ace_roofing.png"]["prospect_id"] == prospects["Ace Roofing"]
+    assert ledger["bolt_electric.png"]["status"] == "prospect"
+    assert ledger["bolt_electric.png"]["prospect_id"] == prospects["Bolt Electric"]
+    assert ledger["ace_roofing_repost.jpg"]["status"] == "duplicate"
+    assert ledger["ace_roofing_repost.jpg"]["prospect_id"] == prospects["Ace Roofing"]
+    assert ledger["broken_plumbing.png"] == {
+        "path": ledger["broken_plumbing.png"]["path"], "status": "failed", "prospect_id": None,
+        "detail": "model timed out",
+    }
+
+    counts, rendered = _ingest(inbox)
+
+    assert not rendered
+    assert counts["skipped"] == 3 and counts["failed"] == 1 and counts["prospect"] == 0
+    assert db.execute("SELECT COUNT(*) FROM prospects").fetchone()[0] == 2
+    again = {Path(row["path"]).name: dict(row)
+             for row in db.execute("SELECT path, status, prospect_id, detail FROM screenshots")}
+    assert again == ledger
+
+
+def test_ingester_keeps_going_when_a_file_fails_after_extraction(tmp_path, db):
+    inbox = tmp_path / "screenshots"
+    inbox.mkdir()
+    _card(inbox / "ace_roofing.png", 1)
+    _card(inbox / "bolt_electric.png", 2)
+
+    def render(prospect, card):
+        if card["business_name"] == "Ace Roofing":
+            raise RuntimeError("browser crashed")
+
+    ingester = screenshot_ingest.Ingester(FlakyExtractor(), render, directory=inbox, concurrency=1, settle_s=0)
+    counts = ingester.run(once=True, poll_s=0.05)
+
+    assert counts["prospect"] == 1 and counts["failed"] == 1
+    rows = dict(db.execute("SELECT path, status || ': ' || COALESCE(detail, '') FROM screenshots"))
+    assert sorted(rows.values()) == ["failed: browser crashed", "prospect: "]